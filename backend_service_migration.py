@@ -34,19 +34,16 @@ Run the script by terminal, for example:
      --region=us-central1
 
 """
-import os
 import warnings
 import google.auth
-from googleapiclient import discovery
 import argparse
 from vm_network_migration.handlers.backend_service_migration.backend_service_migration import BackendServiceMigration
+from vm_network_migration.utils import build_thread_safe_compute
 
 if __name__ == '__main__':
-    if os.path.exists('./backup.log'):
-        os.remove('./backup.log')
     # google credential setup
     credentials, default_project = google.auth.default()
-    compute = discovery.build('compute', 'v1', credentials=credentials)
+    compute = build_thread_safe_compute(credentials)
 
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -67,6 +64,53 @@ if __name__ == '__main__':
         '--preserve_instance_external_ip',
         default=False,
         help='Preserve the external IP address')
+    parser.add_argument(
+        '--shadow_backends',
+        default=False,
+        help='Replace each managed instance group serving a global backend '
+             'service with a shadow instance group in the target subnet, '
+             'instead of detaching, migrating and reattaching it')
+    parser.add_argument(
+        '--max_parallel_backends',
+        type=int,
+        default=1,
+        help='The maximum number of backends of a backend service which are '
+             'migrated at the same time')
+    parser.add_argument(
+        '--min_healthy_fraction',
+        type=float,
+        default=None,
+        help='The minimum fraction of the instance group backends of a '
+             'global backend service which must stay healthy, such as 0.75. '
+             'A backend is only detached for its migration if the healthy '
+             'backends, not counting it, are still at least this fraction of '
+             'all the backends (counting it). With N backends, it must be at '
+             'most (N-1)/N, otherwise the migration doesn\'t start')
+    parser.add_argument(
+        '--healthy_percent',
+        type=float,
+        default=None,
+        help='The percentage of the instances of a backend of a global '
+             'backend service which must be healthy for the backend to count '
+             'as healthy, such as 50')
+    parser.add_argument(
+        '--healthy_count',
+        type=int,
+        default=None,
+        help='The number of the instances of a backend of a global backend '
+             'service which must be healthy for the backend to count as '
+             'healthy')
+    parser.add_argument(
+        '--health_timeout',
+        type=int,
+        default=300,
+        help='The maximum seconds to wait for a backend of a global backend '
+             'service being healthy')
+    parser.add_argument(
+        '--wait_for_every_backend',
+        default=False,
+        help='Wait for every migrated backend of a global backend service '
+             'being healthy, instead of the first one only')
 
     args = parser.parse_args()
 
@@ -75,6 +119,16 @@ if __name__ == '__main__':
     else:
         args.preserve_instance_external_ip = False
 
+    if args.shadow_backends == 'True':
+        args.shadow_backends = True
+    else:
+        args.shadow_backends = False
+
+    if args.wait_for_every_backend == 'True':
+        args.wait_for_every_backend = True
+    else:
+        args.wait_for_every_backend = False
+
     if args.preserve_instance_external_ip:
 
         warnings.warn(
@@ -94,5 +148,12 @@ if __name__ == '__main__':
                                                         args.network,
                                                         args.subnetwork,
                                                         args.preserve_instance_external_ip,
-                                                        args.region)
+                                                        args.region,
+                                                        args.shadow_backends,
+                                                        args.max_parallel_backends,
+                                                        args.min_healthy_fraction,
+                                                        args.healthy_percent,
+                                                        args.healthy_count,
+                                                        args.health_timeout,
+                                                        args.wait_for_every_backend)
     backend_service_migration.network_migration()
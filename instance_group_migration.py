@@ -31,23 +31,20 @@ Run the script by terminal, for example:
      python3 instance_group_migration.py --project_id=test-project
      --zone=us-central1-a --target_resource_name=test-group
      --network=test-network --subnetwork=test-network
-     --preserve_instance_external_ip=False
+     --preserve_instance_external_ip=False --max_parallel_instances=5
 
 """
 import warnings
 
 import argparse
 import google.auth
-from googleapiclient import discovery
 from vm_network_migration.handlers.instance_group_migration.instance_group_network_migration import InstanceGroupNetworkMigration
-import os
+from vm_network_migration.utils import build_thread_safe_compute
 
 if __name__ == '__main__':
-    if os.path.exists('./backup.log'):
-        os.remove('./backup.log')
     # google credential setup
     credentials, default_project = google.auth.default()
-    compute = discovery.build('compute', 'v1', credentials=credentials)
+    compute = build_thread_safe_compute(credentials)
 
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -70,6 +67,33 @@ if __name__ == '__main__':
         '--preserve_instance_external_ip',
         default=False,
         help='Preserve the external IP address')
+    parser.add_argument(
+        '--max_parallel_instances',
+        type=int,
+        default=1,
+        help='The maximum number of instances of an unmanaged instance group '
+             'which are migrated at the same time')
+    parser.add_argument(
+        '--keep_disks_on_delete',
+        default=False,
+        help='Turn off autoDelete of the disks and delete the instances '
+             'directly, instead of stopping them and detaching the disks')
+    parser.add_argument(
+        '--rolling_update',
+        default=False,
+        help='Replace the instances of a managed instance group with a '
+             'rolling update to the new instance template, instead of '
+             'deleting and recreating the instance group')
+    parser.add_argument(
+        '--max_surge',
+        default=None,
+        help='The maximum number of instances created above the target '
+             'size during a rolling update, such as 3 or 20%%')
+    parser.add_argument(
+        '--max_unavailable',
+        default=None,
+        help='The maximum number of instances which are unavailable during '
+             'a rolling update, such as 0 or 20%%')
 
     args = parser.parse_args()
 
@@ -78,6 +102,16 @@ if __name__ == '__main__':
     else:
         args.preserve_instance_external_ip = False
 
+    if args.keep_disks_on_delete == 'True':
+        args.keep_disks_on_delete = True
+    else:
+        args.keep_disks_on_delete = False
+
+    if args.rolling_update == 'True':
+        args.rolling_update = True
+    else:
+        args.rolling_update = False
+
     if args.preserve_instance_external_ip:
 
         warnings.warn(
@@ -99,5 +133,10 @@ if __name__ == '__main__':
                                                              args.preserve_instance_external_ip,
                                                              args.zone,
                                                              args.region,
-                                                             args.target_resource_name)
+                                                             args.target_resource_name,
+                                                             args.max_parallel_instances,
+                                                             keep_disks_on_delete=args.keep_disks_on_delete,
+                                                             rolling_update=args.rolling_update,
+                                                             max_surge=args.max_surge,
+                                                             max_unavailable=args.max_unavailable)
     instance_group_migration.network_migration()
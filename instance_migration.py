@@ -36,15 +36,12 @@ Run the script by terminal, for example:
 
 """
 import warnings
-import os
 import argparse
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.handlers.instance_migration.instance_network_migration import InstanceNetworkMigration
 
 if __name__ == '__main__':
-    if os.path.exists('./backup.log'):
-        os.remove('./backup.log')
     # google credential setup
     credentials, default_project = google.auth.default()
     compute = discovery.build('compute', 'v1', credentials=credentials)
@@ -67,6 +64,20 @@ if __name__ == '__main__':
         '--preserve_instance_external_ip',
         default=False,
         help='Preserve the external IP address')
+    parser.add_argument(
+        '--keep_disks_on_delete',
+        default=False,
+        help='Turn off autoDelete of the disks and delete the instance '
+             'directly, instead of stopping it and detaching the disks')
+    parser.add_argument(
+        '--blue_green',
+        default=False,
+        help='If the instance only has a boot disk, create a new instance '
+             'from a snapshot of the boot disk, and delete the original one '
+             'after the new one is RUNNING. WARNING: the new instance is '
+             'named <instance_name>-<timestamp>, so anything referring to '
+             'the instance by its name must be updated. An instance in an '
+             'instance group or a target pool is migrated without this mode')
 
     args = parser.parse_args()
 
@@ -75,6 +86,16 @@ if __name__ == '__main__':
     else:
         args.preserve_instance_external_ip = False
 
+    if args.keep_disks_on_delete == 'True':
+        args.keep_disks_on_delete = True
+    else:
+        args.keep_disks_on_delete = False
+
+    if args.blue_green == 'True':
+        args.blue_green = True
+    else:
+        args.blue_green = False
+
     if args.preserve_instance_external_ip:
         warnings.warn(
             'You choose to preserve the external IP. If the original instance '
@@ -91,5 +112,7 @@ if __name__ == '__main__':
                                                   args.target_resource_name,
                                                   args.network,
                                                   args.subnetwork,
-                                                  args.preserve_instance_external_ip)
+                                                  args.preserve_instance_external_ip,
+                                                  args.keep_disks_on_delete,
+                                                  args.blue_green)
     instance_migration.network_migration()
@@ -36,28 +36,99 @@ Run the script by terminal, for example:
      --subnetwork=test-network --preserve_external_ip=False
      --region=us-central1
 
+Migrate many resources at the same time, reading their selfLinks from a file
+(one selfLink per line) or from stdin with '--selfLinks_file=-':
+     python3 migrate_by_selfLink.py
+     --selfLinks_file=selfLinks.txt
+     --network=test-network
+     --subnetwork=test-network --max_workers=8
+     --max_per_zone=2 --max_per_region=4
+
+Scan a project for the resources still attached to a legacy network, and
+migrate all of them:
+     python3 migrate_by_selfLink.py
+     --scan_project=sample-project --legacy_network=legacy-network
+     --network=test-network
+     --subnetwork=test-network [--scan_only=True]
+
+Every state transition is written into a journal file. If the run is
+interrupted, run the same command again with '--resume=True' to skip the
+finished resources and roll back the interrupted ones from the exact step:
+     python3 migrate_by_selfLink.py
+     --selfLinks_file=selfLinks.txt
+     --network=test-network
+     --subnetwork=test-network --resume=True
+
+Plan the migration with the dependency graph of the target resources, so the
+independent backends are migrated at the same time:
+     python3 migrate_by_selfLink.py
+     --selfLink=projects/sample-project/global/forwardingRules/sample-rule
+     --network=test-network
+     --subnetwork=test-network --use_planner=True [--plan_only=True]
+
 """
 import os
+import sys
 import warnings
 
 import argparse
 import google.auth
-from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.bulk_executor import BulkExecutor
+from vm_network_migration.handler_helper.inventory_scanner import InventoryScanner
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
+from vm_network_migration.handler_helper.migration_planner import MigrationPlanner
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.modules.other_modules.backup_store import (
+    DEFAULT_BACKUP_DIRECTORY,
+    DEFAULT_BACKUP_STORE,
+)
+from vm_network_migration.modules.other_modules.migration_journal import (
+    DEFAULT_JOURNAL_FILE,
+    DEFAULT_MIGRATION_JOURNAL,
+)
+from vm_network_migration.utils import (
+    build_thread_safe_compute,
+    generate_timestamp_string,
+)
 
 if __name__ == '__main__':
     # google credential setup
     credentials, default_project = google.auth.default()
-    compute = discovery.build('compute', 'v1', credentials=credentials)
-    if os.path.exists('./backup.log'):
-        os.remove('./backup.log')
+    compute = build_thread_safe_compute(credentials)
 
     parser = argparse.ArgumentParser(
         description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument('--selfLink',
                         help='The selfLink of the target resource.')
+    parser.add_argument(
+        '--selfLinks_file',
+        default=None,
+        help='A file of the selfLinks of the target resources, one per line. '
+             'Use \'-\' to read the selfLinks from stdin.')
+    parser.add_argument(
+        '--scan_project',
+        default=None,
+        help='Scan this project for the resources attached to the legacy '
+             'network, and migrate them')
+    parser.add_argument(
+        '--legacy_network',
+        default=None,
+        help='The name of the legacy network to scan for')
+    parser.add_argument(
+        '--scan_only',
+        default=False,
+        help='Only print the scanned resources without migrating them')
+    parser.add_argument(
+        '--use_planner',
+        default=False,
+        help='Build the dependency graph of the target resources, and '
+             'migrate its independent parts at the same time')
+    parser.add_argument(
+        '--plan_only',
+        default=False,
+        help='Only print the migration plan without migrating anything')
 
     parser.add_argument('--network', help='The name of the target network.')
     parser.add_argument(
@@ -69,6 +140,139 @@ if __name__ == '__main__':
         '--preserve_instance_external_ip',
         default=False,
         help='Preserve the external IP addresses of the instances serving this forwarding rule')
+    parser.add_argument(
+        '--max_parallel_instances',
+        type=int,
+        default=1,
+        help='The maximum number of instances of an unmanaged instance group '
+             'which are migrated at the same time')
+    parser.add_argument(
+        '--keep_disks_on_delete',
+        default=False,
+        help='Turn off autoDelete of the disks and delete the instances '
+             'directly, instead of stopping them and detaching the disks')
+    parser.add_argument(
+        '--blue_green',
+        default=False,
+        help='Replace a VM instance which only has a boot disk with a new '
+             'instance created from a snapshot of the boot disk, and delete '
+             'the original one after the new one is RUNNING. WARNING: the '
+             'new instance is named <instance_name>-<timestamp>, so anything '
+             'referring to the instance by its name must be updated. An '
+             'instance in an instance group or a target pool is migrated '
+             'without this mode')
+    parser.add_argument(
+        '--rolling_update',
+        default=False,
+        help='Replace the instances of a managed instance group with a '
+             'rolling update to the new instance template, instead of '
+             'deleting and recreating the instance group')
+    parser.add_argument(
+        '--max_surge',
+        default=None,
+        help='The maximum number of instances created above the target '
+             'size during a rolling update, such as 3 or 20%%')
+    parser.add_argument(
+        '--max_unavailable',
+        default=None,
+        help='The maximum number of instances which are unavailable during '
+             'a rolling update, such as 0 or 20%%')
+    parser.add_argument(
+        '--shadow_backends',
+        default=False,
+        help='Replace each managed instance group serving a global backend '
+             'service with a shadow instance group in the target subnet, '
+             'instead of detaching, migrating and reattaching it')
+    parser.add_argument(
+        '--max_parallel_backends',
+        type=int,
+        default=1,
+        help='The maximum number of backends of a backend service which are '
+             'migrated at the same time')
+    parser.add_argument(
+        '--min_healthy_fraction',
+        type=float,
+        default=None,
+        help='The minimum fraction of the instance group backends of a '
+             'global backend service which must stay healthy, such as 0.75. '
+             'A backend is only detached for its migration if the healthy '
+             'backends, not counting it, are still at least this fraction of '
+             'all the backends (counting it). With N backends, it must be at '
+             'most (N-1)/N, otherwise the migration doesn\'t start')
+    parser.add_argument(
+        '--healthy_percent',
+        type=float,
+        default=None,
+        help='The percentage of the instances of a backend of a global '
+             'backend service which must be healthy for the backend to count '
+             'as healthy, such as 50')
+    parser.add_argument(
+        '--healthy_count',
+        type=int,
+        default=None,
+        help='The number of the instances of a backend of a global backend '
+             'service which must be healthy for the backend to count as '
+             'healthy')
+    parser.add_argument(
+        '--health_timeout',
+        type=int,
+        default=300,
+        help='The maximum seconds to wait for a backend of a global backend '
+             'service being healthy')
+    parser.add_argument(
+        '--wait_for_every_backend',
+        default=False,
+        help='Wait for every migrated backend of a global backend service '
+             'being healthy, instead of the first one only')
+    parser.add_argument(
+        '--target_pool_batch_size',
+        type=int,
+        default=1,
+        help='The number of single instances of a target pool which are '
+             'detached together, migrated, and then reattached together')
+    parser.add_argument(
+        '--target_pool_healthy_threshold',
+        type=int,
+        default=1,
+        help='The number of instances of the first migrated backend of a '
+             'target pool which must be healthy before migrating its other '
+             'backends')
+    parser.add_argument(
+        '--max_workers',
+        type=int,
+        default=4,
+        help='The maximum number of resources which are migrated at the '
+             'same time in the bulk mode')
+    parser.add_argument(
+        '--max_per_zone',
+        type=int,
+        default=2,
+        help='The maximum number of resources in the same zone which are '
+             'migrated at the same time in the bulk mode')
+    parser.add_argument(
+        '--max_per_region',
+        type=int,
+        default=4,
+        help='The maximum number of resources in the same region which are '
+             'migrated at the same time in the bulk mode')
+    parser.add_argument(
+        '--journal_file',
+        default=DEFAULT_JOURNAL_FILE,
+        help='The file where the progress of the migration is journaled')
+    parser.add_argument(
+        '--backup_directory',
+        default=DEFAULT_BACKUP_DIRECTORY,
+        help='The directory where the original configs of the resources '
+             'are backed up')
+    parser.add_argument(
+        '--resume',
+        default=False,
+        help='Resume the migration journaled in the journal file')
+    parser.add_argument(
+        '--summary_file',
+        default='migration_summary.json',
+        help='The file where the result of each resource is written in the '
+             'bulk mode')
 
     args = parser.parse_args()
 
@@ -77,7 +281,94 @@ if __name__ == '__main__':
     else:
         args.preserve_instance_external_ip = False
 
-    if args.preserve_instance_external_ip:
+    if args.keep_disks_on_delete == 'True':
+        args.keep_disks_on_delete = True
+    else:
+        args.keep_disks_on_delete = False
+
+    if args.blue_green == 'True':
+        args.blue_green = True
+    else:
+        args.blue_green = False
+
+    if args.rolling_update == 'True':
+        args.rolling_update = True
+    else:
+        args.rolling_update = False
+
+    if args.shadow_backends == 'True':
+        args.shadow_backends = True
+    else:
+        args.shadow_backends = False
+
+    if args.wait_for_every_backend == 'True':
+        args.wait_for_every_backend = True
+    else:
+        args.wait_for_every_backend = False
+
+    if args.resume == 'True':
+        args.resume = True
+    else:
+        args.resume = False
+        # A new run starts a new journal, and the previous one is kept
+        if os.path.exists(args.journal_file):
+            os.rename(args.journal_file, '%s.%s' % (
+                args.journal_file, generate_timestamp_string()))
+    DEFAULT_MIGRATION_JOURNAL.open(args.journal_file)
+    DEFAULT_BACKUP_STORE.open(args.backup_directory)
+
+    options = MigrationOptions(
+        max_parallel_instances=args.max_parallel_instances,
+        keep_disks_on_delete=args.keep_disks_on_delete,
+        blue_green=args.blue_green,
+        rolling_update=args.rolling_update,
+        max_surge=args.max_surge,
+        max_unavailable=args.max_unavailable,
+        shadow_backends=args.shadow_backends,
+        max_parallel_backends=args.max_parallel_backends,
+        min_healthy_fraction=args.min_healthy_fraction,
+        target_pool_batch_size=args.target_pool_batch_size,
+        target_pool_healthy_threshold=args.target_pool_healthy_threshold,
+        healthy_percent=args.healthy_percent,
+        healthy_count=args.healthy_count,
+        health_timeout=args.health_timeout,
+        wait_for_every_backend=args.wait_for_every_backend)
+
+    selfLinks = None
+    if args.scan_project != None:
+        scanner = InventoryScanner(compute, args.scan_project,
+                                   args.legacy_network)
+        scanner.scan()
+        scanner.print_inventory()
+        if args.scan_only == 'True':
+            sys.exit(0)
+        selfLinks = scanner.get_root_selfLinks()
+    elif args.selfLinks_file != None:
+        if args.selfLinks_file == '-':
+            lines = sys.stdin.readlines()
+        else:
+            with open(args.selfLinks_file) as selfLinks_file:
+                lines = selfLinks_file.readlines()
+        selfLinks = [line.strip() for line in lines if line.strip() != '']
+
+    # A single resource is resumed in the bulk mode
+    if selfLinks == None and args.resume:
+        selfLinks = [args.selfLink]
+
+    dependencies = None
+    if args.use_planner == 'True' or args.plan_only == 'True':
+        if selfLinks == None:
+            selfLinks = [args.selfLink]
+        planner = MigrationPlanner(compute, selfLinks)
+        selfLinks = planner.plan()
+        dependencies = planner.dependencies
+        planner.print_plan()
+        if args.plan_only == 'True':
+            sys.exit(0)
+
+    # The selfLinks read from stdin have used up the input, so the
+    # confirmation is skipped
+    if args.preserve_instance_external_ip and args.selfLinks_file != '-':
 
         warnings.warn(
             'You choose to preserve the external IP. If the original instance '
@@ -88,10 +379,26 @@ if __name__ == '__main__':
             'Do you still want to preserve the external IP? y/n: ')
         if continue_execution == 'n':
             args.preserve_instance_external_ip = False
+
+    if selfLinks != None:
+        bulk_executor = BulkExecutor(compute, selfLinks, args.network,
+                                     args.subnetwork,
+                                     args.preserve_instance_external_ip,
+                                     max_workers=args.max_workers,
+                                     max_per_zone=args.max_per_zone,
+                                     max_per_region=args.max_per_region,
+                                     dependencies=dependencies,
+                                     resume=args.resume,
+                                     options=options)
+        results = bulk_executor.run()
+        bulk_executor.print_summary()
+        bulk_executor.write_summary(args.summary_file)
+        if any(result['status'] != 'SUCCEEDED' for result in results):
+            sys.exit(1)
+        sys.exit(0)
+
     selfLink_executor = SelfLinkExecutor(compute, args.selfLink, args.network,
                                          args.subnetwork,
-                                         args.preserve_instance_external_ip)
-    migration_handler = selfLink_executor.build_migration_handler()
-    if migration_handler == None:
-        raise InvalidSelfLink('Unable to parse the selfLink.')
-    migration_handler.network_migration()
+                                         args.preserve_instance_external_ip,
+                                         options=options)
+    selfLink_executor.run()
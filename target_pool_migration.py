@@ -35,18 +35,15 @@ Run the script by terminal, for example:
 
 """
 import warnings
-import os
 import google.auth
-from googleapiclient import discovery
 import argparse
 from vm_network_migration.handlers.target_pool_migration.target_pool_migration import TargetPoolMigration
+from vm_network_migration.utils import build_thread_safe_compute
 
 if __name__ == '__main__':
     # google credentrial setup
     credentials, default_project = google.auth.default()
-    compute = discovery.build('compute', 'v1', credentials=credentials)
-    if os.path.exists('./backup.log'):
-        os.remove('./backup.log')
+    compute = build_thread_safe_compute(credentials)
 
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -68,6 +65,18 @@ if __name__ == '__main__':
         '--preserve_instance_external_ip',
         default=False,
         help='Preserve the external IP addresses of the instances serving this target pool')
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=1,
+        help='The number of single instances of the target pool which are '
+             'detached together, migrated, and then reattached together')
+    parser.add_argument(
+        '--healthy_threshold',
+        type=int,
+        default=1,
+        help='The number of instances of the first migrated backend which '
+             'must be healthy before migrating the other backends')
 
     args = parser.parse_args()
 
@@ -95,5 +104,7 @@ if __name__ == '__main__':
                                                 args.network,
                                                 args.subnetwork,
                                                 args.preserve_instance_external_ip,
-                                                args.region)
+                                                args.region,
+                                                args.batch_size,
+                                                args.healthy_threshold)
     target_pool_migration.network_migration()
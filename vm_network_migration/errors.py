@@ -98,4 +98,12 @@ class SubnetworkNotExists(Exception):
 
 class UnableToGenerateNewInstanceTemplate(Exception):
     """Unable to genereate a new instance template"""
-    pass
\ No newline at end of file
+    pass
+
+class OperationTimeoutError(Exception):
+    """The operation is not done before the deadline"""
+    pass
+
+class DiskOperationsError(Exception):
+    """Some of the disks failed to be attached or detached"""
+    pass
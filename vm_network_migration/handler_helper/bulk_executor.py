@@ -0,0 +1,380 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" BulkExecutor class: migrates many resources given by their selfLinks.
+
+All the migration handlers are built up front, and then run concurrently
+under a global worker budget, with a cap on the number of migrations running
+in the same zone and in the same region. A failed migration is rolled back
+by its own handler and doesn't stop the others.
+"""
+import json
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from vm_network_migration.handler_helper.migration_run import migration_run
+from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.modules.other_modules.migration_journal import DEFAULT_MIGRATION_JOURNAL
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    canonical_selfLink,
+)
+from vm_network_migration.utils import initializer
+
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+INVALID = 'INVALID'
+SKIPPED = 'SKIPPED'
+
+
+class BulkExecutor:
+    @initializer
+    def __init__(self, compute, selfLinks, network, subnetwork,
+                 preserve_instance_external_ip=False, max_workers=4,
+                 max_per_zone=2, max_per_region=4, dependencies=None,
+                 resume=False, options=None):
+        """ Initialization
+
+        Args:
+            compute: google compute engine. It should be built with
+            utils.build_thread_safe_compute if max_workers is more than 1.
+            selfLinks: a list of the selfLinks of the resources
+            network: target network
+            subnetwork: target subnet
+            preserve_instance_external_ip: whether to preserve the external ip
+            of the instances in the resources
+            max_workers: maximum number of resources migrated at the same time
+            max_per_zone: maximum number of resources in the same zone
+            migrated at the same time
+            max_per_region: maximum number of resources in the same region
+            (including the zonal resources of the region) migrated at the
+            same time
+            dependencies: a dict which maps a selfLink to a list of the
+            selfLinks which must be migrated successfully before it starts,
+            such as MigrationPlanner.dependencies. A resource is skipped if
+            one of them fails.
+            resume: whether to resume from DEFAULT_MIGRATION_JOURNAL. The
+            resources which succeeded in a previous run are skipped, and the
+            interrupted ones are resumed by their migration handlers.
+            options: a MigrationOptions object which is used to migrate every
+            resource. The default options are used if it is None.
+        """
+        self.max_workers = max(1, self.max_workers)
+        self.max_per_zone = max(1, self.max_per_zone)
+        self.max_per_region = max(1, self.max_per_region)
+        # selfLink -> {'selfLink', 'status', 'error', 'duration'}
+        self.results = {}
+        # a list of (SelfLinkExecutor, migration handler)
+        self.pending_migrations = []
+        self.running_per_zone = {}
+        self.running_per_region = {}
+        if self.dependencies == None:
+            self.dependencies = {}
+        # canonical selfLink -> the entry loaded from the journal
+        self.journal_entries = {}
+
+    def build_migration_handlers(self):
+        """ Build the migration handlers of all the resources. The resources
+        whose handler can't be built are marked as INVALID. When resuming,
+        the resources which succeeded in a previous run are marked as
+        SUCCEEDED without building their handlers.
+
+        """
+        if self.resume:
+            self.journal_entries = DEFAULT_MIGRATION_JOURNAL.load()
+        # Each resource is migrated once, even if it is listed twice
+        for selfLink in dict.fromkeys(self.selfLinks):
+            journal_entry = self.get_journal_entry(selfLink)
+            if journal_entry != None and journal_entry['result'] == SUCCEEDED:
+                self.record_result(selfLink, SUCCEEDED,
+                                   'Migrated in a previous run.')
+                continue
+            try:
+                selfLink_executor, migration_handler = \
+                    self.build_migration_handler(selfLink)
+            except Exception as e:
+                if journal_entry == None or journal_entry['config'] == None:
+                    self.record_result(selfLink, INVALID, e)
+                    continue
+                # The resource may have been deleted by the interrupted
+                # migration, so its handler is built from the journaled
+                # original config
+                DEFAULT_RESOURCE_STORE.put(selfLink, journal_entry['config'])
+                try:
+                    selfLink_executor, migration_handler = \
+                        self.build_migration_handler(selfLink)
+                except Exception as e:
+                    self.record_result(selfLink, INVALID, e)
+                    continue
+            if migration_handler == None:
+                self.record_result(selfLink, INVALID,
+                                   'Unable to parse the selfLink.')
+                continue
+            self.pending_migrations.append(
+                (selfLink_executor, migration_handler))
+
+    def build_migration_handler(self, selfLink) -> tuple:
+        """ Build the migration handler of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+
+        Returns: (SelfLinkExecutor, migration handler)
+
+        """
+        selfLink_executor = SelfLinkExecutor(
+            self.compute, selfLink, self.network, self.subnetwork,
+            self.preserve_instance_external_ip, options=self.options)
+        return selfLink_executor, selfLink_executor.build_migration_handler()
+
+    def get_journal_entry(self, selfLink):
+        """ Get the journal entry of a resource from a previous run
+
+        Args:
+            selfLink: selfLink of the resource
+
+        Returns: the entry, or None if the resource isn't journaled
+
+        """
+        return self.journal_entries.get(canonical_selfLink(selfLink))
+
+    def get_locations(self, selfLink_executor) -> tuple:
+        """ Get the zone and the region which a resource counts against
+
+        Args:
+            selfLink_executor: the SelfLinkExecutor of the resource
+
+        Returns: (zone, region). Each of them can be None.
+
+        """
+        zone = selfLink_executor.zone
+        region = selfLink_executor.region
+        if zone != None and region == None:
+            # A zone name is its region name with a suffix, such as
+            # 'us-central1-a'
+            region = zone.rsplit('-', 1)[0]
+        return zone, region
+
+    def has_capacity(self, selfLink_executor) -> bool:
+        """ Check whether the zone and the region of a resource have
+        capacity for one more running migration
+
+        Args:
+            selfLink_executor: the SelfLinkExecutor of the resource
+
+        Returns: True if the migration can start now
+
+        """
+        zone, region = self.get_locations(selfLink_executor)
+        if zone != None and self.running_per_zone.get(zone,
+                                                      0) >= self.max_per_zone:
+            return False
+        if region != None and self.running_per_region.get(
+                region, 0) >= self.max_per_region:
+            return False
+        return True
+
+    def is_ready(self, selfLink) -> bool:
+        """ Check whether all the dependencies of a resource have been
+        migrated successfully
+
+        Args:
+            selfLink: selfLink of the resource
+
+        Returns: True if the migration can start now
+
+        """
+        return all(
+            self.results.get(dependency, {}).get('status') == SUCCEEDED for
+            dependency in self.dependencies.get(selfLink, []) if
+            dependency in self.selfLinks)
+
+    def find_failed_dependency(self, selfLink):
+        """ Find a dependency of a resource which hasn't been migrated and
+        won't be
+
+        Args:
+            selfLink: selfLink of the resource
+
+        Returns: the selfLink of the dependency, or None
+
+        """
+        for dependency in self.dependencies.get(selfLink, []):
+            if dependency in self.results and self.results[dependency][
+                'status'] != SUCCEEDED:
+                return dependency
+        return None
+
+    def update_running_count(self, selfLink_executor, change):
+        """ Update the number of running migrations in the zone and the
+        region of a resource
+
+        Args:
+            selfLink_executor: the SelfLinkExecutor of the resource
+            change: 1 when the migration starts, -1 when it finishes
+
+        """
+        zone, region = self.get_locations(selfLink_executor)
+        if zone != None:
+            self.running_per_zone[zone] = self.running_per_zone.get(zone,
+                                                                    0) + change
+        if region != None:
+            self.running_per_region[region] = self.running_per_region.get(
+                region, 0) + change
+
+    def migrate_a_resource(self, selfLink, migration_handler) -> tuple:
+        """ Run the migration of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+            migration_handler: its migration handler
+
+        Returns: (status, error, duration in seconds)
+
+        """
+        start = time.monotonic()
+        journal_entry = self.get_journal_entry(selfLink)
+        try:
+            if journal_entry != None and journal_entry['status'] != 0:
+                print('Resuming: %s' % (selfLink))
+                migration_handler.resume(journal_entry)
+            else:
+                print('Migrating: %s' % (selfLink))
+                migration_handler.network_migration()
+        except Exception as e:
+            warnings.warn('Failed to migrate %s: %s' % (selfLink, e),
+                          Warning)
+            return FAILED, e, time.monotonic() - start
+        return SUCCEEDED, None, time.monotonic() - start
+
+    def record_result(self, selfLink, status, error=None, duration=None):
+        """ Record the result of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+            status: SUCCEEDED, FAILED, INVALID or SKIPPED
+            error: the exception or the error message
+            duration: seconds spent on the migration
+
+        """
+        self.results[selfLink] = {
+            'selfLink': selfLink,
+            'status': status,
+            'error': None if error == None else str(error),
+            'duration': None if duration == None else round(duration, 1)
+        }
+        if status == SUCCEEDED or status == FAILED:
+            DEFAULT_MIGRATION_JOURNAL.record_result(
+                selfLink, status, self.results[selfLink]['error'])
+
+    def run(self) -> list:
+        """ Build the migration handlers, then run all the migrations under
+        the worker budget and the per-zone and per-region caps.
+
+        Returns: a list of the results, in the order of the selfLinks
+
+        """
+        with migration_run(self.compute):
+            return self.run_migrations()
+
+    def run_migrations(self) -> list:
+        """ Build the migration handlers and run the migrations
+
+        Returns: a list of the results, in the order of the selfLinks
+
+        """
+        self.build_migration_handlers()
+        pending = list(self.pending_migrations)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                # Start the pending migrations which fit in the budget
+                for selfLink_executor, migration_handler in list(pending):
+                    selfLink = selfLink_executor.selfLink
+                    failed_dependency = self.find_failed_dependency(selfLink)
+                    if failed_dependency != None:
+                        pending.remove((selfLink_executor, migration_handler))
+                        self.record_result(
+                            selfLink, SKIPPED,
+                            'Depends on %s, which is not migrated.' % (
+                                failed_dependency))
+                        continue
+                    if len(running) >= self.max_workers:
+                        break
+                    if not self.is_ready(selfLink) or not self.has_capacity(
+                            selfLink_executor):
+                        continue
+                    pending.remove((selfLink_executor, migration_handler))
+                    self.update_running_count(selfLink_executor, 1)
+                    future = executor.submit(self.migrate_a_resource,
+                                             selfLink_executor.selfLink,
+                                             migration_handler)
+                    running[future] = selfLink_executor
+                if len(running) == 0:
+                    # The remaining dependencies can never be met, such as
+                    # in a dependency cycle
+                    for selfLink_executor, _ in pending:
+                        self.record_result(selfLink_executor.selfLink,
+                                           SKIPPED,
+                                           'Its dependencies can not be met.')
+                    break
+                done, _ = wait(list(running.keys()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    selfLink_executor = running.pop(future)
+                    self.update_running_count(selfLink_executor, -1)
+                    status, error, duration = future.result()
+                    self.record_result(selfLink_executor.selfLink, status,
+                                       error, duration)
+        return self.get_results()
+
+    def get_results(self) -> list:
+        """ Get the results of the resources
+
+        Returns: a list of the results, in the order of the selfLinks
+
+        """
+        results = []
+        for selfLink in self.selfLinks:
+            if selfLink not in self.results:
+                self.record_result(selfLink, SKIPPED)
+            if self.results[selfLink] not in results:
+                results.append(self.results[selfLink])
+        return results
+
+    def print_summary(self):
+        """ Print the result of each resource and the counts of each status
+
+        """
+        results = self.get_results()
+        print('Migration summary:')
+        for result in results:
+            print('%s: %s' % (result['status'], result['selfLink']))
+            if result['error'] != None:
+                print('    %s' % (result['error']))
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        print(', '.join(
+            '%s: %d' % (status, count) for status, count in counts.items()))
+
+    def write_summary(self, file_path):
+        """ Write the results into a JSON file
+
+        Args:
+            file_path: path of the summary file
+
+        """
+        with open(file_path, 'w') as summary_file:
+            json.dump(self.get_results(), summary_file, indent=2)
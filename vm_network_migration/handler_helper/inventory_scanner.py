@@ -0,0 +1,269 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" InventoryScanner class: finds all the resources of a project which are
+still attached to a legacy network.
+
+Each resource type is listed with a single aggregatedList call (plus its
+pages), instead of a GET request per resource. The result is an in-memory
+index, and its root resources can be migrated with SelfLinkExecutor (or
+BulkExecutor) directly.
+"""
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    canonical_selfLink,
+)
+from vm_network_migration.utils import initializer
+
+# The resource types which are scanned, in the order of the index
+RESOURCE_TYPES = ['instances', 'instanceGroups', 'instanceGroupManagers',
+                  'targetPools', 'forwardingRules', 'backendServices']
+
+
+class InventoryScanner:
+    @initializer
+    def __init__(self, compute, project, legacy_network):
+        """ Initialization
+
+        Args:
+            compute: google compute engine
+            project: project ID
+            legacy_network: name of the legacy network
+        """
+        # resource type -> {canonical selfLink: config}, including all the
+        # scanned resources
+        self.resources = {resource_type: {} for resource_type in
+                          RESOURCE_TYPES}
+        # resource type -> a list of canonical selfLinks of the resources
+        # which are attached to the legacy network
+        self.index = {resource_type: [] for resource_type in RESOURCE_TYPES}
+        # canonical selfLink of an instance -> its instance groups
+        self.instance_memberships = {}
+
+    def aggregated_list(self, resource_type) -> dict:
+        """ List all the resources of a type in all the scopes of the project
+
+        Args:
+            resource_type: such as 'instances'
+
+        Returns: a dict which maps the canonical selfLink of each resource
+        to its config
+
+        """
+        resources = {}
+        api = getattr(self.compute, resource_type)()
+        request = api.aggregatedList(project=self.project)
+        while request is not None:
+            response = request.execute()
+            for scoped_list in response.get('items', {}).values():
+                for resource in scoped_list.get(resource_type, []):
+                    resources[canonical_selfLink(resource['selfLink'])] = \
+                        resource
+            request = api.aggregatedList_next(previous_request=request,
+                                              previous_response=response)
+        return resources
+
+    def list_global_forwarding_rules(self) -> dict:
+        """ List the global forwarding rules, which are not returned by
+        the aggregatedList of the forwarding rules
+
+        Returns: a dict which maps the canonical selfLink of each forwarding
+        rule to its config
+
+        """
+        forwarding_rules = {}
+        request = self.compute.globalForwardingRules().list(
+            project=self.project)
+        while request is not None:
+            response = request.execute()
+            for forwarding_rule in response.get('items', []):
+                forwarding_rules[
+                    canonical_selfLink(forwarding_rule['selfLink'])] = \
+                    forwarding_rule
+            request = self.compute.globalForwardingRules().list_next(
+                previous_request=request, previous_response=response)
+        return forwarding_rules
+
+    def is_legacy_network(self, network_selfLink) -> bool:
+        """ Check whether a network URL is the legacy network
+
+        Args:
+            network_selfLink: URL of a network
+
+        Returns: True if it is the legacy network
+
+        """
+        return network_selfLink != None and canonical_selfLink(
+            network_selfLink).endswith('/networks/' + self.legacy_network)
+
+    def scan(self) -> dict:
+        """ Scan the project and build the index
+
+        Returns: the index, which maps each resource type to the selfLinks
+        of its resources attached to the legacy network
+
+        """
+        for resource_type in RESOURCE_TYPES:
+            print('Scanning the %s of %s.' % (resource_type, self.project))
+            self.resources[resource_type] = self.aggregated_list(
+                resource_type)
+        for selfLink, forwarding_rule in \
+                self.list_global_forwarding_rules().items():
+            self.resources['forwardingRules'][selfLink] = forwarding_rule
+        # The scanned configs are also used by the migration handlers
+        for resources in self.resources.values():
+            for selfLink, config in resources.items():
+                DEFAULT_RESOURCE_STORE.put(selfLink, config)
+        self.build_index()
+        return self.index
+
+    def build_index(self):
+        """ Find the scanned resources which are attached to the legacy
+        network. A resource without a network field is attached if one of
+        its backends is attached.
+
+        """
+        index = {resource_type: set() for resource_type in RESOURCE_TYPES}
+        for selfLink, instance in self.resources['instances'].items():
+            if any(self.is_legacy_network(network_interface.get('network'))
+                   for network_interface in
+                   instance.get('networkInterfaces', [])):
+                index['instances'].add(selfLink)
+        for selfLink, instance_group in \
+                self.resources['instanceGroups'].items():
+            if self.is_legacy_network(instance_group.get('network')):
+                index['instanceGroups'].add(selfLink)
+        for selfLink, instance_group_manager in \
+                self.resources['instanceGroupManagers'].items():
+            if canonical_selfLink(instance_group_manager['instanceGroup']) in \
+                    index['instanceGroups']:
+                index['instanceGroupManagers'].add(selfLink)
+        for selfLink, target_pool in self.resources['targetPools'].items():
+            if any(canonical_selfLink(instance) in index['instances'] for
+                   instance in target_pool.get('instances', [])):
+                index['targetPools'].add(selfLink)
+        for selfLink, backend_service in \
+                self.resources['backendServices'].items():
+            if self.is_legacy_network(backend_service.get('network')) or any(
+                    canonical_selfLink(backend['group']) in index[
+                        'instanceGroups'] for backend in
+                    backend_service.get('backends', [])):
+                index['backendServices'].add(selfLink)
+        for selfLink, forwarding_rule in \
+                self.resources['forwardingRules'].items():
+            if self.is_legacy_network(forwarding_rule.get('network')) or \
+                    canonical_selfLink(forwarding_rule.get('target', '')) in \
+                    index['targetPools'] or \
+                    canonical_selfLink(
+                        forwarding_rule.get('backendService', '')) in \
+                    index['backendServices']:
+                index['forwardingRules'].add(selfLink)
+        self.index = {resource_type: sorted(selfLinks) for
+                      resource_type, selfLinks in index.items()}
+        self.find_instance_memberships()
+
+    def find_instance_memberships(self):
+        """ Find the instance groups which the indexed instances are members
+        of. The members of a managed instance group are found from the
+        'created-by' metadata. The members of an unmanaged instance group are
+        listed with one request per indexed unmanaged instance group.
+
+        """
+        self.instance_memberships = {selfLink: [] for selfLink in
+                                     self.index['instances']}
+        managed_instance_groups = set()
+        for selfLink in self.index['instanceGroupManagers']:
+            instance_group_manager = self.resources['instanceGroupManagers'][
+                selfLink]
+            managed_instance_groups.add(
+                canonical_selfLink(instance_group_manager['instanceGroup']))
+        for selfLink in self.index['instances']:
+            instance = self.resources['instances'][selfLink]
+            for item in instance.get('metadata', {}).get('items', []):
+                if item['key'] == 'created-by':
+                    self.instance_memberships[selfLink].append(
+                        canonical_selfLink(item['value']).replace(
+                            '/instanceGroupManagers/', '/instanceGroups/'))
+
+        for selfLink in self.index['instanceGroups']:
+            fields = selfLink.split('/')
+            if selfLink in managed_instance_groups or fields[2] != 'zones':
+                continue
+            request = self.compute.instanceGroups().listInstances(
+                project=fields[1], zone=fields[3], instanceGroup=fields[5])
+            while request is not None:
+                response = request.execute()
+                for item in response.get('items', []):
+                    instance_selfLink = canonical_selfLink(item['instance'])
+                    if instance_selfLink in self.instance_memberships:
+                        self.instance_memberships[instance_selfLink].append(
+                            selfLink)
+                request = self.compute.instanceGroups().listInstances_next(
+                    previous_request=request, previous_response=response)
+
+    def get_root_selfLinks(self) -> list:
+        """ Get the selfLinks of the indexed resources which are not directly
+        served by another indexed resource. Migrating these roots with
+        SelfLinkExecutor migrates all the indexed resources, and none of
+        them is migrated twice through a direct reference.
+
+        Returns: a list of canonical selfLinks
+
+        """
+        served = set()
+        for selfLink in self.index['forwardingRules']:
+            forwarding_rule = self.resources['forwardingRules'][selfLink]
+            for field in ['target', 'backendService']:
+                if field in forwarding_rule:
+                    served.add(canonical_selfLink(forwarding_rule[field]))
+        for selfLink in self.index['backendServices']:
+            for backend in self.resources['backendServices'][selfLink].get(
+                    'backends', []):
+                served.add(canonical_selfLink(backend['group']))
+        for selfLink in self.index['targetPools']:
+            for instance in self.resources['targetPools'][selfLink].get(
+                    'instances', []):
+                served.add(canonical_selfLink(instance))
+        # A managed instance group is migrated with the target pools it serves
+        for selfLink in self.index['instanceGroupManagers']:
+            instance_group_manager = self.resources['instanceGroupManagers'][
+                selfLink]
+            if any(canonical_selfLink(target_pool) in self.index[
+                'targetPools'] for target_pool in
+                   instance_group_manager.get('targetPools', [])):
+                served.add(
+                    canonical_selfLink(instance_group_manager['instanceGroup']))
+        for selfLink, memberships in self.instance_memberships.items():
+            if len(memberships) > 0:
+                served.add(selfLink)
+
+        root_selfLinks = []
+        # The instance group managers are migrated through their instance
+        # groups
+        for resource_type in ['forwardingRules', 'backendServices',
+                              'targetPools', 'instanceGroups', 'instances']:
+            for selfLink in self.index[resource_type]:
+                if selfLink not in served:
+                    root_selfLinks.append(selfLink)
+        return root_selfLinks
+
+    def print_inventory(self):
+        """ Print the indexed resources
+
+        """
+        print('Resources attached to the legacy network %s:' % (
+            self.legacy_network))
+        for resource_type in RESOURCE_TYPES:
+            print('%s: %d' % (resource_type, len(self.index[resource_type])))
+            for selfLink in self.index[resource_type]:
+                print('    %s' % (selfLink))
@@ -0,0 +1,79 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" MigrationOptions class: the options of a migration which are passed from
+the executors down to the migration handlers.
+
+Each option only applies to the resources of its own type. The options of
+the other types are ignored.
+"""
+from vm_network_migration.utils import initializer
+
+
+class MigrationOptions:
+    @initializer
+    def __init__(self, max_parallel_instances=1, keep_disks_on_delete=False,
+                 blue_green=False, rolling_update=False, max_surge=None,
+                 max_unavailable=None, shadow_backends=False,
+                 max_parallel_backends=1, min_healthy_fraction=None,
+                 target_pool_batch_size=1, target_pool_healthy_threshold=1,
+                 healthy_percent=None,
+                 healthy_count=None, health_timeout=300,
+                 wait_for_every_backend=False):
+        """ Initialization
+
+        Args:
+            max_parallel_instances: maximum number of instances of an
+            unmanaged instance group which are migrated at the same time
+            keep_disks_on_delete: whether to delete the instances with their
+            disks kept, instead of stopping them and detaching the disks
+            blue_green: whether to replace a VM instance with a new one
+            created from a snapshot of its boot disk, when it is possible.
+            It only applies to a VM instance which is migrated directly.
+            rolling_update: whether to replace the instances of a managed
+            instance group with a rolling update, instead of deleting and
+            recreating the instance group. It only applies to a managed
+            instance group which is migrated directly.
+            max_surge: the maxSurge of the rolling update, such as 3 or '20%'
+            max_unavailable: the maxUnavailable of the rolling update,
+            such as 0 or '20%'
+            shadow_backends: whether to replace each managed instance group
+            serving a global backend service with a shadow instance group.
+            It only applies to a backend service which is migrated directly.
+            max_parallel_backends: maximum number of backends of a global
+            backend service which are migrated at the same time. It only
+            applies to a backend service which is migrated directly.
+            min_healthy_fraction: the minimum fraction of the backends of a
+            global backend service which must stay healthy. It only applies
+            to a backend service which is migrated directly.
+            target_pool_batch_size: the number of single instances of a
+            target pool which are detached and reattached together. It only
+            applies to a target pool which is migrated directly.
+            target_pool_healthy_threshold: the number of healthy instances of
+            the first migrated backend of a target pool to wait for, before
+            migrating its other backends. It only applies to a target pool
+            which is migrated directly.
+            healthy_percent: the percentage of the instances of a backend of
+            a global backend service which must be healthy. It only applies
+            to a backend service which is migrated directly.
+            healthy_count: the number of the instances of a backend of a
+            global backend service which must be healthy. It only applies to
+            a backend service which is migrated directly.
+            health_timeout: maximum seconds to wait for a backend of a global
+            backend service being healthy. It only applies to a backend
+            service which is migrated directly.
+            wait_for_every_backend: whether to wait for every migrated backend
+            of a global backend service being healthy. It only applies to a
+            backend service which is migrated directly.
+        """
+        pass
@@ -0,0 +1,320 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" MigrationPlanner class: builds the dependency graph of the resources
+to migrate, and plans which of them can be migrated at the same time.
+
+The graph has the forwarding rules, target proxies, URL maps, backend
+services, target pools, target instances, instance groups and instances
+reachable from the given selfLinks. Each level of the graph is fetched with
+one batch request. The resources which have a migration handler become
+migration units, unless they are migrated as a part of another unit. Two
+units which share a resource are ordered, and the other units are
+independent, so BulkExecutor can run them concurrently.
+"""
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
+from vm_network_migration.modules.other_modules.resource_store import canonical_selfLink
+from vm_network_migration.utils import (
+    find_all_matching_strings_from_a_dict,
+    initializer,
+)
+
+# The resource types which have a migration handler
+UNIT_TYPES = ['forwardingRules', 'backendServices', 'targetPools',
+              'targetInstances', 'instanceGroups', 'instances']
+
+# An internal forwarding rule is deleted and recreated around the migration
+# of its backends, so it is migrated as one unit. The other forwarding rules
+# don't change, and their backends are migrated as separate units.
+INTERNAL_LOAD_BALANCING_SCHEMES = ['INTERNAL', 'INTERNAL_SELF_MANAGED']
+
+
+def normalize_selfLink(selfLink) -> str:
+    """ Get the key of a resource in the graph. A managed instance group is
+    represented by its instance group.
+
+    Args:
+        selfLink: a full or partial URL of a resource
+
+    Returns: the canonical selfLink
+
+    """
+    return canonical_selfLink(selfLink).replace('/instanceGroupManagers/',
+                                                '/instanceGroups/')
+
+
+def get_resource_type(selfLink) -> str:
+    """ Get the resource type of a canonical selfLink
+
+    Args:
+        selfLink: canonical selfLink
+
+    Returns: the collection name, such as 'instances'
+
+    """
+    return selfLink.split('/')[-2]
+
+
+class MigrationPlanner:
+    @initializer
+    def __init__(self, compute, selfLinks):
+        """ Initialization
+
+        Args:
+            compute: google compute engine
+            selfLinks: a list of the selfLinks of the target resources
+        """
+        self.batch_discovery = BatchDiscovery(self.compute)
+        self.root_selfLinks = list(dict.fromkeys(
+            normalize_selfLink(selfLink) for selfLink in selfLinks))
+        # selfLink -> config, or None if it can't be fetched
+        self.configs = {}
+        # selfLink -> the exception raised when fetching the config
+        self.errors = {}
+        # selfLink -> a list of the selfLinks it sends traffic to
+        self.children = {}
+        # a list of the migration units, in the order of the plan
+        self.units = []
+        # unit selfLink -> a list of the units which must be migrated first
+        self.dependencies = {}
+
+    def find_children(self, selfLink) -> list:
+        """ Find the resources which a resource sends traffic to
+
+        Args:
+            selfLink: canonical selfLink of the resource
+
+        Returns: a list of canonical selfLinks
+
+        """
+        config = self.configs.get(selfLink)
+        if config == None:
+            return []
+        resource_type = get_resource_type(selfLink)
+        children = []
+        if resource_type == 'forwardingRules':
+            for field in ['target', 'backendService']:
+                if field in config:
+                    children.append(config[field])
+        elif resource_type.startswith('target') and resource_type.endswith(
+                'Proxies'):
+            for field in ['urlMap', 'service']:
+                if field in config:
+                    children.append(config[field])
+        elif resource_type == 'urlMaps':
+            links = set()
+            find_all_matching_strings_from_a_dict(config,
+                                                  'compute/v1/projects/',
+                                                  links)
+            children.extend(sorted(
+                link for link in links if '/backendServices/' in link))
+        elif resource_type == 'backendServices':
+            for backend in config.get('backends', []):
+                children.append(backend['group'])
+        elif resource_type == 'targetPools':
+            children.extend(config.get('instances', []))
+        elif resource_type == 'targetInstances':
+            children.append(config['instance'])
+        return [normalize_selfLink(child) for child in children]
+
+    def add_edge(self, parent, child):
+        """ Add an edge to the graph
+
+        Args:
+            parent: canonical selfLink of the parent
+            child: canonical selfLink of the child
+
+        """
+        if child != parent and child not in self.children[parent]:
+            self.children[parent].append(child)
+
+    def build_graph(self):
+        """ Fetch the resources level by level, starting from the target
+        resources, with one batch request per level
+
+        """
+        frontier = list(self.root_selfLinks)
+        # instance selfLink -> the target pools which serve it
+        target_pools = {}
+        while len(frontier) > 0:
+            configs, errors = self.batch_discovery.get_resources(frontier)
+            for selfLink in frontier:
+                self.configs[selfLink] = configs.get(selfLink)
+                if selfLink in errors:
+                    self.errors[selfLink] = errors[selfLink]
+                self.children.setdefault(selfLink, [])
+            next_frontier = []
+            for selfLink in frontier:
+                for child in self.find_children(selfLink):
+                    self.add_edge(selfLink, child)
+                    if child not in self.configs and \
+                            child not in next_frontier:
+                        next_frontier.append(child)
+                    if get_resource_type(selfLink) == 'targetPools':
+                        target_pools.setdefault(child, []).append(selfLink)
+            # The instance groups of a target pool's instances are migrated
+            # with the target pool
+            instance_selfLinks = [selfLink for selfLink in next_frontier if
+                                  selfLink in target_pools]
+            if len(instance_selfLinks) > 0:
+                referrers, _ = self.batch_discovery.list_referrers(
+                    instance_selfLinks)
+                for instance_selfLink, instance_groups in referrers.items():
+                    for instance_group in instance_groups:
+                        instance_group = normalize_selfLink(instance_group)
+                        for target_pool in target_pools[instance_selfLink]:
+                            self.add_edge(target_pool, instance_group)
+                        self.children.setdefault(instance_group, [])
+                        self.add_edge(instance_group, instance_selfLink)
+                        if instance_group not in self.configs and \
+                                instance_group not in next_frontier:
+                            next_frontier.append(instance_group)
+            frontier = next_frontier
+
+    def is_unit(self, selfLink) -> bool:
+        """ Check whether a resource is migrated by its own migration handler
+
+        Args:
+            selfLink: canonical selfLink of the resource
+
+        Returns: True/False
+
+        """
+        resource_type = get_resource_type(selfLink)
+        if resource_type not in UNIT_TYPES:
+            return False
+        if resource_type == 'forwardingRules':
+            config = self.configs.get(selfLink)
+            # A missing forwarding rule is left to its migration handler,
+            # which reports the error
+            return config == None or config.get(
+                'loadBalancingScheme') in INTERNAL_LOAD_BALANCING_SCHEMES
+        return True
+
+    def get_descendants(self, selfLink) -> set:
+        """ Get all the resources reachable from a resource
+
+        Args:
+            selfLink: canonical selfLink of the resource
+
+        Returns: a set of canonical selfLinks, excluding the resource itself
+
+        """
+        descendants = set()
+        stack = list(self.children.get(selfLink, []))
+        while len(stack) > 0:
+            current = stack.pop()
+            if current in descendants or current == selfLink:
+                continue
+            descendants.add(current)
+            stack.extend(self.children.get(current, []))
+        return descendants
+
+    def find_units(self, selfLink, units):
+        """ Find the nearest migration units of a resource, in depth-first
+        order. A resource which isn't a unit is passed through.
+
+        Args:
+            selfLink: canonical selfLink of the resource
+            units: the list where the units are appended
+
+        """
+        if self.is_unit(selfLink):
+            if selfLink not in units:
+                units.append(selfLink)
+            return
+        for child in self.children.get(selfLink, []):
+            self.find_units(child, units)
+
+    def plan(self) -> list:
+        """ Build the graph, the migration units and their dependencies
+
+        Returns: a list of the unit selfLinks, in the order of the plan
+
+        """
+        self.build_graph()
+        candidates = []
+        for selfLink in self.root_selfLinks:
+            self.find_units(selfLink, candidates)
+        descendants = {selfLink: self.get_descendants(selfLink) for selfLink
+                       in candidates}
+        # A unit reachable from another unit is migrated by that unit
+        self.units = [selfLink for selfLink in candidates if not any(
+            selfLink in descendants[other] for other in candidates if
+            other != selfLink)]
+        resources = {selfLink: descendants[selfLink] | {selfLink} for
+                     selfLink in self.units}
+        self.dependencies = {}
+        for i, selfLink in enumerate(self.units):
+            self.dependencies[selfLink] = [
+                other for other in self.units[:i] if
+                len(resources[selfLink] & resources[other]) > 0]
+        return self.units
+
+    def get_waves(self) -> list:
+        """ Group the units by the earliest time they can start, assuming
+        that every migration takes the same time
+
+        Returns: a list of waves, each of which is a list of unit selfLinks
+
+        """
+        wave_numbers = {}
+        for selfLink in self.units:
+            wave_numbers[selfLink] = 1 + max(
+                [wave_numbers[other] for other in
+                 self.dependencies[selfLink]], default=-1)
+        waves = [[] for _ in range(max(wave_numbers.values(), default=-1) + 1)]
+        for selfLink in self.units:
+            waves[wave_numbers[selfLink]].append(selfLink)
+        return waves
+
+    def print_tree(self, selfLink, depth, printed):
+        """ Print a resource and its children
+
+        Args:
+            selfLink: canonical selfLink of the resource
+            depth: indentation level
+            printed: the selfLinks which have been printed with children
+
+        """
+        marks = []
+        if selfLink in self.units:
+            marks.append('unit %d' % (self.units.index(selfLink) + 1))
+        if selfLink in self.errors:
+            marks.append('error: %s' % (self.errors[selfLink]))
+        print('%s%s%s' % ('    ' * depth, selfLink,
+                          ' [%s]' % (', '.join(marks)) if marks else ''))
+        if selfLink in printed:
+            return
+        printed.add(selfLink)
+        for child in self.children.get(selfLink, []):
+            self.print_tree(child, depth + 1, printed)
+
+    def print_plan(self):
+        """ Print the graph and the order of the migration units
+
+        """
+        print('Resources:')
+        printed = set()
+        for selfLink in self.root_selfLinks:
+            self.print_tree(selfLink, 1, printed)
+        print('Migration plan:')
+        for i, wave in enumerate(self.get_waves()):
+            print('Wave %d:' % (i + 1))
+            for selfLink in wave:
+                print('    unit %d: %s' % (self.units.index(selfLink) + 1,
+                                           selfLink))
+                if len(self.dependencies[selfLink]) > 0:
+                    print('        waits for: %s' % (', '.join(
+                        'unit %d' % (self.units.index(other) + 1) for other in
+                        self.dependencies[selfLink])))
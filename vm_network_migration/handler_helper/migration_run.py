@@ -0,0 +1,76 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" migration_run context manager: the scope of a migration run.
+
+Some modules share state through module-level singletons, such as
+DEFAULT_OPERATION_TRACKER, DEFAULT_RESOURCE_STORE, DEFAULT_METADATA_CACHE
+and DEFAULT_FORWARDING_RULE_INDEX. SelfLinkExecutor.run and BulkExecutor.run open a
+migration run around all their work, so that this state is set up at the
+start of the run and torn down at its end, and doesn't leak into the next
+run of the same process. Only the outermost run of nested runs does it.
+"""
+import threading
+from contextlib import contextmanager
+
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import DEFAULT_FORWARDING_RULE_INDEX
+from vm_network_migration.modules.other_modules.metadata_cache import DEFAULT_METADATA_CACHE
+from vm_network_migration.modules.other_modules.operation_tracker import DEFAULT_OPERATION_TRACKER
+from vm_network_migration.modules.other_modules.resource_store import DEFAULT_RESOURCE_STORE
+
+_lock = threading.Lock()
+_depth = 0
+
+
+def get_credentials(compute):
+    """ Get the credentials of a compute engine API client
+
+    Args:
+        compute: google compute engine built with discovery.build or
+        utils.build_thread_safe_compute
+
+    Returns: google auth credentials, or None if they can't be found
+
+    """
+    return getattr(getattr(compute, '_http', None), 'credentials', None)
+
+
+@contextmanager
+def migration_run(compute):
+    """ Open a migration run
+
+    Args:
+        compute: google compute engine. The operation tracker gets a
+        thread-safe client with the same credentials.
+
+    """
+    global _depth
+    with _lock:
+        _depth += 1
+        outermost = _depth == 1
+    try:
+        if outermost:
+            # The stored configs, the cached metadata and the forwarding
+            # rules may be stale after the previous run
+            DEFAULT_RESOURCE_STORE.invalidate()
+            DEFAULT_METADATA_CACHE.invalidate()
+            DEFAULT_FORWARDING_RULE_INDEX.invalidate()
+            credentials = get_credentials(compute)
+            if credentials != None:
+                DEFAULT_OPERATION_TRACKER.open(credentials)
+        yield
+    finally:
+        if outermost:
+            DEFAULT_OPERATION_TRACKER.close()
+        with _lock:
+            _depth -= 1
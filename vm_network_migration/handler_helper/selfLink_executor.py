@@ -18,13 +18,16 @@ according to the given resource's selfLink.
 """
 import re
 
+from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
+from vm_network_migration.handler_helper.migration_run import migration_run
 from vm_network_migration.utils import initializer
 
 
 class SelfLinkExecutor:
     @initializer
     def __init__(self, compute, selfLink, network, subnetwork,
-                 preserve_instance_external_ip=False):
+                 preserve_instance_external_ip=False, options=None):
         """ Initialization
 
         Args:
@@ -33,7 +36,11 @@ class SelfLinkExecutor:
             subnetwork: target subnet
             preserve_instance_external_ip: whether to preserve the external ip
             of the instances in this resource
+            options: a MigrationOptions object. The default options are used
+            if it is None.
         """
+        if self.options == None:
+            self.options = MigrationOptions()
         self.project = self.extract_project()
         self.zone = self.extract_zone()
         self.region = self.extract_region()
@@ -185,6 +192,22 @@ class SelfLinkExecutor:
         else:
             return None
 
+    def run(self):
+        """ Build the migration handler and migrate the resource in a
+        migration run
+
+        Returns: the migration handler
+
+        Raises:
+            InvalidSelfLink: the selfLink is not a supported resource
+        """
+        with migration_run(self.compute):
+            migration_handler = self.build_migration_handler()
+            if migration_handler == None:
+                raise InvalidSelfLink('Unable to parse the selfLink.')
+            migration_handler.network_migration()
+        return migration_handler
+
     def build_instance_group_migration_handler(self):
         """ Build an instance group migration handler
 
@@ -201,7 +224,12 @@ class SelfLinkExecutor:
                 self.preserve_instance_external_ip,
                 self.zone,
                 self.region,
-                self.instance_group)
+                self.instance_group,
+                self.options.max_parallel_instances,
+                self.options.keep_disks_on_delete,
+                self.options.rolling_update,
+                self.options.max_surge,
+                self.options.max_unavailable)
             return instance_group_migration_handler
 
     def build_instance_migration_handler(self):
@@ -219,8 +247,9 @@ class SelfLinkExecutor:
                                                                   self.instance,
                                                                   self.network,
                                                                   self.subnetwork,
-                                                                  self.preserve_instance_external_ip
-                                                                  )
+                                                                  self.preserve_instance_external_ip,
+                                                                  self.options.keep_disks_on_delete,
+                                                                  self.options.blue_green)
             return instance_migration_handler
 
     def build_backend_service_migration_handler(self):
@@ -238,7 +267,14 @@ class SelfLinkExecutor:
                 self.network,
                 self.subnetwork,
                 self.preserve_instance_external_ip,
-                self.region
+                self.region,
+                self.options.shadow_backends,
+                self.options.max_parallel_backends,
+                self.options.min_healthy_fraction,
+                self.options.healthy_percent,
+                self.options.healthy_count,
+                self.options.health_timeout,
+                self.options.wait_for_every_backend
             )
             return backend_service_migration_handler
 
@@ -321,6 +357,8 @@ class SelfLinkExecutor:
                                                                 self.network,
                                                                 self.subnetwork,
                                                                 self.preserve_instance_external_ip,
-                                                                self.region
+                                                                self.region,
+                                                                self.options.target_pool_batch_size,
+                                                                self.options.target_pool_healthy_threshold
                                                                 )
             return target_pool_migration_handler
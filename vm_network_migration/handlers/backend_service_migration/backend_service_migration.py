@@ -32,7 +32,11 @@ class BackendServiceMigration(ComputeEngineResourceMigration):
     @initializer
     def __init__(self, compute, project, backend_service_name, network,
                  subnetwork,
-                 preserve_instance_external_ip, region=None):
+                 preserve_instance_external_ip, region=None,
+                 shadow_backends=False, max_parallel_backends=1,
+                 min_healthy_fraction=None, healthy_percent=None,
+                 healthy_count=None, health_timeout=300,
+                 wait_for_every_backend=False):
         """ Initialize a BackendServiceMigration object
 
         Args:
@@ -43,6 +47,25 @@ class BackendServiceMigration(ComputeEngineResourceMigration):
             preserve_instance_external_ip: whether preserve the external IP
             of the instances which is serving this backend service
             region: region of the backend service
+            shadow_backends: (only valid for a global backend service)
+            whether to replace each managed instance group with a shadow
+            instance group in the target subnet
+            max_parallel_backends: (only valid for a global backend service)
+            maximum number of backends which are migrated at the same time
+            min_healthy_fraction: (only valid for a global backend service)
+            the minimum fraction of the backends which must stay healthy
+            while the others are detached for their migration
+            healthy_percent: (only valid for a global backend service)
+            the percentage of the instances of a backend which must be
+            healthy for the backend to count as healthy
+            healthy_count: (only valid for a global backend service)
+            the number of the instances of a backend which must be healthy
+            for the backend to count as healthy
+            health_timeout: (only valid for a global backend service)
+            maximum seconds to wait for a backend being healthy
+            wait_for_every_backend: (only valid for a global backend service)
+            whether to wait for every migrated backend being healthy,
+            instead of the first one only
         """
         super(BackendServiceMigration, self).__init__()
         self.backend_service_migration_handler = None
@@ -77,7 +100,14 @@ class BackendServiceMigration(ComputeEngineResourceMigration):
                 self.project, self.backend_service_name, self.network,
                 self.subnetwork,
                 self.preserve_instance_external_ip,
-                self.backend_service)
+                self.backend_service,
+                self.shadow_backends,
+                self.max_parallel_backends,
+                self.min_healthy_fraction,
+                self.health_timeout,
+                self.healthy_percent,
+                self.healthy_count,
+                self.wait_for_every_backend)
 
         elif isinstance(self.backend_service, InternalBackendService):
             self.backend_service_migration_handler = InternalBackendServiceNetworkMigration(
@@ -100,7 +130,7 @@ class BackendServiceMigration(ComputeEngineResourceMigration):
             except Exception as e:
                 warnings.warn(str(e), Warning)
                 raise RollbackError(
-                    'Rollback failed. You may lose your original resource. Please refer \'backup.log\' file.')
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
             raise MigrationFailed('Rollback finished.')
 
     def rollback(self):
@@ -17,11 +17,26 @@
 the target subnet.
 
 """
+import threading
+import time
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    ThreadPoolExecutor,
+    wait,
+)
 
+from vm_network_migration.errors import *
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.handlers.instance_group_migration.shadow_instance_group_migration import ShadowInstanceGroupMigration
+from vm_network_migration.module_helpers.instance_group_helper import InstanceGroupHelper
+from vm_network_migration.modules.backend_service_modules.backend_health_gate import BackendHealthGate
 from vm_network_migration.modules.backend_service_modules.global_backend_service import \
     GlobalBackendService
-from vm_network_migration.utils import initializer
+from vm_network_migration.modules.instance_group_modules.managed_instance_group import ManagedInstanceGroup
+from vm_network_migration.utils import (
+    initializer,
+    instance_group_links_is_equal,
+)
 from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
 
 
@@ -29,7 +44,11 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
     @initializer
     def __init__(self, compute, project, backend_service_name, network,
                  subnetwork,
-                 preserve_instance_external_ip, backend_service):
+                 preserve_instance_external_ip, backend_service,
+                 shadow_backends=False, max_parallel_backends=1,
+                 min_healthy_fraction=None, health_timeout=300,
+                 healthy_percent=None, healthy_count=None,
+                 wait_for_every_backend=False):
         """ Initialization
 
         Args:
@@ -39,9 +58,33 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
             subnetwork: target subnet
             preserve_instance_external_ip: whether preserve the instance's external IP
             backend_service: a GlobalBackendService object
+            shadow_backends: whether to replace each managed instance group
+            with a shadow instance group in the target subnet, instead of
+            detaching, migrating and reattaching it
+            max_parallel_backends: maximum number of backends which are
+            migrated at the same time
+            min_healthy_fraction: the minimum fraction of the instance group
+            backends which must stay healthy. A backend is only taken out if
+            the others keep the fraction. With shadow_backends, it only
+            applies to the backends which are not managed instance groups,
+            since the others are never taken out before their replacements
+            are healthy.
+            health_timeout: maximum seconds to wait for the healthy backends
+            to reach min_healthy_fraction, and for a migrated backend being
+            healthy
+            healthy_percent: the percentage of the instances of a backend
+            which must be healthy for the backend to count as healthy
+            healthy_count: the number of the instances of a backend which
+            must be healthy for the backend to count as healthy
+            wait_for_every_backend: whether to wait for every migrated
+            backend being healthy, instead of the first one only. The
+            migration fails if a backend isn't healthy before health_timeout.
         """
         super(GlobalBackendServiceNetworkMigration, self).__init__()
         self.backend_migration_handlers = []
+        self.lock = threading.Lock()
+        # selfLinks of the backends which are detached for their migration
+        self.detached_backends = set()
 
         if backend_service == None:
             self.backend_service = GlobalBackendService(self.compute,
@@ -50,6 +93,45 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
                                                         self.network,
                                                         self.subnetwork,
                                                         self.preserve_instance_external_ip)
+        self.health_gate = BackendHealthGate(self.backend_service,
+                                             self.healthy_percent,
+                                             self.healthy_count,
+                                             self.health_timeout)
+        # Set when a backend becomes healthy or a backend migration ends,
+        # so that the scheduler starts the next backend at once
+        self.scheduler_event = threading.Event()
+        self.health_gate.add_listener(self.on_health_transition)
+
+    def on_health_transition(self, backend_selfLink, healthy):
+        """ Wake up the scheduler when a backend becomes healthy
+
+        Args:
+            backend_selfLink: selfLink of the backend (an instance group)
+            healthy: whether the backend is healthy now
+
+        """
+        if healthy:
+            self.scheduler_event.set()
+
+    def wait_for_a_backend_become_healthy(self, backend_selfLink) -> bool:
+        """ Wait for a migrated backend being healthy
+
+        Args:
+            backend_selfLink: selfLink of the backend (an instance group)
+
+        Returns: True if the backend becomes healthy before the timeout
+
+        Raises:
+            MigrationFailed: wait_for_every_backend is set, and the backend
+            isn't healthy before the timeout
+        """
+        if self.health_gate.wait_for_backends([backend_selfLink]):
+            return True
+        if self.wait_for_every_backend:
+            raise MigrationFailed(
+                '%s is not healthy after %s seconds.' % (
+                    backend_selfLink, self.health_timeout))
+        return False
 
     def migrate_backends(self):
         """ Migrate the backends of the backend service one by one
@@ -63,6 +145,7 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
         if 'backends' not in self.backend_service.backend_service_configs:
             return None
         backends = self.backend_service.backend_service_configs['backends']
+        self.backend_service.prefetch_backends()
         for i in range(len(backends)):
             backend = backends[i]
             migration_helper = SelfLinkExecutor(self.compute, backend['group'],
@@ -82,15 +165,338 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
             self.backend_service.reattach_all_backends()
             # wait for the first backend becoming healthy,
             # then continue migrate other backends
-            if i == 0 and len(backends) > 1:
-                self.backend_service.wait_for_backend_become_healthy(backend['group'])
+            if self.wait_for_every_backend or (i == 0 and len(backends) > 1):
+                self.wait_for_a_backend_become_healthy(backend['group'])
+
+    def build_backend_migration_handlers(self) -> list:
+        """ Build the migration handlers of the instance group backends
+
+        Returns: a list of (backend config, migration handler)
+
+        """
+        backend_migration_handlers = []
+        for backend in self.backend_service.backend_service_configs.get(
+                'backends', []):
+            migration_helper = SelfLinkExecutor(self.compute, backend['group'],
+                                                self.network,
+                                                self.subnetwork,
+                                                self.preserve_instance_external_ip)
+            backend_migration_handler = migration_helper.build_instance_group_migration_handler()
+            # The backend type is not an instance group, then just ignore
+            if backend_migration_handler != None:
+                backend_migration_handlers.append(
+                    (backend, backend_migration_handler))
+        return backend_migration_handlers
+
+    def find_healthy_backends(self, backends) -> list:
+        """ Find the backends which are attached and pass the health gate.
+        Their health is checked with batch requests.
+
+        Args:
+            backends: a list of backend configs
+
+        Returns: a list of the selfLinks of the healthy backends
+
+        """
+        with self.lock:
+            attached_backends = [backend for backend in backends if
+                                 backend['group'] not in
+                                 self.detached_backends]
+        results = self.health_gate.check(
+            [backend['group'] for backend in attached_backends])
+        return [backend['group'] for backend in attached_backends if
+                results[backend['group']]]
+
+    def can_take_out_a_backend(self, backends, backend) -> bool:
+        """ Check whether a backend can be detached without the healthy
+        backends dropping below min_healthy_fraction
+
+        Args:
+            backends: a list of the instance group backend configs
+            backend: the config of the backend to detach
+
+        Returns: True/False
+
+        """
+        if self.min_healthy_fraction == None:
+            return True
+        healthy_backends = self.find_healthy_backends(backends)
+        if backend['group'] in healthy_backends:
+            healthy_backends.remove(backend['group'])
+        return len(healthy_backends) >= self.min_healthy_fraction * len(
+            backends)
+
+    def check_min_healthy_fraction(self, number_of_backends):
+        """ Check that min_healthy_fraction allows detaching a backend.
+        The other backends must be at least min_healthy_fraction of all the
+        backends, so the fraction is at most (N-1)/N.
+
+        Args:
+            number_of_backends: the number of the instance group backends
+
+        Raises:
+            MigrationFailed: no backend can ever be detached
+        """
+        if self.min_healthy_fraction == None or number_of_backends == 0:
+            return
+        if self.min_healthy_fraction * number_of_backends > \
+                number_of_backends - 1:
+            raise MigrationFailed(
+                'min_healthy_fraction %s can\'t be kept while one of the %d '
+                'backends is detached. It should be at most %.3f.' % (
+                    self.min_healthy_fraction, number_of_backends,
+                    (number_of_backends - 1) / number_of_backends))
+
+    def migrate_a_backend(self, backend, backend_migration_handler):
+        """ Detach, migrate and reattach a backend. The other backends
+        of the current config are kept. The backend should have been added
+        into self.detached_backends.
+
+        Args:
+            backend: the config of the backend
+            backend_migration_handler: its InstanceGroupNetworkMigration
+
+        """
+        with self.lock:
+            self.backend_migration_handlers.append(backend_migration_handler)
+        print('Detaching: %s' % (backend['group']))
+        self.backend_service.remove_a_backend(backend['group'])
+        print('Migrating: %s' % (backend['group']))
+        backend_migration_handler.network_migration()
+        print('Reattaching: %s' % (backend['group']))
+        self.backend_service.add_a_backend(backend)
+        with self.lock:
+            self.detached_backends.discard(backend['group'])
+        if self.wait_for_every_backend:
+            self.wait_for_a_backend_become_healthy(backend['group'])
+
+    def migrate_backends_concurrently(self):
+        """ Migrate up to max_parallel_backends backends at the same time.
+        The next backend only starts if the healthy backends stay above
+        min_healthy_fraction without it. The scheduler wakes up as soon as a
+        backend becomes healthy or a backend migration ends. Once a backend
+        fails, no more backends start.
+
+        Raises:
+            MigrationFailed: min_healthy_fraction can't be kept while any
+            backend is detached, or the healthy backends stay below
+            min_healthy_fraction for health_timeout seconds
+        """
+        if 'backends' not in self.backend_service.backend_service_configs:
+            return None
+        self.backend_service.prefetch_backends()
+        pending = self.build_backend_migration_handlers()
+        backends = [backend for backend, _ in pending]
+        self.check_min_healthy_fraction(len(backends))
+        running = {}
+        errors = []
+        waiting_since = None
+        with ThreadPoolExecutor(
+                max_workers=max(1, self.max_parallel_backends)) as executor:
+            while len(running) > 0 or (len(pending) > 0 and len(errors) == 0):
+                while len(pending) > 0 and len(errors) == 0 and len(
+                        running) < max(1, self.max_parallel_backends):
+                    if not self.can_take_out_a_backend(backends,
+                                                       pending[0][0]):
+                        break
+                    waiting_since = None
+                    backend, backend_migration_handler = pending.pop(0)
+                    # It is counted as unhealthy from now on
+                    with self.lock:
+                        self.detached_backends.add(backend['group'])
+                    future = executor.submit(self.migrate_a_backend, backend,
+                                             backend_migration_handler)
+                    future.add_done_callback(
+                        lambda future: self.scheduler_event.set())
+                    running[future] = backend
+                if len(running) == 0 and len(pending) > 0 and len(
+                        errors) == 0:
+                    # Nothing is detached, but the other backends are not
+                    # healthy enough yet
+                    if waiting_since == None:
+                        waiting_since = time.monotonic()
+                        print('Waiting for %.0f%% of the backends being '
+                              'healthy.' % (self.min_healthy_fraction * 100))
+                    elif time.monotonic() - waiting_since > \
+                            self.health_timeout:
+                        raise MigrationFailed(
+                            'Less than %.0f%% of the backends are healthy '
+                            'after %s seconds.' % (
+                                self.min_healthy_fraction * 100,
+                                self.health_timeout))
+                    self.scheduler_event.wait(timeout=3)
+                    self.scheduler_event.clear()
+                    continue
+                self.scheduler_event.wait(timeout=3)
+                self.scheduler_event.clear()
+                for future in [future for future in running if
+                               future.done()]:
+                    running.pop(future)
+                    if future.exception() != None:
+                        errors.append(future.exception())
+        if len(errors) > 0:
+            raise errors[0]
+
+    def find_original_backend(self, backend_selfLink) -> dict:
+        """ Find the original config of a backend
+
+        Args:
+            backend_selfLink: selfLink of the backend (an instance group)
+
+        Returns: the backend config
+
+        """
+        for backend in self.backend_service.backend_service_configs.get(
+                'backends', []):
+            if instance_group_links_is_equal(backend['group'],
+                                             backend_selfLink):
+                return backend
+        return None
+
+    def build_shadow_mode_handler(self, backend):
+        """ Build the migration handler of a backend in the shadow mode
+
+        Args:
+            backend: the config of the backend
+
+        Returns: a ShadowInstanceGroupMigration for a managed instance group,
+        an InstanceGroupNetworkMigration for any other instance group, or
+        None if the backend is not an instance group
+
+        """
+        migration_helper = SelfLinkExecutor(self.compute, backend['group'],
+                                            self.network,
+                                            self.subnetwork,
+                                            self.preserve_instance_external_ip)
+        # The backend type is not an instance group, then just ignore
+        if migration_helper.instance_group == None:
+            return None
+        instance_group = InstanceGroupHelper(
+            self.compute, self.project, migration_helper.instance_group,
+            migration_helper.region, migration_helper.zone, self.network,
+            self.subnetwork,
+            self.preserve_instance_external_ip).build_instance_group()
+        if isinstance(instance_group, ManagedInstanceGroup):
+            return ShadowInstanceGroupMigration(
+                self.compute, self.project, self.network, self.subnetwork,
+                migration_helper.zone, migration_helper.region,
+                instance_group, self.backend_service, self.health_timeout,
+                self.health_gate)
+        return migration_helper.build_instance_group_migration_handler()
+
+    def cut_over_a_backend(self, backend, backend_migration_handler):
+        """ Replace a managed instance group backend with a shadow instance
+        group, without taking the other backends out
+
+        Args:
+            backend: the config of the backend
+            backend_migration_handler: its ShadowInstanceGroupMigration
+
+        """
+        with self.lock:
+            self.backend_migration_handlers.append(backend_migration_handler)
+        print('Migrating: %s' % (backend['group']))
+        backend_migration_handler.network_migration()
+
+    def wait_until_a_backend_can_be_taken_out(self, backends, backend):
+        """ Wait until the other backends keep min_healthy_fraction without
+        a backend
+
+        Args:
+            backends: a list of the instance group backend configs
+            backend: the config of the backend to detach
+
+        Raises:
+            MigrationFailed: the healthy backends stay below
+            min_healthy_fraction for health_timeout seconds
+        """
+        waiting_since = time.monotonic()
+        while not self.can_take_out_a_backend(backends, backend):
+            if time.monotonic() - waiting_since > self.health_timeout:
+                raise MigrationFailed(
+                    'Less than %.0f%% of the backends are healthy after %s '
+                    'seconds.' % (self.min_healthy_fraction * 100,
+                                  self.health_timeout))
+            self.scheduler_event.wait(timeout=3)
+            self.scheduler_event.clear()
+
+    def migrate_backends_with_shadow_groups(self):
+        """ Migrate the backends without a shadow instance group one by one,
+        then replace the managed instance groups with shadow instance groups,
+        up to max_parallel_backends at the same time. The backends which
+        haven't started are skipped once a backend fails.
+
+        A backend without a shadow instance group is taken out for its
+        migration, so it is migrated while all the original backends are
+        attached, only when the others keep min_healthy_fraction, and the
+        next one waits for it being healthy.
+
+        Raises:
+            MigrationFailed: min_healthy_fraction can't be kept while a
+            backend is detached
+        """
+        if 'backends' not in self.backend_service.backend_service_configs:
+            return None
+        self.backend_service.prefetch_backends()
+        shadow_migrations = []
+        detached_migrations = []
+        for backend in self.backend_service.backend_service_configs[
+            'backends']:
+            backend_migration_handler = self.build_shadow_mode_handler(
+                backend)
+            if isinstance(backend_migration_handler,
+                          ShadowInstanceGroupMigration):
+                shadow_migrations.append((backend, backend_migration_handler))
+            elif backend_migration_handler != None:
+                detached_migrations.append(
+                    (backend, backend_migration_handler))
+        backends = [backend for backend, _ in
+                    shadow_migrations + detached_migrations]
+        if len(detached_migrations) > 0:
+            self.check_min_healthy_fraction(len(backends))
+        for backend, backend_migration_handler in detached_migrations:
+            self.wait_until_a_backend_can_be_taken_out(backends, backend)
+            with self.lock:
+                self.detached_backends.add(backend['group'])
+            self.migrate_a_backend(backend, backend_migration_handler)
+            if not self.wait_for_every_backend:
+                self.wait_for_a_backend_become_healthy(backend['group'])
+
+        with ThreadPoolExecutor(
+                max_workers=max(1, self.max_parallel_backends)) as executor:
+            futures = [executor.submit(self.cut_over_a_backend, backend,
+                                       backend_migration_handler) for
+                       backend, backend_migration_handler in
+                       shadow_migrations]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+        for future in futures:
+            if not future.cancelled() and future.exception() != None:
+                raise future.exception()
+
+    def migrates_backends_concurrently(self) -> bool:
+        """ Check whether the backends are migrated by
+        migrate_backends_concurrently
+
+        Returns: True/False
+
+        """
+        return not self.shadow_backends and (
+                self.max_parallel_backends > 1 or
+                self.min_healthy_fraction != None)
 
     def network_migration(self):
         """ Migrate the backend service
         """
         print('Migrating an global backend service: %s' % (
             self.backend_service.backend_service_name))
-        self.migrate_backends()
+        if self.shadow_backends:
+            self.migrate_backends_with_shadow_groups()
+        elif self.migrates_backends_concurrently():
+            self.migrate_backends_concurrently()
+        else:
+            self.migrate_backends()
 
     def rollback(self):
         """ Rollback
@@ -103,7 +509,25 @@ class GlobalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
             return
         # Rollback the instance groups one by one
         for backend_migration_handler in self.backend_migration_handlers:
-            if backend_migration_handler != None and backend_migration_handler.instance_group != None:
+            if isinstance(backend_migration_handler,
+                          ShadowInstanceGroupMigration):
+                backend_migration_handler.rollback()
+            elif (self.shadow_backends or
+                  self.migrates_backends_concurrently()) and \
+                    backend_migration_handler.instance_group != None:
+                # Only this backend is changed, so that the other backends,
+                # which may be in the middle of their own migration, are
+                # not reattached before they are rolled back
+                instance_group_selfLink = backend_migration_handler.instance_group.selfLink
+                self.backend_service.remove_a_backend(instance_group_selfLink)
+                backend_migration_handler.rollback()
+                original_backend = self.find_original_backend(
+                    instance_group_selfLink)
+                if original_backend != None:
+                    print('Reattaching (%s) to (%s)' % (
+                        instance_group_selfLink, self.backend_service_name))
+                    self.backend_service.add_a_backend(original_backend)
+            elif backend_migration_handler != None and backend_migration_handler.instance_group != None:
                 print('Detaching: %s' % (
                     backend_migration_handler.instance_group.selfLink))
                 self.backend_service.detach_a_backend(
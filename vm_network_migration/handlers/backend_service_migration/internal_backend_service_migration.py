@@ -18,6 +18,7 @@
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration.modules.backend_service_modules.internal_regional_backend_service import \
     InternalBackendService
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
 from vm_network_migration.utils import initializer
 from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
 from vm_network_migration.errors import *
@@ -63,6 +64,7 @@ class InternalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
         if 'backends' not in self.backend_service.backend_service_configs:
             return None
         backends = self.backend_service.backend_service_configs['backends']
+        self.backend_service.prefetch_backends()
         for backend in backends:
             selfLink_executor = SelfLinkExecutor(self.compute, backend['group'],
                                                  self.network,
@@ -74,6 +76,24 @@ class InternalBackendServiceNetworkMigration(ComputeEngineResourceMigration):
                 self.backend_migration_handlers.append(
                     backend_migration_handler)
 
+    def get_journal_selfLink(self):
+        """ Get the key of the backend service in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'backendServices',
+                              self.backend_service_name, region=self.region)
+
+    def get_journal_config(self):
+        """ Get the original config of the backend service
+
+        Returns: a dict
+
+        """
+        if self.backend_service != None:
+            return self.backend_service.backend_service_configs
+
     def network_migration(self):
         """ Migrate the network of an INTERNAL backend service.
         If there is a forwarding rule serving the backend service,
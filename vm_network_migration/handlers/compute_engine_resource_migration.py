@@ -11,15 +11,83 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-""" It is the parent class of all the GCE resource migration handlers
+""" It is the parent class of all the GCE resource migration handlers.
 
+The state transitions of a handler (assignments to self.migration_status)
+are written into DEFAULT_MIGRATION_JOURNAL, together with the original config
+of its resource.
 """
+from vm_network_migration.modules.other_modules.migration_journal import DEFAULT_MIGRATION_JOURNAL
+
+
 class ComputeEngineResourceMigration(object):
     def __init__(self):
         pass
 
+    @property
+    def migration_status(self):
+        return self.__dict__.get('_migration_status')
+
+    @migration_status.setter
+    def migration_status(self, status):
+        self._migration_status = status
+        self.record_migration_status()
+
+    def get_journal_selfLink(self):
+        """ Get the key of the handler's resource in the journal
+
+        Returns: canonical selfLink, or None if the handler isn't journaled
+
+        """
+        return None
+
+    def get_journal_config(self):
+        """ Get the original config of the resource, which is journaled
+        with its first state transition
+
+        Returns: a dict, or None
+
+        """
+        return None
+
+    def get_journal_state(self) -> dict:
+        """ Get the state which the handler needs to resume from its
+        current status
+
+        Returns: a JSON serializable dict
+
+        """
+        return {}
+
+    def record_migration_status(self):
+        """ Write the current status into the journal
+
+        """
+        if not DEFAULT_MIGRATION_JOURNAL.is_open():
+            return
+        selfLink = self.get_journal_selfLink()
+        if selfLink == None:
+            return
+        if int(self.migration_status) != 0:
+            DEFAULT_MIGRATION_JOURNAL.record_config(selfLink,
+                                                    self.get_journal_config())
+        DEFAULT_MIGRATION_JOURNAL.record_status(selfLink,
+                                                type(self).__name__,
+                                                self.migration_status,
+                                                self.get_journal_state())
+
     def network_migration(self):
         pass
 
+    def resume(self, journal_entry):
+        """ Continue an interrupted migration. By default, the migration
+        runs again from the beginning.
+
+        Args:
+            journal_entry: the entry of the resource loaded from the journal
+
+        """
+        self.network_migration()
+
     def rollback(self):
-        pass
\ No newline at end of file
+        pass
@@ -116,7 +116,7 @@ class ForwardingRuleMigration(ComputeEngineResourceMigration):
             except Exception as e:
                 warnings.warn(str(e), Warning)
                 raise RollbackError(
-                    'Rollback failed. You may lose your original resource. Please refer \'backup.log\' file.')
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
 
             raise MigrationFailed('Rollback finished.')
 
@@ -20,6 +20,7 @@ import warnings
 from vm_network_migration.errors import *
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration.module_helpers.forwarding_rule_helper import ForwardingRuleHelper
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
 from vm_network_migration.utils import initializer
 from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
 from vm_network_migration.handlers.backend_service_migration.backend_service_migration import BackendServiceMigration
@@ -62,6 +63,24 @@ class InternalForwardingRuleMigration(ComputeEngineResourceMigration):
         return forwarding_rule_helper.build_a_forwarding_rule()
 
 
+    def get_journal_selfLink(self):
+        """ Get the key of the forwarding rule in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'forwardingRules',
+                              self.forwarding_rule_name, region=self.region)
+
+    def get_journal_config(self):
+        """ Get the original config of the forwarding rule
+
+        Returns: a dict
+
+        """
+        if self.forwarding_rule != None:
+            return self.forwarding_rule.forwarding_rule_configs
+
     def network_migration(self):
         """ Network migration for an internal forwarding rule.
          The forwarding rule will be deleted first.
@@ -33,7 +33,9 @@ class InstanceGroupNetworkMigration(ComputeEngineResourceMigration):
     def __init__(self, compute, project,
                  network_name,
                  subnetwork_name, preserve_external_ip, zone, region,
-                 instance_group_name):
+                 instance_group_name, max_parallel_instances=1,
+                 keep_disks_on_delete=False, rolling_update=False,
+                 max_surge=None, max_unavailable=None):
         """Initialize a InstanceNetworkMigration object
 
         Args:
@@ -45,6 +47,16 @@ class InstanceGroupNetworkMigration(ComputeEngineResourceMigration):
           zone: zone of a zonal instance group
           region: region of regional instance group
           instance_group_name: name
+          max_parallel_instances: maximum number of instances of an
+          unmanaged instance group which are migrated at the same time
+          keep_disks_on_delete: whether to delete the instances of an
+          unmanaged instance group with their disks kept
+          rolling_update: whether to replace the instances of a managed
+          instance group with a rolling update, instead of deleting and
+          recreating the instance group
+          max_surge: the maxSurge of the rolling update, such as 3 or '20%'
+          max_unavailable: the maxUnavailable of the rolling update,
+          such as 0 or '20%'
         """
         super(InstanceGroupNetworkMigration, self).__init__()
         self.instance_group = self.build_instance_group()
@@ -86,7 +98,9 @@ class InstanceGroupNetworkMigration(ComputeEngineResourceMigration):
                 self.network_name,
                 self.subnetwork_name, self.preserve_external_ip, self.zone,
                 self.region,
-                self.instance_group_name
+                self.instance_group_name,
+                self.max_parallel_instances,
+                self.keep_disks_on_delete
             )
         else:
 
@@ -95,7 +109,10 @@ class InstanceGroupNetworkMigration(ComputeEngineResourceMigration):
                 self.network_name,
                 self.subnetwork_name, self.preserve_external_ip, self.zone,
                 self.region,
-                self.instance_group_name)
+                self.instance_group_name,
+                rolling_update=self.rolling_update,
+                max_surge=self.max_surge,
+                max_unavailable=self.max_unavailable)
         return self.instance_group_migration_handler
 
     def network_migration(self):
@@ -116,7 +133,7 @@ class InstanceGroupNetworkMigration(ComputeEngineResourceMigration):
             except Exception as e:
                 warnings.warn(str(e), Warning)
                 raise RollbackError(
-                    'Rollback failed. You may lose your original resource. Please refer \'backup.log\' file.')
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
             raise MigrationFailed('Rollback finished.')
 
     def rollback(self):
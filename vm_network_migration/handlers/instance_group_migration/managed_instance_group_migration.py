@@ -24,6 +24,7 @@ from vm_network_migration.handlers.compute_engine_resource_migration import Comp
 from vm_network_migration.module_helpers.instance_group_helper import InstanceGroupHelper
 from vm_network_migration.modules.instance_group_modules.instance_group import InstanceGroupStatus
 from vm_network_migration.modules.other_modules.instance_template import InstanceTemplate
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
 from vm_network_migration.utils import initializer
 
 
@@ -32,7 +33,8 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
     def __init__(self, compute, project,
                  network_name,
                  subnetwork_name, preserve_external_ip, zone, region,
-                 instance_group_name):
+                 instance_group_name, rolling_update=False, max_surge=None,
+                 max_unavailable=None):
         """Initialization
 
         Args:
@@ -44,6 +46,14 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
             zone: zone of a zonal instance group
             region: region of regional instance group
             instance_group_name: name
+            rolling_update: whether to replace the instances with a rolling
+            update of the instance group, instead of deleting and recreating
+            the instance group
+            max_surge: (only valid for a rolling update) the maximum number
+            of instances created above the target size, such as 3 or '20%'
+            max_unavailable: (only valid for a rolling update) the maximum
+            number of instances which are unavailable during the update,
+            such as 0 or '20%'
         """
         super(ManagedInstanceGroupMigration, self).__init__()
         self.instance_group = self.build_instance_group()
@@ -71,10 +81,32 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
         instance_group = instance_group_helper.build_instance_group()
         return instance_group
 
+    def get_journal_selfLink(self):
+        """ Get the key of the instance group in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'instanceGroups',
+                              self.instance_group_name, zone=self.zone,
+                              region=self.region)
+
+    def get_journal_config(self):
+        """ Get the original config of the instance group
+
+        Returns: a dict
+
+        """
+        if self.instance_group != None:
+            return self.instance_group.original_instance_group_configs
+
     def network_migration(self):
         """ Migrate the network of a managed instance group.
         The instance group will be recreated with a new
         instance template using the target subnet info.
+        In the rolling update mode, the instance group is kept, and its
+        instances are replaced with the ones created from the new
+        instance template.
         """
         self.migration_status = MigrationStatus(0)
         if self.preserve_external_ip:
@@ -89,7 +121,15 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
                     target_pool_list), Warning)
             raise MigrationFailed('The migration didn\'t start.')
 
-        if self.instance_group.autoscaler != None:
+        if self.rolling_update and len(
+                self.instance_group.original_instance_group_configs.get(
+                    'versions', [])) > 1:
+            raise MigrationFailed(
+                'The instance group has more than one version. A rolling '
+                'update would replace all of them with a single version. '
+                'The migration didn\'t start.')
+
+        if self.instance_group.autoscaler != None and not self.rolling_update:
             warn(
                 'The autoscaler serving the instance group will be deleted and recreated during the migration',
                 Warning)
@@ -111,6 +151,10 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
             print(
                 'The instance template of %s is already using the target subnet.' % (
                     self.instance_group_name))
+            if self.rolling_update:
+                # An interrupted rolling update continues in the background
+                self.instance_group.wait_for_rolling_update(
+                    self.original_instance_template.get_selfLink())
             return
 
         self.migration_status = MigrationStatus(1)
@@ -125,6 +169,9 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
         self.migration_status = MigrationStatus(2)
 
         new_instance_template_link = self.new_instance_template.get_selfLink()
+        if self.rolling_update:
+            self.rolling_update_migration(new_instance_template_link)
+            return
         print(
             'Modifying the instance group configs to use the new instance template')
         self.instance_group.modify_instance_group_configs_with_instance_template(
@@ -139,11 +186,67 @@ class ManagedInstanceGroupMigration(ComputeEngineResourceMigration):
             self.instance_group.new_instance_group_configs)
         self.migration_status = MigrationStatus(4)
 
+    def rolling_update_migration(self, new_instance_template_link):
+        """ Replace the instances of the instance group with a rolling
+        update to the new instance template
+
+        Args:
+            new_instance_template_link: selfLink of the new instance template
+
+        """
+        update_policy = self.instance_group.get_rolling_update_policy(
+            self.max_surge, self.max_unavailable)
+        print('Starting a rolling update of %s to the new instance template.'
+              % (self.instance_group_name))
+        # The update may have started even if waiting for the patch fails,
+        # so the rollback rolls the instances back from now on
+        self.migration_status = MigrationStatus(5)
+        self.instance_group.start_rolling_update(new_instance_template_link,
+                                                 update_policy)
+        self.instance_group.wait_for_rolling_update(
+            new_instance_template_link)
+        self.restore_update_policy()
+        self.migration_status = MigrationStatus(6)
+
+    def restore_update_policy(self):
+        """ Restore the original update policy of the instance group, so that
+        its later template changes are applied as before
+
+        """
+        # The patch is merged into the live update policy, so the fields
+        # which the rolling update set and the original policy doesn't have
+        # are cleared with explicit nulls
+        update_policy = {field: None for field in
+                         self.instance_group.get_rolling_update_policy(
+                             self.max_surge, self.max_unavailable)}
+        update_policy.update(
+            self.instance_group.original_instance_group_configs.get(
+                'updatePolicy', {}))
+        self.instance_group.patch_instance_group(
+            {'updatePolicy': update_policy})
+
     def rollback(self):
         """ Rollback
 
         """
-        if self.migration_status >= 3:
+        if self.migration_status in [5, 6]:
+            original_instance_template_link = \
+                self.instance_group.original_instance_group_configs[
+                    'instanceTemplate']
+            print('Rolling back the instances of %s to the original '
+                  'instance template.' % (self.instance_group_name))
+            self.instance_group.start_rolling_update(
+                original_instance_template_link,
+                self.instance_group.get_rolling_update_policy(
+                    self.max_surge, self.max_unavailable),
+                self.instance_group.original_instance_group_configs.get(
+                    'versions'))
+            self.instance_group.wait_for_rolling_update(
+                original_instance_template_link)
+            self.restore_update_policy()
+            self.migration_status = MigrationStatus(2)
+
+        if self.migration_status in [3, 4]:
             instance_group_status = self.instance_group.get_status()
             if instance_group_status != InstanceGroupStatus.NOTEXISTS:
                 print('Deleting: %s.' % (self.instance_group_name))
@@ -170,3 +273,5 @@ class MigrationStatus(IntEnum):
     NEW_INSTANCE_TEMPLATE_CREATED = 2
     ORIGINAL_GROUP_DELETED = 3
     NEW_GROUP_CREATED = 4
+    ROLLING_UPDATE_STARTED = 5
+    INSTANCES_UPDATED = 6
@@ -0,0 +1,312 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Migrate a managed instance group which serves a global backend service
+by cutting over to a shadow instance group.
+
+A shadow managed instance group is created in the target subnet from a new
+instance template, and added to the backend service next to the original
+instance group. After the shadow instance group becomes healthy, the original
+instance group is drained, detached and deleted. The backend service keeps
+its serving capacity during the whole migration.
+"""
+import time
+import warnings
+from copy import deepcopy
+from enum import IntEnum
+
+from vm_network_migration.errors import *
+from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
+from vm_network_migration.module_helpers.instance_group_helper import InstanceGroupHelper
+from vm_network_migration.modules.backend_service_modules.backend_health_gate import BackendHealthGate
+from vm_network_migration.modules.other_modules.instance_template import InstanceTemplate
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
+from vm_network_migration.utils import (
+    generate_timestamp_string,
+    initializer,
+    instance_group_links_is_equal,
+)
+
+
+class ShadowInstanceGroupMigration(ComputeEngineResourceMigration):
+    @initializer
+    def __init__(self, compute, project, network_name, subnetwork_name,
+                 zone, region, instance_group, backend_service,
+                 health_timeout=600, health_gate=None):
+        """ Initialization
+
+        Args:
+            compute: google compute engine API
+            project: project id
+            network_name: target network
+            subnetwork_name: target subnetwork
+            zone: zone of a zonal instance group
+            region: region of a regional instance group
+            instance_group: the original ManagedInstanceGroup object
+            backend_service: the GlobalBackendService object which the
+            instance group serves
+            health_timeout: maximum seconds to wait for the shadow instance
+            group becoming healthy
+            health_gate: the BackendHealthGate which decides whether the
+            shadow instance group is healthy. A gate which requires one
+            healthy instance is used if it is None.
+        """
+        super(ShadowInstanceGroupMigration, self).__init__()
+        self.instance_group_name = self.instance_group.instance_group_name
+        self.original_backend = self.find_original_backend()
+        self.new_instance_template = None
+        self.shadow_instance_group_name = None
+        self.shadow_instance_group = None
+        if self.health_gate == None:
+            self.health_gate = BackendHealthGate(self.backend_service,
+                                                 timeout=self.health_timeout)
+        self.migration_status = MigrationStatus(0)
+
+    def find_original_backend(self) -> dict:
+        """ Find the backend config of the original instance group
+
+        Returns: the backend config
+
+        """
+        for backend in self.backend_service.backend_service_configs.get(
+                'backends', []):
+            if instance_group_links_is_equal(backend['group'],
+                                             self.instance_group.selfLink):
+                return deepcopy(backend)
+        return None
+
+    def get_journal_selfLink(self):
+        """ Get the key of the instance group in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'instanceGroups',
+                              self.instance_group_name, zone=self.zone,
+                              region=self.region)
+
+    def get_journal_config(self):
+        """ Get the original config of the instance group
+
+        Returns: a dict
+
+        """
+        return self.instance_group.original_instance_group_configs
+
+    def get_journal_state(self) -> dict:
+        """ Get the names of the resources created by the migration
+
+        Returns: a dict
+
+        """
+        return {
+            'shadow_instance_group_name': self.shadow_instance_group_name,
+            'new_instance_template_name': None if
+            self.new_instance_template == None else
+            self.new_instance_template.instance_template_name
+        }
+
+    def get_shadow_instance_group_name(self) -> str:
+        """ Generate the name of the shadow instance group. An instance
+        group name has at most 63 characters.
+
+        Returns: the original name with a timestamp suffix
+        """
+        timestamp = generate_timestamp_string()
+        return '%s-%s' % (
+            self.instance_group_name[:62 - len(timestamp)], timestamp)
+
+    def get_shadow_backend(self) -> dict:
+        """ Get the backend config of the shadow instance group, which uses
+        the same balancing settings as the original backend
+
+        Returns: the backend config
+
+        """
+        shadow_backend = deepcopy(self.original_backend)
+        shadow_backend['group'] = \
+            self.shadow_instance_group.original_instance_group_configs[
+                'instanceGroup']
+        return shadow_backend
+
+    def create_shadow_instance_group(self, new_instance_template_link):
+        """ Create the shadow instance group and its autoscaler, and wait
+        until all its instances are created
+
+        Args:
+            new_instance_template_link: selfLink of the new instance template
+
+        """
+        self.shadow_instance_group_name = self.get_shadow_instance_group_name()
+        print('Creating the shadow instance group %s in the target subnet.' % (
+            self.shadow_instance_group_name))
+        self.instance_group.create_instance_group(
+            self.instance_group.get_shadow_instance_group_configs(
+                self.shadow_instance_group_name, new_instance_template_link))
+        self.migration_status = MigrationStatus(3)
+        self.shadow_instance_group = InstanceGroupHelper(
+            self.compute, self.project, self.shadow_instance_group_name,
+            self.region, self.zone, self.network_name,
+            self.subnetwork_name).build_instance_group()
+        shadow_autoscaler_configs = \
+            self.instance_group.get_shadow_autoscaler_configs(
+                self.shadow_instance_group_name,
+                self.shadow_instance_group.selfLink)
+        if shadow_autoscaler_configs != None:
+            print('Creating the autoscaler of %s.' % (
+                self.shadow_instance_group_name))
+            self.shadow_instance_group.autoscaler = \
+                self.shadow_instance_group_name
+            self.shadow_instance_group.autoscaler_configs = \
+                shadow_autoscaler_configs
+            self.shadow_instance_group.insert_autoscaler()
+        self.shadow_instance_group.wait_for_rolling_update(
+            new_instance_template_link)
+
+    def network_migration(self):
+        """ Replace the original instance group with a shadow instance group
+        in the target subnet, without taking the capacity out of the backend
+        service
+        """
+        self.migration_status = MigrationStatus(0)
+        if self.original_backend == None:
+            raise MigrationFailed(
+                '%s is not a backend of %s.' % (
+                    self.instance_group_name,
+                    self.backend_service.backend_service_name))
+        target_pool_list = self.instance_group.get_target_pools()
+        if len(target_pool_list) != 0:
+            raise MigrationFailed(
+                'The instance group is serving target pools %s. '
+                'The migration didn\'t start.' % (target_pool_list))
+        print('Retrieving the instance template of %s.' % (
+            self.instance_group_name))
+        original_instance_template = InstanceTemplate(
+            self.compute,
+            self.project,
+            self.instance_group.retrieve_instance_template_name(
+                self.instance_group.original_instance_group_configs),
+            self.zone,
+            self.region,
+            None,
+            self.network_name,
+            self.subnetwork_name)
+        if original_instance_template.compare_original_network_and_target_network():
+            print(
+                'The instance template of %s is already using the target subnet.' % (
+                    self.instance_group_name))
+            return
+
+        self.migration_status = MigrationStatus(1)
+        print(
+            'Generating a new instance template to use the target network information.')
+        self.new_instance_template = original_instance_template.generating_new_instance_template_using_network_info()
+        if self.new_instance_template == None:
+            raise UnableToGenerateNewInstanceTemplate
+        print('Inserting the new instance template %s.' % (
+            self.new_instance_template.instance_template_name))
+        self.new_instance_template.insert()
+        self.migration_status = MigrationStatus(2)
+
+        self.create_shadow_instance_group(
+            self.new_instance_template.get_selfLink())
+        shadow_backend = self.get_shadow_backend()
+        # The load balancer doesn't send traffic to the unhealthy instances,
+        # and the health of a group can only be checked after it becomes
+        # a backend
+        print('Attaching: %s' % (shadow_backend['group']))
+        self.backend_service.add_a_backend(shadow_backend)
+        self.migration_status = MigrationStatus(4)
+        if not self.health_gate.wait_for_backends([shadow_backend['group']],
+                                                  self.health_timeout):
+            raise MigrationFailed(
+                'The shadow instance group %s is not healthy.' % (
+                    self.shadow_instance_group_name))
+
+        print('Draining: %s' % (self.original_backend['group']))
+        self.backend_service.set_backend_capacity_scaler(
+            self.original_backend['group'], 0)
+        self.migration_status = MigrationStatus(5)
+        print('Detaching: %s' % (self.original_backend['group']))
+        self.backend_service.remove_a_backend(self.original_backend['group'])
+        self.migration_status = MigrationStatus(6)
+        # Let the existing connections finish
+        time.sleep(self.backend_service.get_draining_timeout())
+        print('Deleting: %s.' % (self.instance_group_name))
+        self.instance_group.delete_instance_group()
+        self.migration_status = MigrationStatus(7)
+
+    def rollback(self):
+        """ Rollback
+
+        """
+        if self.migration_status == 7:
+            print('Recreating the instance group: %s.' % (
+                self.instance_group_name))
+            self.instance_group.create_instance_group(
+                self.instance_group.original_instance_group_configs)
+            self.migration_status = MigrationStatus(6)
+
+        if self.migration_status == 6:
+            print('Reattaching: %s' % (self.original_backend['group']))
+            self.backend_service.add_a_backend(self.original_backend)
+            # The shadow instance group keeps serving until the original
+            # instance group takes the traffic back
+            if not self.health_gate.wait_for_backends(
+                    [self.original_backend['group']], self.health_timeout):
+                warnings.warn(
+                    '%s is not healthy. The shadow instance group is '
+                    'removed anyway.' % (self.original_backend['group']),
+                    Warning)
+            self.migration_status = MigrationStatus(4)
+
+        if self.migration_status == 5:
+            print('Undraining: %s' % (self.original_backend['group']))
+            self.backend_service.set_backend_capacity_scaler(
+                self.original_backend['group'],
+                self.original_backend.get('capacityScaler', 1))
+            self.migration_status = MigrationStatus(4)
+
+        if self.migration_status == 4:
+            self.backend_service.remove_a_backend(
+                self.get_shadow_backend()['group'])
+            self.migration_status = MigrationStatus(3)
+
+        if self.migration_status == 3:
+            if self.shadow_instance_group == None:
+                self.shadow_instance_group = InstanceGroupHelper(
+                    self.compute, self.project,
+                    self.shadow_instance_group_name, self.region, self.zone,
+                    self.network_name,
+                    self.subnetwork_name).build_instance_group()
+            print('Deleting the shadow instance group: %s.' % (
+                self.shadow_instance_group_name))
+            self.shadow_instance_group.delete_instance_group()
+            self.migration_status = MigrationStatus(2)
+
+        if self.migration_status == 2:
+            print('Deleting the new instance template.')
+            self.new_instance_template.delete()
+            self.migration_status = MigrationStatus(0)
+
+
+class MigrationStatus(IntEnum):
+    NOT_START = 0
+    MIGRATING = 1
+    NEW_INSTANCE_TEMPLATE_CREATED = 2
+    SHADOW_GROUP_CREATED = 3
+    SHADOW_GROUP_ATTACHED = 4
+    ORIGINAL_GROUP_DRAINED = 5
+    ORIGINAL_GROUP_DETACHED = 6
+    ORIGINAL_GROUP_DELETED = 7
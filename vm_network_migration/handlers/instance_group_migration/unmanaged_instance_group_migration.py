@@ -19,11 +19,18 @@ Ihe Google API python client module is imported to manage the GCP Compute Engine
  resources.
 """
 
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    ThreadPoolExecutor,
+    wait,
+)
 from enum import IntEnum
 
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
 from vm_network_migration.module_helpers.instance_group_helper import InstanceGroupHelper
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
 from vm_network_migration.utils import initializer
 
 
@@ -32,7 +39,8 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
     def __init__(self, compute, project,
                  network_name,
                  subnetwork_name, preserve_external_ip, zone, region,
-                 instance_group_name):
+                 instance_group_name, max_parallel_instances=1,
+                 keep_disks_on_delete=False):
         """Initialize a InstanceNetworkMigration object
 
          Args:
@@ -44,6 +52,11 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
            zone: zone of a zonal instance group
            region: region of regional instance group
            instance_group_name: name
+           max_parallel_instances: maximum number of instances which are
+           migrated at the same time. The compute engine API client should be
+           built with utils.build_thread_safe_compute if it is more than 1.
+           keep_disks_on_delete: whether to delete the instances with their
+           disks kept, instead of stopping them and detaching the disks
         """
         super(UnmanagedInstanceGroupMigration, self).__init__()
         self.instance_group = self.build_instance_group()
@@ -70,10 +83,79 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
         instance_group = instance_group_helper.build_instance_group()
         return instance_group
 
+    def migrate_an_instance(self, instance_selfLink):
+        """ Migrate an instance of the instance group. If the instance
+        migration fails, the instance is rolled back by its own handler.
+
+        Args:
+            instance_selfLink: selfLink of the instance
+
+        """
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             instance_selfLink,
+                                             self.network_name,
+                                             self.subnetwork_name,
+                                             self.preserve_external_ip,
+                                             options=MigrationOptions(
+                                                 keep_disks_on_delete=self.keep_disks_on_delete))
+        instance_migration_handler = selfLink_executor.build_migration_handler()
+
+        if instance_migration_handler != None:
+            self.instance_migration_handlers.append(
+                instance_migration_handler)
+            # print('Detaching the instance %s.' %(instance_selfLink))
+            # self.instance_group.remove_an_instance(instance_selfLink)
+            instance_migration_handler.network_migration(force=True)
+
+    def migrate_instances(self):
+        """ Migrate all the instances of the instance group. At most
+        self.max_parallel_instances instances are migrated at the same time.
+        After an instance fails, the instances which haven't started
+        will not be migrated.
+
+        """
+        if self.max_parallel_instances <= 1:
+            for instance_selfLink in self.instance_group.instance_selfLinks:
+                self.migrate_an_instance(instance_selfLink)
+            return
+
+        with ThreadPoolExecutor(
+                max_workers=self.max_parallel_instances) as executor:
+            futures = [executor.submit(self.migrate_an_instance,
+                                       instance_selfLink) for
+                       instance_selfLink in
+                       self.instance_group.instance_selfLinks]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+        for future in futures:
+            if not future.cancelled() and future.exception() != None:
+                raise future.exception()
+
+    def get_journal_selfLink(self):
+        """ Get the key of the instance group in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'instanceGroups',
+                              self.instance_group_name, zone=self.zone,
+                              region=self.region)
+
+    def get_journal_config(self):
+        """ Get the original config of the instance group
+
+        Returns: a dict
+
+        """
+        if self.instance_group != None:
+            return self.instance_group.original_instance_group_configs
+
     def network_migration(self):
         """ Migrate the network of an unmanaged instance group.
           The instances belonging to this instance group will
-          be migrated one by one.
+          be migrated one by one, or concurrently if
+          self.max_parallel_instances is more than 1.
           """
         self.migration_status = 0
         if self.instance_group.compare_original_network_and_target_network():
@@ -82,20 +164,7 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
                     self.instance_group_name))
             return
         self.migration_status = 1
-        for instance_selfLink in self.instance_group.instance_selfLinks:
-            selfLink_executor = SelfLinkExecutor(self.compute,
-                                                 instance_selfLink,
-                                                 self.network_name,
-                                                 self.subnetwork_name,
-                                                 self.preserve_external_ip)
-            instance_migration_handler = selfLink_executor.build_migration_handler()
-
-            if instance_migration_handler != None:
-                self.instance_migration_handlers.append(
-                    instance_migration_handler)
-                # print('Detaching the instance %s.' %(instance_selfLink))
-                # self.instance_group.remove_an_instance(instance_selfLink)
-                instance_migration_handler.network_migration(force=True)
+        self.migrate_instances()
         self.migration_status = 2
 
         print('Deleting: %s.' % (
@@ -110,7 +179,8 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
         self.migration_status = 4
         print('Adding the instances back to the instance group: %s.' % (
             self.instance_group_name))
-        self.instance_group.add_all_instances()
+        self.instance_group.add_all_instances(
+            self.max_parallel_instances)
         self.migration_status = 5
 
     def rollback(self):
@@ -128,14 +198,17 @@ class UnmanagedInstanceGroupMigration(ComputeEngineResourceMigration):
             self.migration_status = MigrationStatus(2)
 
         if self.migration_status >= 1:
-            # Force to rollback all the instances to the original network
+            # Force to rollback all the instances to the original network.
+            # Only the instances whose migration has started have a handler,
+            # and each handler only reverts its own instance's changes.
             print('Force to rollback all the instances in the group: %s.' % (
                 self.instance_group_name))
             for instance_migration_handler in self.instance_migration_handlers:
                 instance_migration_handler.rollback()
             print('Adding all instances back to the instance group: %s.' % (
                 self.instance_group_name))
-            self.instance_group.add_all_instances()
+            self.instance_group.add_all_instances(
+                self.max_parallel_instances)
             self.migration_status = MigrationStatus(0)
 
 
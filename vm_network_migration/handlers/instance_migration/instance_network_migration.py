@@ -26,14 +26,19 @@ from vm_network_migration.modules.instance_modules.instance import (
     Instance,
     InstanceStatus,
 )
-from vm_network_migration.utils import initializer
+from vm_network_migration.modules.other_modules.resource_store import build_selfLink
+from vm_network_migration.utils import (
+    generate_timestamp_string,
+    initializer,
+)
 
 
 class InstanceNetworkMigration(ComputeEngineResourceMigration):
     @initializer
     def __init__(self, compute, project, zone, original_instance_name,
                  network_name,
-                 subnetwork_name, preserve_external_ip):
+                 subnetwork_name, preserve_external_ip,
+                 keep_disks_on_delete=False, blue_green=False):
         """ Initialization
 
         Args:
@@ -44,6 +49,15 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
           network_name: target network
           subnetwork_name: target subnetwork
           preserve_external_ip: whether to preserve instances' external IPs
+          keep_disks_on_delete: if True, the autoDelete of the disks is
+          turned off while the instance is still running, and the instance
+          is deleted without stopping it and detaching its disks
+          blue_green: if True and the instance only has a boot disk and its
+          external IP is not preserved, a replacement instance named
+          <original name>-<timestamp> is created from a snapshot of the boot
+          disk, and the original instance is deleted after the replacement
+          is RUNNING. An instance which is a member of an instance group or
+          a target pool is not replaced.
         """
         super(InstanceNetworkMigration, self).__init__()
         self.instance = Instance(self.compute, self.project,
@@ -51,6 +65,10 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
                                  self.zone, self.network_name,
                                  self.subnetwork_name,
                                  preserve_instance_ip=self.preserve_external_ip)
+        # The replacement instance in the blue/green mode, and the name of
+        # its boot disk's snapshot, which is the same as the instance name
+        self.replacement_instance_name = None
+        self.replacement_instance = None
         self.migration_status = MigrationStatus(0)
 
     def get_instance_selfLink(self):
@@ -62,6 +80,138 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
         if self.instance != None:
             return self.instance.selfLink
 
+    def get_journal_selfLink(self):
+        """ Get the key of the instance in the journal
+
+        Returns: canonical selfLink
+
+        """
+        return build_selfLink(self.project, 'instances',
+                              self.original_instance_name, zone=self.zone)
+
+    def get_journal_config(self):
+        """ Get the original config of the instance
+
+        Returns: a dict
+
+        """
+        if self.instance != None:
+            return self.instance.original_instance_configs
+
+    def get_journal_state(self) -> dict:
+        """ Get the disks which have been changed, so that a resumed
+        rollback only restores them
+
+        Returns: a JSON serializable dict
+
+        """
+        if self.instance == None:
+            return {}
+        return {
+            'keep_disks_on_delete': self.keep_disks_on_delete,
+            'replacement_instance_name': self.replacement_instance_name,
+            'detached_device_names': self.instance.detached_device_names,
+            'auto_delete_disabled_device_names':
+                self.instance.auto_delete_disabled_device_names
+        }
+
+    def reconcile_migration_status(self, journaled_status):
+        """ Compare the journaled status with the live instance, since
+        the process may have stopped between an operation and its record.
+        The disks which have been detached, or whose autoDelete has been
+        turned off, are also found from the live instance.
+
+        Args:
+            journaled_status: the last MigrationStatus in the journal
+
+        Returns: the MigrationStatus which matches the live instance
+
+        """
+        if self.instance.get_instance_status() == InstanceStatus.NOTEXISTS:
+            if self.replacement_instance_name != None and \
+                    journaled_status >= MigrationStatus.REPLACEMENT_RUNNING:
+                # The replacement instance has taken over
+                return MigrationStatus.NEW_CREATED
+            # The original instance has been deleted, and the new one
+            # hasn't been created
+            return MigrationStatus.ORIGINAL_DELETED
+        live_instance_configs = self.instance.retrieve_instance_configs()
+        if self.instance.is_using_target_subnet(live_instance_configs):
+            return MigrationStatus.NEW_CREATED
+        # The disk operations which finished are found from the live disks
+        live_disks = {disk['deviceName']: disk for disk in
+                      live_instance_configs.get('disks', [])}
+        original_disks = \
+            self.instance.original_instance_configs.get('disks', [])
+        self.instance.detached_device_names = [
+            disk['deviceName'] for disk in original_disks if
+            disk['deviceName'] not in live_disks]
+        self.instance.auto_delete_disabled_device_names = [
+            disk['deviceName'] for disk in original_disks if
+            disk.get('autoDelete') and disk['deviceName'] in live_disks and
+            not live_disks[disk['deviceName']].get('autoDelete')]
+        if self.replacement_instance_name != None and \
+                journaled_status == MigrationStatus.NEW_CREATED:
+            # The original instance wasn't deleted after the replacement
+            # instance became RUNNING
+            return MigrationStatus.REPLACEMENT_RUNNING
+        if journaled_status == MigrationStatus.ORIGINAL_DELETED or \
+                journaled_status == MigrationStatus.NEW_CREATED:
+            # The deletion didn't finish, so the original instance is
+            # still there
+            if self.keep_disks_on_delete:
+                return MigrationStatus.DISK_AUTO_DELETE_DISABLED
+            return MigrationStatus.DISK_DETACHED
+        if journaled_status == MigrationStatus.MIGRATING and len(
+                self.instance.detached_device_names) > 0:
+            return MigrationStatus.DISK_DETACHED
+        return journaled_status
+
+    def resume(self, journal_entry):
+        """ Resume an interrupted migration of the instance. The journaled
+        status is reconciled with the live instance. A finished migration is
+        kept. Otherwise, the instance is rolled back from the exact step
+        where the migration stopped, and then migrated again.
+
+        Args:
+            journal_entry: the entry of the instance loaded from the journal
+
+        """
+        if journal_entry['config'] != None:
+            # The instance is restored to its original config, not to the
+            # live one which may have been changed
+            self.instance.original_instance_configs = journal_entry['config']
+            self.instance.address_object = self.instance.get_address()
+            self.instance.new_instance_configs = \
+                self.instance.get_new_instance_configs()
+            self.instance.original_status = InstanceStatus(
+                journal_entry['config']['status'])
+        state = journal_entry['state']
+        self.keep_disks_on_delete = state.get('keep_disks_on_delete',
+                                              self.keep_disks_on_delete)
+        self.replacement_instance_name = state.get(
+            'replacement_instance_name')
+        self.instance.detached_device_names = state.get(
+            'detached_device_names', [])
+        self.instance.auto_delete_disabled_device_names = state.get(
+            'auto_delete_disabled_device_names', [])
+        self.migration_status = self.reconcile_migration_status(
+            MigrationStatus(journal_entry['status']))
+        if self.migration_status == MigrationStatus.NEW_CREATED:
+            print('The VM %s has been migrated in a previous run.' % (
+                self.original_instance_name))
+            return
+        if self.migration_status > 0:
+            print('Resuming the interrupted migration of %s from %s.' % (
+                self.original_instance_name, self.migration_status.name))
+            try:
+                self.rollback()
+            except Exception as e:
+                warnings.warn(str(e), Warning)
+                raise RollbackError(
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
+        self.network_migration()
+
     def network_migration(self, force=False):
         """ Migrate the instance
         """
@@ -79,19 +229,41 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
                 'Or you can try to migrate its referrer directly.' % (
                     self.original_instance_name, ','.join(referrer_links)))
 
+        if self.blue_green:
+            # The replacement instance has a new name, so the instance groups
+            # and the target pools would keep referring to the deleted one
+            member_of = referrer_links + \
+                        self.instance.get_target_pool_selfLinks()
+            if len(member_of) > 0:
+                print('The VM %s is a member of (%s). It is migrated without '
+                      'the blue/green mode, which renames the VM.' % (
+                          self.original_instance_name, ','.join(member_of)))
+            elif self.instance.is_replaceable():
+                self.blue_green_migration()
+                return
+            else:
+                print('The VM %s has disks other than its boot disk, or its '
+                      'external IP is preserved. It is migrated without the '
+                      'blue/green mode.' % (self.original_instance_name))
+
         try:
             print('Checking the external IP address of %s.' % (
                 self.original_instance_name))
             self.instance.address_object.preserve_ip_addresses_handler(
                 self.preserve_external_ip)
             self.migration_status = MigrationStatus(1)
-            print('Stopping: %s.' % (self.original_instance_name))
-            self.instance.stop_instance()
-            self.migration_status = MigrationStatus(2)
+            if self.keep_disks_on_delete:
+                print('Turning off autoDelete of the disks.')
+                self.instance.disable_disks_auto_delete()
+                self.migration_status = MigrationStatus(6)
+            else:
+                print('Stopping: %s.' % (self.original_instance_name))
+                self.instance.stop_instance()
+                self.migration_status = MigrationStatus(2)
 
-            print('Detaching the disks.')
-            self.instance.detach_disks()
-            self.migration_status = MigrationStatus(3)
+                print('Detaching the disks.')
+                self.instance.detach_disks()
+                self.migration_status = MigrationStatus(3)
 
             print('Deleting: %s.' % (self.original_instance_name))
             self.instance.delete_instance()
@@ -112,26 +284,122 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
             except Exception as e:
                 warnings.warn(str(e), Warning)
                 raise RollbackError(
-                    'Rollback failed. You may lose your original resource. Please refer \'backup.log\' file.')
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
+            raise MigrationFailed('Rollback to the original instance %s.' % (
+                self.original_instance_name))
+
+    def get_replacement_instance_name(self) -> str:
+        """ Generate the name of the replacement instance in the blue/green
+        mode. An instance name has at most 63 characters.
+
+        Returns: the original name with a timestamp suffix
+        """
+        timestamp = generate_timestamp_string()
+        return '%s-%s' % (
+            self.original_instance_name[:62 - len(timestamp)], timestamp)
+
+    def blue_green_migration(self):
+        """ Replace the instance with a new instance in the target subnet.
+        The boot disk's snapshot is taken while the original instance is
+        running, and the original instance is only deleted after the
+        replacement instance is RUNNING.
+        """
+        self.replacement_instance_name = self.get_replacement_instance_name()
+        try:
+            self.migration_status = MigrationStatus(1)
+            print('Creating a snapshot of the boot disk of %s.' % (
+                self.original_instance_name))
+            snapshot_selfLink = self.instance.create_boot_disk_snapshot(
+                self.replacement_instance_name)
+            self.migration_status = MigrationStatus(7)
+
+            print('Creating the replacement VM in the target subnet: %s.' % (
+                self.replacement_instance_name))
+            self.instance.create_instance(
+                self.instance.get_replacement_instance_configs(
+                    self.replacement_instance_name, snapshot_selfLink))
+            self.migration_status = MigrationStatus(8)
+            if not self.get_replacement_instance().wait_for_instance_status(
+                    InstanceStatus.RUNNING):
+                raise MigrationFailed(
+                    'The replacement VM %s is not RUNNING.' % (
+                        self.replacement_instance_name))
+
+            print('Deleting: %s.' % (self.original_instance_name))
+            self.instance.delete_instance()
+            self.migration_status = MigrationStatus(5)
+            print('The VM %s is replaced by %s.' % (
+                self.original_instance_name, self.replacement_instance_name))
+
+        except Exception as e:
+            warnings.warn(str(e), Warning)
+            print('Rolling back to the original resource.')
+            try:
+                self.rollback()
+            except Exception as e:
+                warnings.warn(str(e), Warning)
+                raise RollbackError(
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
             raise MigrationFailed('Rollback to the original instance %s.' % (
                 self.original_instance_name))
 
+        try:
+            self.instance.delete_snapshot(self.replacement_instance_name)
+        except Exception as e:
+            warnings.warn('Unable to delete the snapshot %s: %s' % (
+                self.replacement_instance_name, e), Warning)
+
+    def get_replacement_instance(self):
+        """ Get the replacement instance in the blue/green mode
+
+        Returns: an Instance object
+        """
+        if self.replacement_instance == None:
+            self.replacement_instance = Instance(self.compute, self.project,
+                                                 self.replacement_instance_name,
+                                                 self.zone, self.network_name,
+                                                 self.subnetwork_name)
+        return self.replacement_instance
+
     def rollback(self):
-        """ Rollback to the original VM. Reattach the disks to the
-        original instance and restart it.
+        """ Rollback to the original VM. Reattach the disks (or restore their
+        autoDelete flags) to the original instance and restart it.
         """
         warnings.warn(
             'Rolling back: %s.' % (
                 self.original_instance_name),
             Warning)
+        if self.migration_status == 8:
+            print('Deleting the replacement VM: %s.' % (
+                self.replacement_instance_name))
+            self.get_replacement_instance().delete_instance()
+            self.migration_status = MigrationStatus(7)
+
+        if self.migration_status == 7:
+            print('Deleting the snapshot: %s.' % (
+                self.replacement_instance_name))
+            self.instance.delete_snapshot(self.replacement_instance_name)
+            self.migration_status = MigrationStatus(1)
+
+        if self.migration_status == 5 and \
+                self.replacement_instance_name != None:
+            raise RollbackError(
+                'The VM %s has been replaced by %s, and its boot disk has '
+                'been deleted.' % (self.original_instance_name,
+                                   self.replacement_instance_name))
+
         if self.migration_status == 5:
             # The migration has been finished, but force to rollback
-            print(
-                'Stopping: %s.' % (
-                    self.original_instance_name))
-            self.instance.stop_instance()
-            print('Detaching the disks.')
-            self.instance.detach_disks()
+            if self.keep_disks_on_delete:
+                print('Turning off autoDelete of the disks.')
+                self.instance.disable_disks_auto_delete()
+            else:
+                print(
+                    'Stopping: %s.' % (
+                        self.original_instance_name))
+                self.instance.stop_instance()
+                print('Detaching the disks.')
+                self.instance.detach_disks()
             print('Deleting the instance (%s) in the target subnet.' % (
                 self.original_instance_name))
             self.instance.delete_instance()
@@ -149,17 +417,20 @@ class InstanceNetworkMigration(ComputeEngineResourceMigration):
                     self.instance.original_instance_configs)
             self.migration_status = MigrationStatus(1)
 
+        if (self.migration_status == 6 or self.migration_status == 1) and \
+                len(self.instance.auto_delete_disabled_device_names) > 0:
+            # All or part of the disks have autoDelete turned off.
+            # Only the disks which have been changed are restored.
+            print('Restoring autoDelete of the disks.')
+            self.instance.restore_disks_auto_delete()
+            self.migration_status = MigrationStatus(1)
+
         if self.migration_status == 2 or self.migration_status == 3:
             # All or part of the disks have already been detached
             print('Attaching disks back to the original VM: %s.' % (
                 self.original_instance_name))
-            try:
-                self.instance.attach_disks()
-            except HttpError as e:
-                if 'already has a boot disk' in e._get_reason():
-                    pass
-                else:
-                    raise e
+            # Only the disks which have been detached are attached back
+            self.instance.attach_disks()
             self.migration_status = MigrationStatus(2)
 
         if self.migration_status > 0 \
@@ -188,3 +459,6 @@ class MigrationStatus(IntEnum):
     DISK_DETACHED = 3
     ORIGINAL_DELETED = 4
     NEW_CREATED = 5
+    DISK_AUTO_DELETE_DISABLED = 6
+    SNAPSHOT_CREATED = 7
+    REPLACEMENT_RUNNING = 8
@@ -18,6 +18,10 @@
 from vm_network_migration.utils import initializer
 from vm_network_migration.handlers.compute_engine_resource_migration import ComputeEngineResourceMigration
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 
 
 class TargetInstanceMigration(ComputeEngineResourceMigration):
@@ -44,10 +48,13 @@ class TargetInstanceMigration(ComputeEngineResourceMigration):
         Returns: url selfLink
 
         """
-        return self.compute.targetInstances().get(
-            project=self.project,
-            zone=self.zone,
-            targetInstance=self.target_instance_name).execute()['instance']
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'targetInstances',
+                           self.target_instance_name, zone=self.zone),
+            self.compute.targetInstances().get(
+                project=self.project,
+                zone=self.zone,
+                targetInstance=self.target_instance_name))['instance']
 
     def create_instance_migration_handler(self, instance_selfLink=None):
         """ Create an instance migration handler
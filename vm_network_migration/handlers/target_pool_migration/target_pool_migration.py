@@ -27,7 +27,8 @@ from vm_network_migration.utils import initializer
 class TargetPoolMigration(ComputeEngineResourceMigration):
     @initializer
     def __init__(self, compute, project, target_pool_name, network, subnetwork,
-                 preserve_instance_external_ip, region):
+                 preserve_instance_external_ip, region, batch_size=1,
+                 healthy_threshold=1):
         """ Initialization
 
         Args:
@@ -38,6 +39,11 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
             preserve_instance_external_ip: whether preserve the external IP
             of the instances serving this target pool
             region: region of the target pool
+            batch_size: the number of single instances which are detached
+            from the target pool together, with one operation, before their
+            migration, and reattached together after it
+            healthy_threshold: the number of healthy instances of the first
+            migrated backend to wait for, before migrating the other backends
         """
         super(TargetPoolMigration, self).__init__()
         self.target_pool = TargetPool(self.compute, self.project,
@@ -94,6 +100,48 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
                 else:
                     raise e
 
+    def get_batch_size(self) -> int:
+        """ Get the number of single instances which are detached together.
+        If the single instances are the only backends, at least one of them
+        keeps serving the target pool.
+
+        Returns: the batch size
+
+        """
+        batch_size = max(1, self.batch_size)
+        number_of_instances = len(self.instance_migration_handlers)
+        if len(self.instance_group_migration_handlers) == 0 and \
+                number_of_instances > 1 and batch_size >= number_of_instances:
+            warnings.warn(
+                'The batch size %d would detach all the instances of the '
+                'target pool at once. It is lowered to %d.' % (
+                    batch_size, number_of_instances - 1), Warning)
+            batch_size = number_of_instances - 1
+        return batch_size
+
+    def wait_for_first_batch_become_healthy(self, batch):
+        """ Wait for the instances of the first migrated batch being
+        healthy, with their health checked together
+
+        Args:
+            batch: a list of the instance migration handlers
+
+        Returns: True if the instances become healthy before the timeout
+
+        """
+        instance_selfLinks = [instance_migration_handler.get_instance_selfLink()
+                              for instance_migration_handler in batch]
+        print('Waiting for %d instances of %s being healthy.' % (
+            min(self.healthy_threshold, len(instance_selfLinks)),
+            self.target_pool_name))
+        if not self.target_pool.wait_for_healthy_instances(
+                lambda: instance_selfLinks, self.healthy_threshold):
+            print('Health waiting operation is timed out.')
+            return False
+        print('At least one of the backend in %s is healthy.' % (
+            self.target_pool_name))
+        return True
+
     def network_migration(self):
         """ Migrate the backends of the target pool one by one from a legacy
             network to the target subnet.
@@ -104,19 +152,25 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
             total_number_of_backend_handlers = len(
                 self.instance_migration_handlers) + len(
                 self.instance_group_migration_handlers)
-            for i in range(len(self.instance_migration_handlers)):
-                instance_migration_handler = self.instance_migration_handlers[i]
-                instance_selfLink = instance_migration_handler.get_instance_selfLink()
-                print('Detaching: %s' %(instance_migration_handler.original_instance_name))
-                self.target_pool.remove_instance(instance_selfLink)
-                print('Migrating: %s.'
-                      % (instance_migration_handler.original_instance_name))
-                instance_migration_handler.network_migration()
-                print('Reattaching the instance to the target pool')
-                self.target_pool.add_instance(instance_selfLink)
-                if i == 0 and total_number_of_backend_handlers > 1:
-                    self.target_pool.wait_for_instance_become_healthy(
-                        instance_selfLink)
+            batch_size = self.get_batch_size()
+            for i in range(0, len(self.instance_migration_handlers),
+                           batch_size):
+                batch = self.instance_migration_handlers[i:i + batch_size]
+                instance_selfLinks = [
+                    instance_migration_handler.get_instance_selfLink() for
+                    instance_migration_handler in batch]
+                for instance_migration_handler in batch:
+                    print('Detaching: %s' % (
+                        instance_migration_handler.original_instance_name))
+                self.target_pool.remove_instances(instance_selfLinks)
+                for instance_migration_handler in batch:
+                    print('Migrating: %s.'
+                          % (instance_migration_handler.original_instance_name))
+                    instance_migration_handler.network_migration()
+                print('Reattaching the instances to the target pool')
+                self.target_pool.add_instances(instance_selfLinks)
+                if i == 0 and total_number_of_backend_handlers > len(batch):
+                    self.wait_for_first_batch_become_healthy(batch)
 
             for i in range(len(self.instance_group_migration_handlers)):
                 instance_group_migration_handler = \
@@ -132,7 +186,8 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
                 if len(self.instance_migration_handlers) == 0 \
                         and i == 0 and total_number_of_backend_handlers > 1:
                     self.target_pool.wait_for_an_instance_group_become_partially_healthy(
-                        instance_group_migration_handler.instance_group)
+                        instance_group_migration_handler.instance_group,
+                        healthy_threshold=self.healthy_threshold)
 
         except Exception as e:
             warnings.warn(str(e), Warning)
@@ -144,7 +199,7 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
             except Exception as e:
                 warnings.warn(str(e), Warning)
                 raise RollbackError(
-                    'Rollback failed. You may lose your original resource. Please refer \'backup.log\' file.')
+                    'Rollback failed. You may lose your original resource. Please restore it from the backup store in the \'backup\' directory.')
             raise MigrationFailed('Rollback finished.')
 
     def rollback(self):
@@ -154,12 +209,19 @@ class TargetPoolMigration(ComputeEngineResourceMigration):
 
         """
         warnings.warn('Rolling back: %s.' % (self.target_pool_name), Warning)
-        for instance_migration_handler in self.instance_migration_handlers:
-            instance_migration_handler.rollback()
-            print('Reattaching the instance (%s) to the target pool' % (
-                instance_migration_handler.original_instance_name))
-            self.target_pool.add_instance(
-                instance_migration_handler.get_instance_selfLink())
+        instance_selfLinks = []
+        try:
+            for instance_migration_handler in self.instance_migration_handlers:
+                instance_migration_handler.rollback()
+                print('Reattaching the instance (%s) to the target pool' % (
+                    instance_migration_handler.original_instance_name))
+                instance_selfLinks.append(
+                    instance_migration_handler.get_instance_selfLink())
+        finally:
+            # All the rolled back instances are reattached together, even
+            # if the rollback of another instance fails
+            if len(instance_selfLinks) > 0:
+                self.target_pool.add_instances(instance_selfLinks)
 
         for instance_group_migration_handler in self.instance_group_migration_handlers:
             instance_group_migration_handler.rollback()
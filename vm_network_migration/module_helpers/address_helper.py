@@ -15,12 +15,14 @@
 
 """
 from vm_network_migration.modules.other_modules.address import Address
+from vm_network_migration.modules.other_modules.metadata_cache import DEFAULT_METADATA_CACHE
 from vm_network_migration.utils import initializer
 
 
 class AddressHelper:
     @initializer
-    def __init__(self, compute, project, zone, region=None):
+    def __init__(self, compute, project, zone, region=None,
+                 metadata_cache=None):
         """ Initialization
 
         Args:
@@ -28,7 +30,11 @@ class AddressHelper:
             project: project id
             zone: zone of the address
             region: region of the address
+            metadata_cache: a MetadataCache object.
+                DEFAULT_METADATA_CACHE is used if it is not specified.
         """
+        if self.metadata_cache == None:
+            self.metadata_cache = DEFAULT_METADATA_CACHE
         if self.region == None:
             self.region = self.get_region()
 
@@ -55,6 +61,5 @@ class AddressHelper:
             Raises:
                 googleapiclient.errors.HttpError: invalid request
         """
-        return self.compute.zones().get(
-            project=self.project,
-            zone=self.zone).execute()['region'].split('regions/')[1]
+        return self.metadata_cache.get_region(self.compute, self.project,
+                                             self.zone)
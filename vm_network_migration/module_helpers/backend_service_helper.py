@@ -17,6 +17,10 @@ from googleapiclient.http import HttpError
 from vm_network_migration.errors import *
 from vm_network_migration.modules.backend_service_modules.external_global_backend_service import ExternalBackendService
 from vm_network_migration.modules.backend_service_modules.internal_regional_backend_service import InternalBackendService
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import initializer
 from vm_network_migration.modules.backend_service_modules.internal_self_managed_global_backend_service import InternalSelfManagedBackendService
 
@@ -95,10 +99,13 @@ class BackendServiceHelper:
         Returns: configs
 
         """
-        return self.compute.regionBackendServices().get(
-            project=self.project,
-            region=self.region,
-            backendService=self.backend_service_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'backendServices',
+                           self.backend_service_name, region=self.region),
+            self.compute.regionBackendServices().get(
+                project=self.project,
+                region=self.region,
+                backendService=self.backend_service_name))
 
     def get_global_backend_service_config(self):
         """ Get global backend service configs
@@ -106,6 +113,9 @@ class BackendServiceHelper:
         Returns: configs
 
         """
-        return self.compute.backendServices().get(
-            project=self.project,
-            backendService=self.backend_service_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'backendServices',
+                           self.backend_service_name),
+            self.compute.backendServices().get(
+                project=self.project,
+                backendService=self.backend_service_name))
@@ -20,6 +20,10 @@ from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule import
 from vm_network_migration.modules.forwarding_rule_modules.external_global_forwarding_rule import ExternalGlobalForwardingRule
 from vm_network_migration.modules.forwarding_rule_modules.internal_regional_forwarding_rule import InternalRegionalForwardingRule
 from vm_network_migration.modules.forwarding_rule_modules.internal_self_managed_global_forwarding_rule import InternalSelfManagedGlobalForwardingRule
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import initializer
 
 
@@ -112,10 +116,13 @@ class ForwardingRuleHelper:
         Returns: configs
 
         """
-        return self.compute.forwardingRules().get(
-            project=self.project,
-            region=self.region,
-            forwardingRule=self.forwarding_rule_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'forwardingRules',
+                           self.forwarding_rule_name, region=self.region),
+            self.compute.forwardingRules().get(
+                project=self.project,
+                region=self.region,
+                forwardingRule=self.forwarding_rule_name))
 
     def get_global_forwarding_rule_configs(self):
         """ Get the configs of a global forwarding rule
@@ -123,9 +130,12 @@ class ForwardingRuleHelper:
         Returns: configs
 
         """
-        return self.compute.globalForwardingRules().get(
-            project=self.project,
-            forwardingRule=self.forwarding_rule_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'forwardingRules',
+                           self.forwarding_rule_name),
+            self.compute.globalForwardingRules().get(
+                project=self.project,
+                forwardingRule=self.forwarding_rule_name))
 
     def get_load_balancing_schema(self) -> str:
         """ Get the load balancing schema
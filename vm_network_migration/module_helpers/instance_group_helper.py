@@ -18,6 +18,10 @@ from vm_network_migration.modules.instance_group_modules.regional_managed_instan
 from vm_network_migration.modules.instance_group_modules.unmanaged_instance_group import UnmanagedInstanceGroup
 from vm_network_migration.modules.instance_group_modules.zonal_managed_instance_group import ZonalManagedInstanceGroup
 from vm_network_migration.modules.instance_group_modules.instance_group import InstanceGroup
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import initializer
 
 
@@ -81,10 +85,13 @@ class InstanceGroupHelper:
         Returns: instance group's configurations
 
         """
-        return self.compute.instanceGroups().get(
-            project=self.project,
-            zone=self.zone,
-            instanceGroup=self.instance_group_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'instanceGroups',
+                           self.instance_group_name, zone=self.zone),
+            self.compute.instanceGroups().get(
+                project=self.project,
+                zone=self.zone,
+                instanceGroup=self.instance_group_name))
 
     def get_instance_group_in_region(self) -> dict:
         """ Get a regional instance group's configurations
@@ -92,7 +99,10 @@ class InstanceGroupHelper:
         Returns: instance group's configurations
 
         """
-        return self.compute.regionInstanceGroups().get(
-            project=self.project,
-            region=self.region,
-            instanceGroup=self.instance_group_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'instanceGroups',
+                           self.instance_group_name, region=self.region),
+            self.compute.regionInstanceGroups().get(
+                project=self.project,
+                region=self.region,
+                instanceGroup=self.instance_group_name))
@@ -13,13 +13,15 @@
 # limitations under the License.
 """ Helper class for creating a SubnetNetwork object
 """
+from vm_network_migration.modules.other_modules.metadata_cache import DEFAULT_METADATA_CACHE
 from vm_network_migration.modules.other_modules.subnet_network import SubnetNetwork
 from vm_network_migration.utils import initializer
 
 
 class SubnetNetworkHelper:
     @initializer
-    def __init__(self, compute, project, zone, region=None, only_check_network_info=False):
+    def __init__(self, compute, project, zone, region=None, only_check_network_info=False,
+                 metadata_cache=None):
         """ Initialization
 
         Args:
@@ -28,7 +30,11 @@ class SubnetNetworkHelper:
             zone: zone of the network
             region: region of the network
             only_check_network_info: only check network information, subnetwork is ignored
+            metadata_cache: a MetadataCache object.
+                DEFAULT_METADATA_CACHE is used if it is not specified.
         """
+        if self.metadata_cache == None:
+            self.metadata_cache = DEFAULT_METADATA_CACHE
         if self.region == None and not self.only_check_network_info:
             self.region = self.get_region()
 
@@ -43,7 +49,8 @@ class SubnetNetworkHelper:
 
         """
         network = SubnetNetwork(self.compute, self.project, self.zone,
-                                self.region, network, subnetwork, self.only_check_network_info)
+                                self.region, network, subnetwork, self.only_check_network_info,
+                                self.metadata_cache)
         network.subnetwork_validation()
         network.generate_new_network_info()
 
@@ -54,6 +61,5 @@ class SubnetNetworkHelper:
 
             Returns: region name
         """
-        return self.compute.zones().get(
-            project=self.project,
-            zone=self.zone).execute()['region'].split('regions/')[1]
+        return self.metadata_cache.get_region(self.compute, self.project,
+                                             self.zone)
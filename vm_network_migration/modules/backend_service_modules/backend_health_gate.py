@@ -0,0 +1,176 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" BackendHealthGate class: decides whether the backends (instance groups)
+of a backend service are healthy enough to carry on with the migration.
+
+A backend passes the gate when both a percentage and a count of its
+instances are HEALTHY. The health of many backends is checked with one batch
+request. Whenever a backend passes or fails the gate, compared with its last
+check, a health-transition event is sent to the listeners, so that a
+scheduler can start the next backend as soon as one becomes healthy, instead
+of sleeping for a fixed time.
+"""
+import threading
+import time
+
+from googleapiclient.http import HttpError
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+from vm_network_migration.modules.other_modules.resource_store import canonical_selfLink
+
+# The getHealth errors of the backends which haven't been added to the
+# backend service yet, or whose instance groups are being recreated
+HEALTH_CHECK_TOLERATED_REASONS = ('not found', 'not a backend', 'not in')
+
+
+class BackendHealthGate:
+    def __init__(self, backend_service, healthy_percent=None,
+                 healthy_count=None, timeout=300):
+        """ Initialization
+
+        Args:
+            backend_service: a BackendService object
+            healthy_percent: the percentage of the instances of a backend
+            which must be healthy, such as 50. No percentage is required if
+            it is None.
+            healthy_count: the number of the instances of a backend which
+            must be healthy. It is lowered to the number of instances if the
+            backend has fewer. One healthy instance is required if it is None.
+            timeout: maximum seconds to wait for a backend being healthy
+        """
+        self.backend_service = backend_service
+        self.healthy_percent = healthy_percent
+        self.healthy_count = healthy_count
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # canonical selfLink -> whether the backend passed its last check
+        self.states = {}
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """ Subscribe to the health-transition events
+
+        Args:
+            listener: a function which takes the selfLink of a backend and
+            whether it is healthy now
+
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def is_healthy_enough(self, health_status) -> bool:
+        """ Check whether the instances of a backend pass the gate
+
+        Args:
+            health_status: the 'healthStatus' list of a getHealth response
+
+        Returns: True/False
+
+        """
+        number_of_instances = len(health_status)
+        number_of_healthy_instances = len(
+            [instance_health_status for instance_health_status in
+             health_status if
+             instance_health_status.get('healthState') == 'HEALTHY'])
+        if number_of_healthy_instances == 0:
+            return False
+        healthy_count = self.healthy_count if self.healthy_count != None else 1
+        if number_of_healthy_instances < min(healthy_count,
+                                             number_of_instances):
+            return False
+        if self.healthy_percent != None and \
+                number_of_healthy_instances * 100 < \
+                self.healthy_percent * number_of_instances:
+            return False
+        return True
+
+    def check(self, backend_selfLinks) -> dict:
+        """ Check the health of some backends with batch requests, and send
+        the health-transition events
+
+        Args:
+            backend_selfLinks: a list of the selfLinks of the backends
+
+        Returns: a dict which maps each selfLink to True if the backend
+        passes the gate. A backend which can't be checked because it isn't
+        found or isn't a backend of the backend service yet doesn't pass.
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        requests = {}
+        for backend_selfLink in backend_selfLinks:
+            requests[backend_selfLink] = \
+                self.backend_service.get_health_request(backend_selfLink)
+        responses, errors = BatchDiscovery(
+            self.backend_service.compute).execute(requests)
+        for error in errors.values():
+            if isinstance(error, HttpError) and any(
+                    tolerated_reason in error._get_reason().lower() for
+                    tolerated_reason in HEALTH_CHECK_TOLERATED_REASONS):
+                continue
+            raise error
+        results = {}
+        transitions = []
+        with self.lock:
+            for backend_selfLink in backend_selfLinks:
+                healthy = self.is_healthy_enough(
+                    responses.get(backend_selfLink, {}).get('healthStatus',
+                                                            []))
+                results[backend_selfLink] = healthy
+                key = canonical_selfLink(backend_selfLink)
+                if self.states.get(key) != healthy:
+                    self.states[key] = healthy
+                    transitions.append((backend_selfLink, healthy))
+            listeners = list(self.listeners)
+        for backend_selfLink, healthy in transitions:
+            for listener in listeners:
+                listener(backend_selfLink, healthy)
+        return results
+
+    def wait_for_backends(self, backend_selfLinks, timeout=None) -> bool:
+        """ Wait until all the backends pass the gate. Only the backends
+        which haven't passed are checked again. The delay between two rounds
+        grows while no more backends pass, and is reset when one does.
+
+        Args:
+            backend_selfLinks: a list of the selfLinks of the backends
+            timeout: maximum waiting time. self.timeout is used if it is None.
+
+        Returns: True if all the backends pass before the timeout
+
+        """
+        timeout = timeout if timeout != None else self.timeout
+        start = time.monotonic()
+        polling_strategy = PollingStrategy()
+        delays = polling_strategy.generate_delays('getHealth')
+        pending = list(backend_selfLinks)
+        print('Waiting for %s being healthy with timeout %s seconds.' % (
+            ', '.join(pending), timeout))
+        while True:
+            results = self.check(pending)
+            still_pending = [backend_selfLink for backend_selfLink in pending
+                             if not results[backend_selfLink]]
+            if len(still_pending) == 0:
+                print('%s passed the health check.' % (
+                    ', '.join(backend_selfLinks)))
+                return True
+            if len(still_pending) < len(pending):
+                delays = polling_strategy.generate_delays('getHealth')
+            pending = still_pending
+            delay = next(delays)
+            if time.monotonic() - start + delay > timeout:
+                print('Health waiting operation is timed out.')
+                return False
+            time.sleep(delay)
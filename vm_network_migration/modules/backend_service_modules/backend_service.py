@@ -14,9 +14,10 @@
 
 """ BackendService class: describe a backend service.
 """
-import logging
 from datetime import datetime
 import time
+from vm_network_migration.modules.other_modules.backup_store import DEFAULT_BACKUP_STORE
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
 from vm_network_migration.utils import initializer
 
 
@@ -37,17 +38,32 @@ class BackendService(object):
         self.operations = None
 
     def log(self):
-        logging.basicConfig(filename='backup.log', level=logging.INFO)
-        logging.info(
-            '-------Backend Service: %s-----' % (self.backend_service_name))
-        logging.info(self.backend_service_configs)
-        logging.info('--------------------------')
+        """ Back up the original config of the backend service
+
+        """
+        if self.backend_service_configs != None:
+            DEFAULT_BACKUP_STORE.backup(
+                self.backend_service_configs['selfLink'],
+                self.backend_service_configs)
 
     def get_backend_service_configs(self):
         """ Get the config of the backend service
         """
         pass
 
+    def prefetch_backends(self):
+        """ Fetch the configs of all the backends (instance groups) with
+        batch requests, so that building their migration handlers doesn't
+        send a GET request for each backend.
+
+        """
+        if self.backend_service_configs == None or \
+                'backends' not in self.backend_service_configs:
+            return
+        BatchDiscovery(self.compute).get_resources(
+            [backend['group'] for backend in
+             self.backend_service_configs['backends']])
+
     def get_connecting_forwarding_rule_list(self):
         """ Get a list of the forwarding rule which serves this backend service
         """
@@ -80,13 +96,24 @@ class BackendService(object):
         """
         return True
 
+    def get_health_request(self, backend_selfLink):
+        """ Build the getHealth request of a backend
+
+        Args:
+            backend_selfLink: url selfLink of the backends (just an instance group)
+
+        Returns: an HttpRequest object
+
+        """
+        pass
+
     def wait_for_backend_become_healthy(self, backend_selfLink, TIME_OUT = 300):
         """ Wait for backend being healthy
 
         Args:
             backend_selfLink: url selfLink of the backends (just an instance group)
             TIME_OUT: maximum waiting time
-        Returns:
+        Returns: True if the backend becomes healthy before the timeout
 
         """
         start = datetime.now()
@@ -96,5 +123,6 @@ class BackendService(object):
             current_time = datetime.now()
             if (current_time-start).seconds > TIME_OUT:
                 print('Health waiting operation is timed out.')
-                return
-        print('At least one of the instances in %s is healthy.' %(backend_selfLink))
\ No newline at end of file
+                return False
+        print('At least one of the instances in %s is healthy.' %(backend_selfLink))
+        return True
\ No newline at end of file
@@ -14,12 +14,23 @@
 """GlobalBackendService: describes a global backend service.
 
 """
+import threading
 from copy import deepcopy
 
+from googleapiclient.http import HttpError
 from vm_network_migration.modules.backend_service_modules.backend_service import BackendService
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import DEFAULT_FORWARDING_RULE_INDEX
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import instance_group_links_is_equal
 
+# The number of times a patch is sent while the backend service keeps
+# changing between reading its fingerprint and patching it
+MAX_PATCH_ATTEMPTS = 5
+
 
 class GlobalBackendService(BackendService):
     def __init__(self, compute, project, backend_service_name, network,
@@ -40,8 +51,16 @@ class GlobalBackendService(BackendService):
                                                    network, subnetwork,
                                                    preserve_instance_external_ip)
         self.backend_service_configs = self.get_backend_service_configs()
+        # The last-known config and fingerprint, which are updated by each
+        # patch, so that the patches don't read the config again
+        self.current_config = deepcopy(self.backend_service_configs)
+        self.fingerprint = self.current_config['fingerprint']
         self.operations = Operations(self.compute, self.project)
         self.preserve_instance_external_ip = preserve_instance_external_ip
+        # Serializes the updates of the backends which are based on the
+        # current config, so that concurrent updates don't overwrite
+        # each other
+        self.lock = threading.Lock()
         self.log()
 
     def get_backend_service_configs(self) -> dict:
@@ -54,7 +73,86 @@ class GlobalBackendService(BackendService):
             'project': self.project,
             'backendService': self.backend_service_name
         }
-        return self.compute.backendServices().get(**args).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'backendServices',
+                           self.backend_service_name),
+            self.compute.backendServices().get(**args))
+
+    def refresh_current_config(self):
+        """ Re-read the config of the backend service, and update the
+        last-known fingerprint and backends from it
+
+        """
+        DEFAULT_RESOURCE_STORE.invalidate(
+            build_selfLink(self.project, 'backendServices',
+                           self.backend_service_name))
+        self.current_config = deepcopy(self.get_backend_service_configs())
+        self.fingerprint = self.current_config['fingerprint']
+
+    def patch_backends(self, update_backends_function) -> dict:
+        """ Patch the backends of the backend service. Only the backends and
+        the fingerprint are sent, unless all the backends are removed, which
+        needs an update with the whole config. The last-known fingerprint
+        and backends are kept on the object, so no GET request is sent
+        before a patch. If the backend service has been changed since then,
+        the patch fails with 412, the config is re-read, and the patch is
+        retried.
+
+        Args:
+            update_backends_function: a function which takes the list of
+            the current backends and returns the new list of backends
+
+        Returns: a deserialized python object of the response
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request, or the
+            backend service keeps changing during MAX_PATCH_ATTEMPTS attempts
+        """
+        with self.lock:
+            for attempt in range(MAX_PATCH_ATTEMPTS):
+                backends = update_backends_function(
+                    deepcopy(self.current_config.get('backends', [])))
+                if len(backends) == 0:
+                    # An empty list in a patch doesn't clear the backends,
+                    # so the whole config is updated instead
+                    body = deepcopy(self.current_config)
+                    body['backends'] = []
+                    body['fingerprint'] = self.fingerprint
+                    args = {
+                        'project': self.project,
+                        'backendService': self.backend_service_name,
+                        'body': body
+                    }
+                    request = self.compute.backendServices().update(**args)
+                else:
+                    args = {
+                        'project': self.project,
+                        'backendService': self.backend_service_name,
+                        'body': {
+                            'backends': backends,
+                            'fingerprint': self.fingerprint
+                        }
+                    }
+                    request = self.compute.backendServices().patch(**args)
+                try:
+                    patch_backends_operation = request.execute()
+                except HttpError as e:
+                    if e.resp.status != 412 or \
+                            attempt == MAX_PATCH_ATTEMPTS - 1:
+                        raise e
+                    # The backend service has been changed since its
+                    # fingerprint was last known
+                    self.refresh_current_config()
+                    continue
+                self.current_config['backends'] = backends
+                # The fingerprint changes with every write. If the response
+                # doesn't carry the new one, the next patch fails with 412
+                # and re-reads it.
+                self.fingerprint = patch_backends_operation.get(
+                    'fingerprint', self.fingerprint)
+                self.operations.wait_for_global_operation(
+                    patch_backends_operation['name'])
+                return patch_backends_operation
 
     def detach_a_backend(self, backend_selfLink) -> dict:
         """ Detach a backend from the backend service
@@ -65,24 +163,12 @@ class GlobalBackendService(BackendService):
         Returns: a deserialized Python object of the response
 
         """
-        updated_backend_service = deepcopy(self.backend_service_configs)
-        updated_backend_service['fingerprint'] = self.get_current_fingerprint()
-        updated_backend_service['backends'] = [v for v in
-                                               updated_backend_service[
-                                                   'backends'] if
-                                               not instance_group_links_is_equal(
-                                                   v['group'],
-                                                   backend_selfLink)]
-        args = {
-            'project': self.project,
-            'backendService': self.backend_service_name,
-            'body': updated_backend_service
-        }
-        detach_a_backend_operation = self.compute.backendServices().update(
-            **args).execute()
-
-        self.operations.wait_for_global_operation(
-            detach_a_backend_operation['name'])
+        detach_a_backend_operation = self.patch_backends(
+            lambda backends: [v for v in
+                              deepcopy(self.backend_service_configs.get(
+                                  'backends', [])) if
+                              not instance_group_links_is_equal(
+                                  v['group'], backend_selfLink)])
         print('Instance group %s has been detached.' % (backend_selfLink))
         return detach_a_backend_operation
 
@@ -94,19 +180,86 @@ class GlobalBackendService(BackendService):
         Returns: a deserialized python object of the response
 
         """
-        self.backend_service_configs[
-            'fingerprint'] = self.get_current_fingerprint()
-        args = {
-            'project': self.project,
-            'backendService': self.backend_service_name,
-            'body': self.backend_service_configs
-        }
-        revert_backends_operation = self.compute.backendServices().update(
-            **args).execute()
-        self.operations.wait_for_global_operation(
-            revert_backends_operation['name'])
+        return self.patch_backends(
+            lambda backends: deepcopy(
+                self.backend_service_configs.get('backends', [])))
+
+    def update_current_backends(self, update_backends_function) -> dict:
+        """ Update the backends of the current config of the backend service,
+        instead of its original config
+
+        Args:
+            update_backends_function: a function which takes the list of
+            the current backends and returns the new list of backends
+
+        Returns: a deserialized python object of the response
+
+        """
+        return self.patch_backends(update_backends_function)
+
+    def add_a_backend(self, backend_configs) -> dict:
+        """ Add a backend to the current backends of the backend service
+
+        Args:
+            backend_configs: the config of the backend
+
+        Returns: a deserialized python object of the response
+
+        """
+        return self.update_current_backends(
+            lambda backends: [v for v in backends if
+                              not instance_group_links_is_equal(
+                                  v['group'], backend_configs['group'])] + [
+                                 backend_configs])
+
+    def remove_a_backend(self, backend_selfLink) -> dict:
+        """ Remove a backend from the current backends of the backend service.
+        The other backends, including the ones added during the migration,
+        are kept.
 
-        return revert_backends_operation
+        Args:
+            backend_selfLink: selfLink of the backend (an instance group)
+
+        Returns: a deserialized python object of the response
+
+        """
+        remove_a_backend_operation = self.update_current_backends(
+            lambda backends: [v for v in backends if
+                              not instance_group_links_is_equal(
+                                  v['group'], backend_selfLink)])
+        print('Instance group %s has been detached.' % (backend_selfLink))
+        return remove_a_backend_operation
+
+    def set_backend_capacity_scaler(self, backend_selfLink,
+                                    capacity_scaler) -> dict:
+        """ Set the capacityScaler of a backend. A backend whose
+        capacityScaler is 0 doesn't receive new connections.
+
+        Args:
+            backend_selfLink: selfLink of the backend (an instance group)
+            capacity_scaler: a number between 0 and 1
+
+        Returns: a deserialized python object of the response
+
+        """
+
+        def update_backends(backends):
+            for backend in backends:
+                if instance_group_links_is_equal(backend['group'],
+                                                 backend_selfLink):
+                    backend['capacityScaler'] = capacity_scaler
+            return backends
+
+        return self.update_current_backends(update_backends)
+
+    def get_draining_timeout(self) -> int:
+        """ Get the connection draining timeout of the backend service
+
+        Returns: seconds
+
+        """
+        return self.backend_service_configs.get('connectionDraining', {}).get(
+            'drainingTimeoutSec', 0)
 
     def get_current_fingerprint(self) -> str:
         """ Get current fingerprint from the config
@@ -123,39 +276,36 @@ class GlobalBackendService(BackendService):
         Returns: a deserialized python object of the response
 
         """
-        forwarding_rule_list = []
-        backend_service_selfLink = self.backend_service_configs['selfLink']
-
-        request = self.compute.globalForwardingRules().list(
-            project=self.project)
-        while request is not None:
-            response = request.execute()
-            if 'items' not in response:
-                break
-            for forwarding_rule in response['items']:
-                if 'backendService' in forwarding_rule and forwarding_rule[
-                    'backendService'] == backend_service_selfLink:
-                    forwarding_rule_list.append(forwarding_rule)
-            request = self.compute.globalForwardingRules().list_next(
-                previous_request=request,
-                previous_response=response)
-        return forwarding_rule_list
+        return DEFAULT_FORWARDING_RULE_INDEX.get_forwarding_rules(
+            self.compute, self.project,
+            self.backend_service_configs['selfLink'])
 
-    def check_backend_health(self, backend_selfLink) -> bool:
-        """ Check if the backends is healthy
+    def get_health_request(self, backend_selfLink):
+        """ Build the getHealth request of a backend
 
         Args:
-            backends_selfLink: url selfLink of the backends (just an instance group)
+            backend_selfLink: url selfLink of the backends (just an instance group)
 
-        Returns:
+        Returns: an HttpRequest object
 
         """
-        operation = self.compute.backendServices().getHealth(
+        return self.compute.backendServices().getHealth(
             project=self.project,
             backendService=self.backend_service_name,
             body={
                 "group": backend_selfLink
-            }).execute()
+            })
+
+    def check_backend_health(self, backend_selfLink) -> bool:
+        """ Check if the backends is healthy
+
+        Args:
+            backends_selfLink: url selfLink of the backends (just an instance group)
+
+        Returns:
+
+        """
+        operation = self.get_health_request(backend_selfLink).execute()
         if 'healthStatus' not in operation:
             return False
         else:
@@ -20,7 +20,12 @@ from copy import deepcopy
 from googleapiclient.http import HttpError
 from vm_network_migration.module_helpers.subnet_network_helper import SubnetNetworkHelper
 from vm_network_migration.modules.backend_service_modules.backend_service import BackendService
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import DEFAULT_FORWARDING_RULE_INDEX
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 
 
 class RegionalBackendService(BackendService):
@@ -56,10 +61,13 @@ class RegionalBackendService(BackendService):
         Returns: a deserialized python object of the response
 
         """
-        return self.compute.regionBackendServices().get(
-            project=self.project,
-            region=self.region,
-            backendService=self.backend_service_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'backendServices',
+                           self.backend_service_name, region=self.region),
+            self.compute.regionBackendServices().get(
+                project=self.project,
+                region=self.region,
+                backendService=self.backend_service_name))
 
     def build_network_object(self):
         """ Build network object
@@ -154,41 +162,37 @@ class RegionalBackendService(BackendService):
         Returns: a deserialized python object of the response
 
         """
-        forwarding_rule_list = []
-        backend_service_selfLink = self.backend_service_configs['selfLink']
-
-        request = self.compute.forwardingRules().list(project=self.project,
-                                                      region=self.region)
-        while request is not None:
-            response = request.execute()
-            if 'items' not in response:
-                break
-            for forwarding_rule in response['items']:
-                if 'backendService' in forwarding_rule and forwarding_rule[
-                    'backendService'] == backend_service_selfLink:
-                    forwarding_rule_list.append(forwarding_rule)
-
-            request = self.compute.forwardingRules().list_next(
-                previous_request=request,
-                previous_response=response)
-        return forwarding_rule_list
+        return DEFAULT_FORWARDING_RULE_INDEX.get_forwarding_rules(
+            self.compute, self.project,
+            self.backend_service_configs['selfLink'], self.region)
 
-    def check_backend_health(self, backend_selfLink) -> bool:
-        """ Check if the backends is healthy
+    def get_health_request(self, backend_selfLink):
+        """ Build the getHealth request of a backend
 
         Args:
-            backends_selfLink: url selfLink of the backends (just an instance group)
+            backend_selfLink: url selfLink of the backends (just an instance group)
 
-        Returns:
+        Returns: an HttpRequest object
 
         """
-        operation = self.compute.regionBackendServices().getHealth(
+        return self.compute.regionBackendServices().getHealth(
             project=self.project,
             region=self.region,
             backendService=self.backend_service_name,
             body={
                 "group": backend_selfLink
-            }).execute()
+            })
+
+    def check_backend_health(self, backend_selfLink) -> bool:
+        """ Check if the backends is healthy
+
+        Args:
+            backends_selfLink: url selfLink of the backends (just an instance group)
+
+        Returns:
+
+        """
+        operation = self.get_health_request(backend_selfLink).execute()
         if 'healthStatus' not in operation or operation[
             'healthStatus'] != 'HEALTHY':
             return False
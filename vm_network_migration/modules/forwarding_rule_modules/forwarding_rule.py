@@ -14,10 +14,14 @@
 """  ForwardingRule class: describes a forwarding rule
 
 """
-import logging
 from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.backup_store import DEFAULT_BACKUP_STORE
 from vm_network_migration.utils import *
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 
 
 class ForwardingRule(object):
@@ -39,16 +43,13 @@ class ForwardingRule(object):
         self.backends_selfLinks = None
 
     def log(self):
-        """ Log the configuration
-
-        Returns:
+        """ Back up the original config of the forwarding rule
 
         """
-        logging.basicConfig(filename='backup.log', level=logging.INFO)
-        logging.info(
-            '-------Forwarding Rule: %s-----' % (self.forwarding_rule_name))
-        logging.info(self.forwarding_rule_configs)
-        logging.info('--------------------------')
+        if self.forwarding_rule_configs != None:
+            DEFAULT_BACKUP_STORE.backup(
+                self.forwarding_rule_configs['selfLink'],
+                self.forwarding_rule_configs)
 
     def get_forwarding_rule_configs(self):
         """ Get the configs of a forwarding rule
@@ -151,14 +152,18 @@ class ForwardingRule(object):
                                                   self.network, self.subnetwork)
             urlMap_name = target_proxy_configs['urlMap'].split('/')[-1]
             if self_link_executor.region == None:
-                urlMap_configs = self.compute.urlMaps().get(
-                    project=self.project,
-                    urlMap=urlMap_name).execute()
+                urlMap_configs = DEFAULT_RESOURCE_STORE.get(
+                    url_selfLink,
+                    self.compute.urlMaps().get(
+                        project=self.project,
+                        urlMap=urlMap_name))
             else:
-                urlMap_configs = self.compute.regionUrlMaps().get(
-                    project=self.project,
-                    urlMap=urlMap_name,
-                    region=self_link_executor.region).execute()
+                urlMap_configs = DEFAULT_RESOURCE_STORE.get(
+                    url_selfLink,
+                    self.compute.regionUrlMaps().get(
+                        project=self.project,
+                        urlMap=urlMap_name,
+                        region=self_link_executor.region))
             find_all_matching_strings_from_a_dict(urlMap_configs,
                                                   "compute/v1/projects/",
                                                   backend_services_selfLinks)
@@ -0,0 +1,189 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" ForwardingRuleIndex class: finds the forwarding rules which serve
+a backend service, without listing all the forwarding rules of the project
+for each backend service.
+
+The first lookups of a project send a list request with a server-side
+filter on the backendService field, which only returns the matching
+forwarding rules. Once a project has been looked up FILTERED_LOOKUPS times,
+a reverse index from each backend service to its forwarding rules is built
+with one aggregatedList call (plus one list call for the global forwarding
+rules), and the later lookups are answered from memory.
+
+The backend service modules share DEFAULT_FORWARDING_RULE_INDEX. The index
+of a project is dropped when a forwarding rule of the project is inserted
+or deleted, and all the indexes are dropped at the start of each migration
+run (see handler_helper.migration_run).
+"""
+import threading
+
+from vm_network_migration.modules.other_modules.resource_store import canonical_selfLink
+
+# The number of lookups of a project which are answered with a filtered list
+# request before the index of the project is built
+FILTERED_LOOKUPS = 1
+
+
+class ForwardingRuleIndex:
+    def __init__(self, filtered_lookups=FILTERED_LOOKUPS):
+        """ Initialize a ForwardingRuleIndex object
+
+        Args:
+            filtered_lookups: the number of lookups of a project which are
+            answered with a filtered list request. 0 builds the index on the
+            first lookup, and None never builds it.
+        """
+        self.filtered_lookups = filtered_lookups
+        self.lock = threading.Lock()
+        # project -> {canonical backend service selfLink: a list of the
+        # configs of the forwarding rules serving it}
+        self.indexes = {}
+        # project -> the number of filtered lookups
+        self.lookups = {}
+
+    def invalidate(self, project=None):
+        """ Drop the index of a project
+
+        Args:
+            project: project ID. All the indexes and the lookup counters
+            are dropped if it is None.
+
+        """
+        with self.lock:
+            if project == None:
+                self.indexes.clear()
+                self.lookups.clear()
+            else:
+                self.indexes.pop(project, None)
+
+    def build_index(self, compute, project) -> dict:
+        """ List all the forwarding rules of a project, and index them by
+        their backend services
+
+        Args:
+            compute: google compute engine
+            project: project ID
+
+        Returns: a dict which maps each canonical backend service selfLink
+        to the configs of its forwarding rules
+
+        """
+        index = {}
+        indexed_selfLinks = set()
+
+        def add_forwarding_rule(forwarding_rule):
+            # A forwarding rule which is listed twice is only indexed once
+            selfLink = canonical_selfLink(forwarding_rule.get('selfLink', ''))
+            if selfLink != '':
+                if selfLink in indexed_selfLinks:
+                    return
+                indexed_selfLinks.add(selfLink)
+            if 'backendService' in forwarding_rule:
+                index.setdefault(
+                    canonical_selfLink(forwarding_rule['backendService']),
+                    []).append(forwarding_rule)
+
+        request = compute.forwardingRules().aggregatedList(project=project)
+        while request is not None:
+            response = request.execute()
+            for scoped_list in response.get('items', {}).values():
+                for forwarding_rule in scoped_list.get('forwardingRules', []):
+                    add_forwarding_rule(forwarding_rule)
+            request = compute.forwardingRules().aggregatedList_next(
+                previous_request=request, previous_response=response)
+        # The global forwarding rules are listed separately, since the
+        # aggregatedList of the regional API doesn't always return a
+        # 'global' scope. The rules returned by both are deduplicated.
+        request = compute.globalForwardingRules().list(project=project)
+        while request is not None:
+            response = request.execute()
+            for forwarding_rule in response.get('items', []):
+                add_forwarding_rule(forwarding_rule)
+            request = compute.globalForwardingRules().list_next(
+                previous_request=request, previous_response=response)
+        return index
+
+    def list_with_filter(self, compute, project, backend_service_selfLink,
+                         region=None) -> list:
+        """ List the forwarding rules of a backend service with a
+        server-side filter
+
+        Args:
+            compute: google compute engine
+            project: project ID
+            backend_service_selfLink: selfLink of the backend service
+            region: region of the backend service. The global forwarding
+            rules are listed if it is None.
+
+        Returns: a list of the configs of the forwarding rules
+
+        """
+        forwarding_rule_list = []
+        backend_service_filter = 'backendService = "%s"' % (
+            backend_service_selfLink)
+        if region == None:
+            api = compute.globalForwardingRules()
+            request = api.list(project=project, filter=backend_service_filter)
+        else:
+            api = compute.forwardingRules()
+            request = api.list(project=project, region=region,
+                               filter=backend_service_filter)
+        while request is not None:
+            response = request.execute()
+            # The filter is an exact match, which is checked again in case
+            # the URLs are written in different forms
+            for forwarding_rule in response.get('items', []):
+                if canonical_selfLink(forwarding_rule.get(
+                        'backendService', '')) == canonical_selfLink(
+                    backend_service_selfLink):
+                    forwarding_rule_list.append(forwarding_rule)
+            request = api.list_next(previous_request=request,
+                                    previous_response=response)
+        return forwarding_rule_list
+
+    def get_forwarding_rules(self, compute, project,
+                             backend_service_selfLink, region=None) -> list:
+        """ Get the forwarding rules which serve a backend service
+
+        Args:
+            compute: google compute engine
+            project: project ID
+            backend_service_selfLink: selfLink of the backend service
+            region: region of the backend service, or None for a global one
+
+        Returns: a list of the configs of the forwarding rules
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        with self.lock:
+            index = self.indexes.get(project)
+            use_filter = index == None and (
+                    self.filtered_lookups == None or
+                    self.lookups.get(project, 0) < self.filtered_lookups)
+            if use_filter:
+                self.lookups[project] = self.lookups.get(project, 0) + 1
+        if use_filter:
+            return self.list_with_filter(compute, project,
+                                         backend_service_selfLink, region)
+        if index == None:
+            index = self.build_index(compute, project)
+            with self.lock:
+                self.indexes[project] = index
+        return list(index.get(canonical_selfLink(backend_service_selfLink),
+                              []))
+
+
+DEFAULT_FORWARDING_RULE_INDEX = ForwardingRuleIndex()
@@ -18,7 +18,12 @@ import warnings
 
 from googleapiclient.http import HttpError
 from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule import ForwardingRule
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import DEFAULT_FORWARDING_RULE_INDEX
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 
 
 class GlobalForwardingRule(ForwardingRule):
@@ -49,9 +54,12 @@ class GlobalForwardingRule(ForwardingRule):
         Returns: configs
 
         """
-        return self.compute.globalForwardingRules().get(
-            project=self.project,
-            forwardingRule=self.forwarding_rule_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'forwardingRules',
+                           self.forwarding_rule_name),
+            self.compute.globalForwardingRules().get(
+                project=self.project,
+                forwardingRule=self.forwarding_rule_name))
 
     def check_forwarding_rule_exists(self) -> bool:
         """ Check if the forwarding rule exists
@@ -77,6 +85,7 @@ class GlobalForwardingRule(ForwardingRule):
             forwardingRule=self.forwarding_rule_name).execute()
         self.operations.wait_for_global_operation(
             delete_forwarding_rule_operation['name'])
+        DEFAULT_FORWARDING_RULE_INDEX.invalidate(self.project)
         return delete_forwarding_rule_operation
 
     def insert_forwarding_rule(self, forwarding_rule_config):
@@ -111,4 +120,5 @@ class GlobalForwardingRule(ForwardingRule):
             self.operations.wait_for_global_operation(
                 insert_forwarding_rule_operation['name'])
 
+        DEFAULT_FORWARDING_RULE_INDEX.invalidate(self.project)
         return insert_forwarding_rule_operation
@@ -18,7 +18,12 @@ import warnings
 
 from googleapiclient.http import HttpError
 from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule import ForwardingRule
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import DEFAULT_FORWARDING_RULE_INDEX
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 
 
 class RegionalForwardingRule(ForwardingRule):
@@ -51,10 +56,13 @@ class RegionalForwardingRule(ForwardingRule):
         Returns: configs
 
         """
-        return self.compute.forwardingRules().get(
-            project=self.project,
-            region=self.region,
-            forwardingRule=self.forwarding_rule_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'forwardingRules',
+                           self.forwarding_rule_name, region=self.region),
+            self.compute.forwardingRules().get(
+                project=self.project,
+                region=self.region,
+                forwardingRule=self.forwarding_rule_name))
 
     def check_forwarding_rule_exists(self) -> bool:
         """ Check if the forwarding rule exists
@@ -81,6 +89,7 @@ class RegionalForwardingRule(ForwardingRule):
             forwardingRule=self.forwarding_rule_name).execute()
         self.operations.wait_for_region_operation(
             delete_forwarding_rule_operation['name'])
+        DEFAULT_FORWARDING_RULE_INDEX.invalidate(self.project)
         return delete_forwarding_rule_operation
 
     def insert_forwarding_rule(self, forwarding_rule_config):
@@ -116,4 +125,5 @@ class RegionalForwardingRule(ForwardingRule):
             self.operations.wait_for_region_operation(
                 insert_forwarding_rule_operation['name'])
 
+        DEFAULT_FORWARDING_RULE_INDEX.invalidate(self.project)
         return insert_forwarding_rule_operation
@@ -13,10 +13,10 @@
 # limitations under the License.
 """ Instance group class: describe an instance group
 """
-import logging
 from enum import Enum
 
 from googleapiclient.http import HttpError
+from vm_network_migration.modules.other_modules.backup_store import DEFAULT_BACKUP_STORE
 from vm_network_migration.utils import initializer
 
 
@@ -42,16 +42,13 @@ class InstanceGroup(object):
         self.selfLink = None
 
     def log(self):
-        """ Log the original configs
-
-        Returns:
+        """ Back up the original config of the instance group
 
         """
-        logging.basicConfig(filename='backup.log', level=logging.INFO)
-        logging.info(
-            '-------Instance Group: %s-----' % (self.instance_group_name))
-        logging.info(self.original_instance_group_configs)
-        logging.info('--------------------------')
+        if self.original_instance_group_configs != None:
+            DEFAULT_BACKUP_STORE.backup(
+                self.original_instance_group_configs['selfLink'],
+                self.original_instance_group_configs)
 
     def get_status(self):
         """ Get the current status of the instance group
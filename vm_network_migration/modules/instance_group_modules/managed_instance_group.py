@@ -13,8 +13,38 @@
 # limitations under the License.
 """ ManagedInstanceGroup: describes a managed instance group
 """
+import time
+from copy import deepcopy
+
 from googleapiclient.http import HttpError
+from vm_network_migration.errors import *
 from vm_network_migration.modules.instance_group_modules.instance_group import InstanceGroup
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+    canonical_selfLink,
+)
+
+# The fields of a managed instance which are fetched by default
+MANAGED_INSTANCE_FIELDS = 'instance,currentAction,version/instanceTemplate'
+# Seconds during which a snapshot of the instances' selfLinks is reused
+INSTANCES_SNAPSHOT_TTL = 30
+
+
+def build_fixed_or_percent(value) -> dict:
+    """ Build a FixedOrPercent value of an update policy
+
+    Args:
+        value: a number of instances, such as 3 or '3', or a percentage of
+        the instances, such as '20%'
+
+    Returns: {'fixed': number} or {'percent': number}
+
+    """
+    value = str(value).strip()
+    if value.endswith('%'):
+        return {'percent': int(value[:-1])}
+    return {'fixed': int(value)}
 
 
 class ManagedInstanceGroup(InstanceGroup):
@@ -50,6 +80,8 @@ class ManagedInstanceGroup(InstanceGroup):
         self.autoscaler = None
         self.autoscaler_configs = None
         self.selfLink = None
+        # (time.monotonic() when it is taken, a tuple of instances' selfLinks)
+        self.instances_snapshot = None
 
     def get_instance_group_configs(self) -> dict:
         """ Get the configs of the instance group
@@ -62,7 +94,11 @@ class ManagedInstanceGroup(InstanceGroup):
             'instanceGroupManager': self.instance_group_name
         }
         self.add_zone_or_region_into_args(args)
-        return self.instance_group_manager_api.get(**args).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'instanceGroupManagers',
+                           self.instance_group_name, zone=args.get('zone'),
+                           region=args.get('region')),
+            self.instance_group_manager_api.get(**args))
 
     def create_instance_group(self, configs) -> dict:
         """ Create an instance group
@@ -146,6 +182,214 @@ class ManagedInstanceGroup(InstanceGroup):
             'instanceTemplate'] = instance_template_link
         return instance_group_configs
 
+    def get_rolling_update_policy(self, max_surge=None,
+                                  max_unavailable=None) -> dict:
+        """ Get an update policy which proactively replaces the instances
+
+        Args:
+            max_surge: the maximum number of instances created above the
+            target size during the update, such as 3 or '20%'. The default
+            value of Compute Engine is used if it is None.
+            max_unavailable: the maximum number of instances which are
+            unavailable during the update, such as 0 or '20%'. The default
+            value of Compute Engine is used if it is None.
+
+        Returns: an updatePolicy dict
+
+        """
+        update_policy = {
+            'type': 'PROACTIVE',
+            # A new network interface can only be applied by recreating
+            # the instance
+            'minimalAction': 'REPLACE'
+        }
+        if max_surge != None:
+            update_policy['maxSurge'] = build_fixed_or_percent(max_surge)
+        if max_unavailable != None:
+            update_policy['maxUnavailable'] = build_fixed_or_percent(
+                max_unavailable)
+        return update_policy
+
+    def patch_instance_group(self, body) -> dict:
+        """ Patch the instance group manager
+
+        Args:
+            body: the fields to change
+
+        Returns: a deserialized object of the response
+
+        """
+        args = {
+            'project': self.project,
+            'instanceGroupManager': self.instance_group_name,
+            'body': body
+        }
+        self.add_zone_or_region_into_args(args)
+        patch_instance_group_operation = self.instance_group_manager_api.patch(
+            **args).execute()
+        if self.is_multi_zone:
+            self.operation.wait_for_region_operation(
+                patch_instance_group_operation['name'])
+        else:
+            self.operation.wait_for_zone_operation(
+                patch_instance_group_operation['name'])
+        return patch_instance_group_operation
+
+    def start_rolling_update(self, instance_template_link,
+                             update_policy, versions=None) -> dict:
+        """ Start replacing the instances with the ones created from an
+        instance template. The instance group and its autoscaler are kept.
+
+        Args:
+            instance_template_link: selfLink of the instance template
+            update_policy: updatePolicy of the rolling update
+            versions: the versions of the instance group. A single version
+            of the instance template is used if it is None.
+
+        Returns: a deserialized object of the response
+
+        """
+        if versions == None:
+            versions = [{
+                'instanceTemplate': instance_template_link
+            }]
+        return self.patch_instance_group({
+            'instanceTemplate': instance_template_link,
+            'versions': versions,
+            'updatePolicy': update_policy
+        })
+
+    def iter_managed_instances(self, fields=MANAGED_INSTANCE_FIELDS):
+        """ Iterate over the managed instances, one page at a time, so that
+        only a single page is held in memory
+
+        Args:
+            fields: the fields of each managed instance to fetch, such as
+            'instance,currentAction'. All the fields are fetched if it is None.
+
+        Returns: a generator of managedInstances
+
+        """
+        args = {
+            'project': self.project,
+            'instanceGroupManager': self.instance_group_name
+        }
+        self.add_zone_or_region_into_args(args)
+        if fields != None:
+            args['fields'] = 'managedInstances(%s),nextPageToken' % (fields)
+        while True:
+            response = self.instance_group_manager_api.listManagedInstances(
+                **args).execute()
+            for managed_instance in response.get('managedInstances', []):
+                yield managed_instance
+            if 'nextPageToken' not in response:
+                return
+            args['pageToken'] = response['nextPageToken']
+
+    def get_rolling_update_progress(self, instance_template_link) -> tuple:
+        """ Count the managed instances which have been replaced with the
+        ones created from an instance template
+
+        Args:
+            instance_template_link: selfLink of the instance template
+
+        Returns: (number of updated instances, number of instances)
+
+        """
+        instance_template_link = canonical_selfLink(instance_template_link)
+        number_of_updated_instances = 0
+        number_of_instances = 0
+        for managed_instance in self.iter_managed_instances():
+            number_of_instances += 1
+            if managed_instance.get('currentAction') == 'NONE' and \
+                    canonical_selfLink(managed_instance.get('version', {}).get(
+                        'instanceTemplate', '')) == instance_template_link:
+                number_of_updated_instances += 1
+        return number_of_updated_instances, number_of_instances
+
+    def wait_for_rolling_update(self, instance_template_link, timeout=3600,
+                                interval=10):
+        """ Wait until all the managed instances are created from an
+        instance template and none of them has a pending action
+
+        Args:
+            instance_template_link: selfLink of the instance template
+            timeout: maximum seconds to wait
+            interval: seconds between two checks
+
+        Raises:
+            OperationTimeoutError: the update is not done in time
+        """
+        deadline = time.monotonic() + timeout
+        last_progress = None
+        while True:
+            progress = self.get_rolling_update_progress(
+                instance_template_link)
+            if progress != last_progress:
+                print('%d of %d instances of %s are updated.' % (
+                    progress[0], progress[1], self.instance_group_name))
+                last_progress = progress
+            if progress[0] == progress[1]:
+                return
+            if time.monotonic() >= deadline:
+                raise OperationTimeoutError(
+                    'The rolling update of %s is not done after %s seconds.'
+                    % (self.instance_group_name, timeout))
+            time.sleep(interval)
+
+    def get_shadow_instance_group_configs(self, shadow_instance_group_name,
+                                          instance_template_link) -> dict:
+        """ Get the configs of a shadow instance group, which is a copy of
+        the original instance group using another instance template
+
+        Args:
+            shadow_instance_group_name: name of the shadow instance group
+            instance_template_link: selfLink of the instance template
+
+        Returns: configs of the shadow instance group
+
+        """
+        shadow_instance_group_configs = deepcopy(
+            self.original_instance_group_configs)
+        for field in ['id', 'selfLink', 'creationTimestamp', 'fingerprint',
+                      'status', 'currentActions', 'instanceGroup',
+                      'targetPools']:
+            shadow_instance_group_configs.pop(field, None)
+        shadow_instance_group_configs['name'] = shadow_instance_group_name
+        shadow_instance_group_configs['instanceTemplate'] = \
+            instance_template_link
+        shadow_instance_group_configs['versions'] = [{
+            'instanceTemplate': instance_template_link
+        }]
+        return shadow_instance_group_configs
+
+    def get_shadow_autoscaler_configs(self, shadow_instance_group_name,
+                                      shadow_instance_group_selfLink):
+        """ Get the configs of an autoscaler which scales a shadow instance
+        group in the same way as the original autoscaler
+
+        Args:
+            shadow_instance_group_name: name of the shadow instance group
+            shadow_instance_group_selfLink: selfLink of the shadow instance
+            group manager
+
+        Returns: configs of the autoscaler, or None if the original instance
+        group doesn't have an autoscaler
+
+        """
+        if self.autoscaler_configs == None:
+            return None
+        shadow_autoscaler_configs = {
+            'name': shadow_instance_group_name,
+            'target': shadow_instance_group_selfLink,
+            'autoscalingPolicy': deepcopy(
+                self.autoscaler_configs['autoscalingPolicy'])
+        }
+        if 'description' in self.autoscaler_configs:
+            shadow_autoscaler_configs['description'] = \
+                self.autoscaler_configs['description']
+        return shadow_autoscaler_configs
+
     def add_zone_or_region_into_args(self, args):
         """ Add the zone/region key into args.
 
@@ -314,22 +558,38 @@ class ManagedInstanceGroup(InstanceGroup):
             return []
         return configs['targetPools']
 
+    def iter_instances(self):
+        """ Iterate over the managed instances' selfLinks. Only the
+        'instance' field is fetched.
+
+        Returns: a generator of instances' selfLinks
+
+        """
+        for managed_instance in self.iter_managed_instances(fields='instance'):
+            if 'instance' in managed_instance:
+                yield managed_instance['instance']
+
     def list_instances(self) -> list:
         """ List managed instances' selfLinks
 
         Returns: a list of instances' selfLinks
 
         """
-        instance_selfLinks = []
-        args = {
-            'project': self.project,
-            'instanceGroupManager': self.instance_group_name,
+        return list(self.iter_instances())
 
-        }
-        self.add_zone_or_region_into_args(args)
-        list_instances_operation = self.instance_group_manager_api.listManagedInstances(
-            **args).execute()
+    def get_instances_snapshot(self, max_age=INSTANCES_SNAPSHOT_TTL) -> tuple:
+        """ Get the managed instances' selfLinks, which are listed again
+        only if the last snapshot is older than max_age. It is used by the
+        loops which poll the instances.
+
+        Args:
+            max_age: maximum seconds to reuse a snapshot
 
-        for item in list_instances_operation['managedInstances']:
-            instance_selfLinks.append(item['instance'])
-        return instance_selfLinks
+        Returns: a tuple of instances' selfLinks
+
+        """
+        if self.instances_snapshot == None or \
+                time.monotonic() - self.instances_snapshot[0] > max_age:
+            self.instances_snapshot = (time.monotonic(),
+                                       tuple(self.iter_instances()))
+        return self.instances_snapshot[1]
@@ -15,6 +15,7 @@
 UnmanagedInstanceGroup: describes an unmanaged instance group
 """
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 
 from googleapiclient.errors import HttpError
@@ -22,9 +23,17 @@ from vm_network_migration.errors import *
 from vm_network_migration.module_helpers.subnet_network_helper import SubnetNetworkHelper
 from vm_network_migration.modules.instance_group_modules.instance_group import InstanceGroup
 from vm_network_migration.modules.other_modules.subnet_network import SubnetNetwork
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import is_equal_or_contians
 
+# The maximum number of instances in a single addInstances request
+MAX_INSTANCES_PER_REQUEST = 100
+
 
 class UnmanagedInstanceGroup(InstanceGroup):
     def __init__(self, compute, project, instance_group_name, network_name,
@@ -75,12 +84,16 @@ class UnmanagedInstanceGroup(InstanceGroup):
         Returns: instance group's configurations
 
         """
-        return self.compute.instanceGroups().get(project=self.project,
-                                                 zone=self.zone,
-                                                 instanceGroup=self.instance_group_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'instanceGroups',
+                           self.instance_group_name, zone=self.zone),
+            self.compute.instanceGroups().get(project=self.project,
+                                              zone=self.zone,
+                                              instanceGroup=self.instance_group_name))
 
     def list_instances(self) -> list:
-        """Retrieve all the instances in this instance group,
+        """Retrieve all the instances in this instance group. The configs of
+        the instances are prefetched with batch requests.
 
         Returns: a list of the instances' selfLinks
 
@@ -100,6 +113,7 @@ class UnmanagedInstanceGroup(InstanceGroup):
                     instance_with_named_ports['instance'])
             request = self.compute.instanceGroups().listInstances_next(
                 previous_request=request, previous_response=response)
+        BatchDiscovery(self.compute).get_resources(instance_selfLinks)
         return instance_selfLinks
 
     def delete_instance_group(self) -> dict:
@@ -187,16 +201,66 @@ class UnmanagedInstanceGroup(InstanceGroup):
             else:
                 raise e
 
-    def add_all_instances(self):
-        """ Add all the instances in instances to the current instance group
+    def add_instances(self, instance_selfLinks):
+        """ Add many instances into the instance group with a single
+        request. If one of them is already a member, which fails the whole
+        request, the instances are added one by one instead.
+
+        Args:
+            instance_selfLinks: a list of the instances' selfLinks
+
+        Returns: a deserialized object of the response, or None if the
+        instances are added one by one
+        Raises: HttpError
 
         """
-        for instance_selfLink in self.instance_selfLinks:
-            try:
-                self.add_an_instance(instance_selfLink)
-            except HttpError:
-                raise AddInstanceToInstanceGroupError(
-                    'Failed to add all instances to the instance group.')
+        try:
+            add_instances_operation = self.compute.instanceGroups().addInstances(
+                project=self.project,
+                zone=self.zone,
+                instanceGroup=self.instance_group_name,
+                body={
+                    'instances': [{'instance': instance_selfLink} for
+                                  instance_selfLink in
+                                  instance_selfLinks]}).execute()
+            self.operation.wait_for_zone_operation(
+                add_instances_operation['name'])
+            return add_instances_operation
+        except HttpError as e:
+            if 'already a member of' not in e._get_reason():
+                raise e
+        for instance_selfLink in instance_selfLinks:
+            self.add_an_instance(instance_selfLink)
+
+    def add_all_instances(self, max_workers=1):
+        """ Add all the instances in instances to the current instance group.
+        The instances are added in chunks of MAX_INSTANCES_PER_REQUEST, one
+        chunk after another, or up to max_workers chunks at the same time.
+
+        Args:
+            max_workers: maximum number of concurrent requests. It should
+            only be more than 1 if self.compute is built with
+            utils.build_thread_safe_compute.
+
+        """
+        chunks = [self.instance_selfLinks[i:i + MAX_INSTANCES_PER_REQUEST] for
+                  i in range(0, len(self.instance_selfLinks),
+                             MAX_INSTANCES_PER_REQUEST)]
+        try:
+            if max_workers <= 1 or len(chunks) <= 1:
+                for chunk in chunks:
+                    self.add_instances(chunk)
+                return
+            with ThreadPoolExecutor(
+                    max_workers=min(max_workers, len(chunks))) as executor:
+                futures = [executor.submit(self.add_instances, chunk) for
+                           chunk in chunks]
+            for future in futures:
+                if future.exception() != None:
+                    raise future.exception()
+        except HttpError:
+            raise AddInstanceToInstanceGroupError(
+                'Failed to add all instances to the instance group.')
 
     def get_new_instance_group_configs_using_new_network(self,
                                                          instance_group_configs):
@@ -14,7 +14,7 @@
 """ Instance class: describe an instance
     InstanceStatus class: describe an instance's current status
 """
-import logging
+import time
 from copy import deepcopy
 from enum import Enum
 
@@ -22,7 +22,13 @@ from googleapiclient.errors import HttpError
 from vm_network_migration.errors import *
 from vm_network_migration.module_helpers.address_helper import AddressHelper
 from vm_network_migration.module_helpers.subnet_network_helper import SubnetNetworkHelper
+from vm_network_migration.modules.other_modules.backup_store import DEFAULT_BACKUP_STORE
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+    canonical_selfLink,
+)
 from vm_network_migration.utils import (
     initializer,
     is_equal_or_contians,
@@ -33,7 +39,7 @@ class Instance(object):
     @initializer
     def __init__(self, compute, project, name, zone, network,
                  subnetwork, preserve_instance_ip=False,
-                 instance_configs=None):
+                 instance_configs=None, metadata_cache=None):
         """ Initialize an instance object
 
         Args:
@@ -43,22 +49,35 @@ class Instance(object):
             region: region of the instance
             zone: zone of the instance
             instance_configs: the instance config
+            metadata_cache: a MetadataCache object which is shared by the
+            helpers. DEFAULT_METADATA_CACHE is used if it is not specified.
         """
 
         self.original_instance_configs = instance_configs or self.retrieve_instance_configs()
         self.network_object = self.get_network()
         self.address_object = self.get_address()
         self.new_instance_configs = self.get_new_instance_configs()
-        self.original_status = self.get_instance_status()
+        if 'status' in self.original_instance_configs:
+            self.original_status = InstanceStatus(
+                self.original_instance_configs['status'])
+        else:
+            self.original_status = self.get_instance_status()
         self.operations = Operations(compute, project, zone)
         self.selfLink = self.get_selfLink(self.original_instance_configs)
+        # deviceNames of the disks which have been detached from the instance
+        self.detached_device_names = []
+        # deviceNames of the disks whose autoDelete has been turned off
+        self.auto_delete_disabled_device_names = []
         self.log()
 
     def log(self):
-        logging.basicConfig(filename='backup.log', level=logging.INFO)
-        logging.info('-------Instance: %s-----' % (self.name))
-        logging.info(self.original_instance_configs)
-        logging.info('--------------------------')
+        """ Back up the original config of the instance
+
+        """
+        if self.original_instance_configs != None:
+            DEFAULT_BACKUP_STORE.backup(
+                self.original_instance_configs['selfLink'],
+                self.original_instance_configs)
 
     def retrieve_instance_configs(self) -> dict:
         """ Get the instance config.
@@ -69,13 +88,24 @@ class Instance(object):
         Raises:
             googleapiclient.errors.HttpError: invalid request
         """
-        instance_configs = self.compute.instances().get(
-            project=self.project,
-            zone=self.zone,
-            instance=self.name).execute()
+        instance_configs = DEFAULT_RESOURCE_STORE.get(
+            self.get_instance_store_selfLink(),
+            self.compute.instances().get(
+                project=self.project,
+                zone=self.zone,
+                instance=self.name))
 
         return instance_configs
 
+    def get_instance_store_selfLink(self) -> str:
+        """ Get the key of the instance in the resource store
+
+        Returns: the canonical selfLink of the instance
+
+        """
+        return build_selfLink(self.project, 'instances', self.name,
+                              zone=self.zone)
+
     def get_address(self):
         """ Generate the address object
 
@@ -85,7 +115,8 @@ class Instance(object):
         if self.original_instance_configs == None:
             self.original_instance_configs = self.retrieve_instance_configs()
         address_factory = AddressHelper(self.compute, self.project,
-                                        self.zone)
+                                        self.zone,
+                                        metadata_cache=self.metadata_cache)
         address = address_factory.generate_address(
             self.original_instance_configs)
         return address
@@ -97,7 +128,8 @@ class Instance(object):
 
         """
         subnetwork_factory = SubnetNetworkHelper(self.compute, self.project,
-                                                 self.zone)
+                                                 self.zone,
+                                                 metadata_cache=self.metadata_cache)
         network = subnetwork_factory.generate_network(
             self.network,
             self.subnetwork)
@@ -174,23 +206,44 @@ class Instance(object):
             googleapiclient.errors.HttpError: invalid request
         """
 
-        detach_disk_operation = self.compute.instances().detachDisk(
+        detach_disk_operation = self.start_detaching_disk(disk)
+        self.operations.wait_for_zone_operation(detach_disk_operation['name'])
+        self.detached_device_names.append(disk)
+        return detach_disk_operation
+
+    def start_detaching_disk(self, disk) -> dict:
+        """ Send the request to detach a disk without waiting for it
+
+        Args:
+            disk: name of the disk
+
+        Returns:
+            a deserialized object of the response
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        return self.compute.instances().detachDisk(
             project=self.project,
             zone=self.zone,
             instance=self.name,
             deviceName=disk).execute()
-        self.operations.wait_for_zone_operation(detach_disk_operation['name'])
-        return detach_disk_operation
 
     def detach_disks(self):
-        """ Detach all the disks retrieved from self.instance_configs
+        """ Detach all the disks retrieved from self.instance_configs.
+        All the detach requests are sent at once and then waited together.
 
         Returns: None
 
+        Raises:
+            DiskOperationsError: some of the disks failed to be detached
         """
         disks = self.get_disks_info_from_instance_configs()
-        for diskInfo in disks:
-            self.detach_disk(diskInfo['deviceName'])
+        device_names = [diskInfo['deviceName'] for diskInfo in disks if
+                        diskInfo['deviceName'] not in
+                        self.detached_device_names]
+        self.run_disk_operations(device_names, self.start_detaching_disk,
+                                 'detach', self.detached_device_names.append)
 
     def attach_disk(self, diskInfo):
         """Attach a disk to the instance
@@ -204,23 +257,160 @@ class Instance(object):
         Raises:
             googleapiclient.errors.HttpError: invalid request
         """
-        attach_disk_operation = self.compute.instances().attachDisk(
+        attach_disk_operation = self.start_attaching_disk(diskInfo)
+        self.operations.wait_for_zone_operation(attach_disk_operation['name'])
+        if diskInfo['deviceName'] in self.detached_device_names:
+            self.detached_device_names.remove(diskInfo['deviceName'])
+        return attach_disk_operation
+
+    def start_attaching_disk(self, diskInfo) -> dict:
+        """ Send the request to attach a disk without waiting for it
+
+        Args:
+            disk: deserialized info of the disk
+
+        Returns:
+            a deserialized object of the response
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        return self.compute.instances().attachDisk(
             project=self.project,
             zone=self.zone,
             instance=self.name,
             forceAttach=True,
             body=diskInfo).execute()
-        self.operations.wait_for_zone_operation(attach_disk_operation['name'])
-        return attach_disk_operation
 
     def attach_disks(self):
-        """ Attach all the disks retrieved from self.instance_configs
+        """ Attach all the disks which have been detached from the instance.
+        The boot disk is attached first, and then all the other disks are
+        attached at once.
 
         Returns: None
+
+        Raises:
+            DiskOperationsError: some of the disks failed to be attached
         """
-        disks = self.get_disks_info_from_instance_configs()
-        for diskInfo in disks:
-            self.attach_disk(diskInfo)
+        disks = [diskInfo for diskInfo in
+                 self.get_disks_info_from_instance_configs() if
+                 diskInfo['deviceName'] in self.detached_device_names]
+        disk_info_by_device_name = {diskInfo['deviceName']: diskInfo for
+                                    diskInfo in disks}
+        boot_device_names = [diskInfo['deviceName'] for diskInfo in disks if
+                             diskInfo.get('boot', False)]
+        other_device_names = [diskInfo['deviceName'] for diskInfo in disks if
+                              not diskInfo.get('boot', False)]
+        for device_names in [boot_device_names, other_device_names]:
+            self.run_disk_operations(
+                device_names,
+                lambda device_name: self.start_attaching_disk(
+                    disk_info_by_device_name[device_name]),
+                'attach', self.detached_device_names.remove)
+
+    def start_setting_disk_auto_delete(self, disk, auto_delete) -> dict:
+        """ Send the request to set the autoDelete flag of a disk
+        without waiting for it
+
+        Args:
+            disk: deviceName of the disk
+            auto_delete: whether the disk is deleted with the instance
+
+        Returns:
+            a deserialized object of the response
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        return self.compute.instances().setDiskAutoDelete(
+            project=self.project,
+            zone=self.zone,
+            instance=self.name,
+            deviceName=disk,
+            autoDelete=auto_delete).execute()
+
+    def disable_disks_auto_delete(self):
+        """ Turn off autoDelete of all the disks, so that the disks are kept
+        after the instance is deleted. All the requests are sent at once
+        and then waited together.
+
+        Returns: None
+
+        Raises:
+            DiskOperationsError: some of the disks failed to be updated
+        """
+        device_names = [diskInfo['deviceName'] for diskInfo in
+                        self.get_disks_info_from_instance_configs() if
+                        diskInfo.get('autoDelete', False) and
+                        diskInfo['deviceName'] not in
+                        self.auto_delete_disabled_device_names]
+        self.run_disk_operations(
+            device_names,
+            lambda device_name: self.start_setting_disk_auto_delete(
+                device_name, False),
+            'disable autoDelete of',
+            self.auto_delete_disabled_device_names.append)
+
+    def restore_disks_auto_delete(self):
+        """ Turn autoDelete back on for the disks which were changed by
+        disable_disks_auto_delete()
+
+        Returns: None
+
+        Raises:
+            DiskOperationsError: some of the disks failed to be updated
+        """
+        self.run_disk_operations(
+            list(self.auto_delete_disabled_device_names),
+            lambda device_name: self.start_setting_disk_auto_delete(
+                device_name, True),
+            'restore autoDelete of',
+            self.auto_delete_disabled_device_names.remove)
+
+    def run_disk_operations(self, device_names, start_disk_operation,
+                            action, record_success):
+        """ Start a disk operation for each disk at once, and then wait for
+        all of them.
+
+        Args:
+            device_names: deviceNames of the disks
+            start_disk_operation: a function which takes a deviceName and
+                sends the request without waiting for it
+            action: description of the operation, such as 'attach'
+            record_success: a function which is called with the deviceName
+                of each disk which succeeded
+
+        Raises:
+            DiskOperationsError: some of the disks failed. The error message
+            lists the deviceNames which succeeded and which failed.
+        """
+        errors = {}
+        operation_to_device_name = {}
+        for device_name in device_names:
+            try:
+                operation = start_disk_operation(device_name)
+            except HttpError as e:
+                errors[device_name] = e
+            else:
+                operation_to_device_name[operation['name']] = device_name
+
+        operation_errors = self.operations.wait_for_zone_operations(
+            list(operation_to_device_name.keys()))
+        succeeded_device_names = []
+        for operation, error in operation_errors.items():
+            device_name = operation_to_device_name[operation]
+            if error != None:
+                errors[device_name] = error
+                continue
+            succeeded_device_names.append(device_name)
+            record_success(device_name)
+
+        if len(errors) > 0:
+            raise DiskOperationsError(
+                'Failed to %s the disks of %s. Succeeded: %s. Failed: %s.' % (
+                    action, self.name, succeeded_device_names,
+                    {device_name: str(error) for device_name, error in
+                     errors.items()}))
 
     def modify_instance_configs_with_new_network(self, new_network_link,
                                                  new_subnetwork_link,
@@ -320,6 +510,10 @@ class Instance(object):
             body=instance_configs).execute()
         self.operations.wait_for_zone_operation(
             create_instance_operation['name'])
+        # The new instance is created with all of its disks attached,
+        # and with their original autoDelete flags
+        self.detached_device_names = []
+        self.auto_delete_disabled_device_names = []
         return create_instance_operation
 
     def delete_instance(self) -> dict:
@@ -340,11 +534,13 @@ class Instance(object):
         return delete_instance_operation
 
     def get_instance_status(self):
-        """ Get current instance's status.
+        """ Get current instance's status. The status is always
+        retrieved from the API instead of the resource store.
 
         Returns: an InstanceStatus object
         Raises: HttpError for incorrect response
         """
+        DEFAULT_RESOURCE_STORE.invalidate(self.get_instance_store_selfLink())
         try:
             instance_configs = self.retrieve_instance_configs()
         except HttpError as e:
@@ -393,26 +589,168 @@ class Instance(object):
                 previous_request=request, previous_response=response)
         return referrer_selfLinks
 
+    def get_target_pool_selfLinks(self) -> list:
+        """ Get the selfLinks of the target pools which serve this instance.
+        The target pools are not returned by listReferrers.
+
+        Returns: a list of target pool selfLinks
+
+        """
+        target_pool_selfLinks = []
+        instance_selfLink = self.get_instance_store_selfLink()
+        request = self.compute.targetPools().list(
+            project=self.project,
+            region=self.zone[:self.zone.rfind('-')])
+        while request is not None:
+            response = request.execute()
+            for target_pool in response.get('items', []):
+                if any(canonical_selfLink(selfLink) == instance_selfLink for
+                       selfLink in target_pool.get('instances', [])):
+                    target_pool_selfLinks.append(target_pool['selfLink'])
+            request = self.compute.targetPools().list_next(
+                previous_request=request, previous_response=response)
+        return target_pool_selfLinks
+
     def compare_original_network_and_target_network(self):
         """ Check if the original network is the
         same as the target subnet
 
         Returns: True for the same
         """
+        return self.is_using_target_subnet(self.original_instance_configs)
+
+    def is_using_target_subnet(self, instance_configs):
+        """ Check if an instance config is using the target subnet
+
+        Args:
+            instance_configs: config of the instance
+
+        Returns: True for the target subnet
+        """
         if self.network_object == None or self.network_object.subnetwork_link == None:
             raise InvalidTargetNetworkError
 
         if 'subnetwork' not in \
-                self.original_instance_configs['networkInterfaces'][0]:
+                instance_configs['networkInterfaces'][0]:
             return False
         elif is_equal_or_contians(
-                self.original_instance_configs['networkInterfaces'][0][
+                instance_configs['networkInterfaces'][0][
                     'subnetwork'],
                 self.network_object.subnetwork_link):
             return True
         else:
             return False
 
+    def is_replaceable(self) -> bool:
+        """ Check if the instance can be replaced by a new instance created
+        from a snapshot of its boot disk. The instance should have no disks
+        other than the boot disk, and its external IP is not preserved.
+
+        Returns: True/False
+        """
+        disks = self.original_instance_configs.get('disks', [])
+        return not self.preserve_instance_ip and len(disks) == 1 and \
+               disks[0].get('boot', False) and \
+               disks[0].get('type') == 'PERSISTENT'
+
+    def get_boot_disk_name(self) -> str:
+        """ Get the name of the boot disk
+
+        Returns: disk name
+        """
+        for disk in self.get_disks_info_from_instance_configs():
+            if disk.get('boot', False):
+                return disk['source'].split('/')[-1]
+        raise AttributeNotExistError('No boot disk is attached on the VM')
+
+    def create_boot_disk_snapshot(self, snapshot_name) -> str:
+        """ Create a snapshot of the boot disk. The instance keeps running.
+
+        Args:
+            snapshot_name: name of the snapshot
+
+        Returns: the selfLink of the snapshot
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        create_snapshot_operation = self.compute.disks().createSnapshot(
+            project=self.project,
+            zone=self.zone,
+            disk=self.get_boot_disk_name(),
+            body={'name': snapshot_name}).execute()
+        self.operations.wait_for_zone_operation(
+            create_snapshot_operation['name'])
+        return build_selfLink(self.project, 'snapshots', snapshot_name)
+
+    def delete_snapshot(self, snapshot_name) -> dict:
+        """ Delete a snapshot
+
+        Args:
+            snapshot_name: name of the snapshot
+
+        Returns: a deserialized object of the response
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        delete_snapshot_operation = self.compute.snapshots().delete(
+            project=self.project,
+            snapshot=snapshot_name).execute()
+        self.operations.wait_for_global_operation(
+            delete_snapshot_operation['name'])
+        return delete_snapshot_operation
+
+    def get_replacement_instance_configs(self, name,
+                                         snapshot_selfLink) -> dict:
+        """ Generate the config of a replacement instance in the target
+        subnet, whose boot disk is created from a snapshot
+
+        Args:
+            name: name of the replacement instance
+            snapshot_selfLink: selfLink of the boot disk's snapshot
+
+        Returns: the instance config
+        """
+        replacement_instance_configs = deepcopy(self.new_instance_configs)
+        replacement_instance_configs['name'] = name
+        boot_disk = self.get_disks_info_from_instance_configs()[0]
+        boot_disk_configs = self.compute.disks().get(
+            project=self.project,
+            zone=self.zone,
+            disk=self.get_boot_disk_name()).execute()
+        replacement_instance_configs['disks'] = [{
+            'boot': True,
+            'autoDelete': boot_disk.get('autoDelete', True),
+            'deviceName': boot_disk['deviceName'],
+            'mode': boot_disk.get('mode', 'READ_WRITE'),
+            'initializeParams': {
+                'sourceSnapshot': snapshot_selfLink,
+                'diskType': boot_disk_configs['type'],
+                'diskSizeGb': boot_disk_configs['sizeGb']
+            }
+        }]
+        return replacement_instance_configs
+
+    def wait_for_instance_status(self, status, timeout=300,
+                                 interval=5) -> bool:
+        """ Wait until the instance has a status
+
+        Args:
+            status: an InstanceStatus object
+            timeout: maximum seconds to wait
+            interval: seconds between two checks
+
+        Returns: True if the instance has the status in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.get_instance_status() == status:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+
 
 class InstanceStatus(Enum):
     """
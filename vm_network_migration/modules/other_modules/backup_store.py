@@ -0,0 +1,182 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" BackupStore class: keeps the original configs of the resources which
+the tool touches, so that they can be recreated by hand if a rollback fails.
+
+Each backup is a gzip-compressed JSON record appended to a data file, and an
+index file maps each canonical selfLink to the timestamps, offsets and
+lengths of its records. The index is loaded once, so restoring a config reads
+a single record, no matter how large the store is. A record which is the
+same as the previous backup of the resource is not written again.
+
+The modules back up their configs into DEFAULT_BACKUP_STORE, which creates
+its directory on the first backup.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from vm_network_migration.modules.other_modules.resource_store import canonical_selfLink
+
+DEFAULT_BACKUP_DIRECTORY = 'backup'
+DATA_FILE_NAME = 'backups.dat'
+INDEX_FILE_NAME = 'index.jsonl'
+
+
+class BackupStore:
+    def __init__(self, directory=DEFAULT_BACKUP_DIRECTORY):
+        """ Initialize a BackupStore object
+
+        Args:
+            directory: the directory of the data file and the index file
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        # canonical selfLink -> a list of index entries in the order of time.
+        # An index entry is a dict of 'timestamp', 'offset', 'length' and
+        # 'digest'. It is None until the index is loaded.
+        self.index = None
+
+    def open(self, directory):
+        """ Use another directory
+
+        Args:
+            directory: the directory of the data file and the index file
+
+        """
+        with self.lock:
+            self.directory = directory
+            self.index = None
+
+    def get_data_file_path(self) -> str:
+        """ Get the path of the data file
+
+        Returns: file path
+
+        """
+        return os.path.join(self.directory, DATA_FILE_NAME)
+
+    def get_index_file_path(self) -> str:
+        """ Get the path of the index file
+
+        Returns: file path
+
+        """
+        return os.path.join(self.directory, INDEX_FILE_NAME)
+
+    def load_index(self):
+        """ Load the index file into memory. The entries which point beyond
+        the end of the data file, left by a crash while writing, are ignored.
+        It should be called with the lock held.
+
+        """
+        self.index = {}
+        if not os.path.exists(self.get_index_file_path()):
+            return
+        data_file_size = os.path.getsize(self.get_data_file_path()) \
+            if os.path.exists(self.get_data_file_path()) else 0
+        with open(self.get_index_file_path()) as index_file:
+            for line in index_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['offset'] + entry['length'] > data_file_size:
+                    continue
+                self.index.setdefault(entry['selfLink'], []).append(entry)
+
+    def backup(self, selfLink, config) -> bool:
+        """ Back up the config of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+            config: a JSON serializable config
+
+        Returns: True if a new record is written, False if the config is the
+        same as the previous backup of the resource
+
+        """
+        selfLink = canonical_selfLink(selfLink)
+        serialized_config = json.dumps(config, sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(serialized_config).hexdigest()
+        record = gzip.compress(serialized_config)
+        with self.lock:
+            if self.index == None:
+                self.load_index()
+            entries = self.index.get(selfLink, [])
+            if len(entries) > 0 and entries[-1]['digest'] == digest:
+                return False
+            os.makedirs(self.directory, exist_ok=True)
+            # The record is on the disk before the index points to it
+            with open(self.get_data_file_path(), 'ab') as data_file:
+                offset = data_file.tell()
+                data_file.write(record)
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            entry = {'selfLink': selfLink, 'timestamp': time.time(),
+                     'offset': offset, 'length': len(record),
+                     'digest': digest}
+            with open(self.get_index_file_path(), 'a') as index_file:
+                index_file.write(json.dumps(entry, sort_keys=True) + '\n')
+                index_file.flush()
+                os.fsync(index_file.fileno())
+            self.index.setdefault(selfLink, []).append(entry)
+        return True
+
+    def list_backups(self, selfLink) -> list:
+        """ List the timestamps of the backups of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+
+        Returns: a list of UNIX timestamps, from the oldest to the newest
+
+        """
+        with self.lock:
+            if self.index == None:
+                self.load_index()
+            return [entry['timestamp'] for entry in
+                    self.index.get(canonical_selfLink(selfLink), [])]
+
+    def restore(self, selfLink, timestamp=None):
+        """ Load a backed up config of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+            timestamp: a UNIX timestamp. The latest backup taken at or before
+            it is loaded. The latest backup is loaded if it is None.
+
+        Returns: the config, or None if there is no such backup
+
+        """
+        with self.lock:
+            if self.index == None:
+                self.load_index()
+            entries = self.index.get(canonical_selfLink(selfLink), [])
+            if timestamp != None:
+                entries = [entry for entry in entries if
+                           entry['timestamp'] <= timestamp]
+            if len(entries) == 0:
+                return None
+            entry = entries[-1]
+            with open(self.get_data_file_path(), 'rb') as data_file:
+                data_file.seek(entry['offset'])
+                record = data_file.read(entry['length'])
+        return json.loads(gzip.decompress(record).decode('utf-8'))
+
+
+DEFAULT_BACKUP_STORE = BackupStore()
@@ -0,0 +1,196 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" BatchDiscovery class: fetches the configs and the referrers of many
+resources with batch requests.
+
+Each batch request carries up to MAX_BATCH_SIZE calls in one round trip.
+The fetched configs are put into DEFAULT_RESOURCE_STORE, so the Instance and
+InstanceGroup objects which are built afterwards don't send their own GET
+requests.
+"""
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    canonical_selfLink,
+)
+from vm_network_migration.utils import initializer
+
+# The maximum number of calls in a single batch request
+MAX_BATCH_SIZE = 100
+
+# resource type in the selfLink -> (compute engine API, name argument)
+ZONAL_APIS = {
+    'instances': ('instances', 'instance'),
+    'instanceGroups': ('instanceGroups', 'instanceGroup'),
+    'instanceGroupManagers': ('instanceGroupManagers', 'instanceGroupManager'),
+    'targetInstances': ('targetInstances', 'targetInstance'),
+}
+REGIONAL_APIS = {
+    'instanceGroups': ('regionInstanceGroups', 'instanceGroup'),
+    'instanceGroupManagers': ('regionInstanceGroupManagers',
+                              'instanceGroupManager'),
+    'targetPools': ('targetPools', 'targetPool'),
+    'forwardingRules': ('forwardingRules', 'forwardingRule'),
+    'backendServices': ('regionBackendServices', 'backendService'),
+    'urlMaps': ('regionUrlMaps', 'urlMap'),
+    'targetHttpProxies': ('regionTargetHttpProxies', 'targetHttpProxy'),
+    'targetHttpsProxies': ('regionTargetHttpsProxies', 'targetHttpsProxy'),
+}
+GLOBAL_APIS = {
+    'forwardingRules': ('globalForwardingRules', 'forwardingRule'),
+    'backendServices': ('backendServices', 'backendService'),
+    'urlMaps': ('urlMaps', 'urlMap'),
+    'targetHttpProxies': ('targetHttpProxies', 'targetHttpProxy'),
+    'targetHttpsProxies': ('targetHttpsProxies', 'targetHttpsProxy'),
+    'targetTcpProxies': ('targetTcpProxies', 'targetTcpProxy'),
+    'targetSslProxies': ('targetSslProxies', 'targetSslProxy'),
+    'targetGrpcProxies': ('targetGrpcProxies', 'targetGrpcProxy'),
+}
+
+
+class BatchDiscovery:
+    @initializer
+    def __init__(self, compute, batch_size=MAX_BATCH_SIZE):
+        """ Initialize a BatchDiscovery object
+
+        Args:
+            compute: google compute engine
+            batch_size: maximum number of calls in one batch request
+        """
+        pass
+
+    def execute(self, requests) -> tuple:
+        """ Execute the requests with as few batch requests as possible
+
+        Args:
+            requests: a dict which maps a key to an HttpRequest object
+
+        Returns: (responses, errors). responses maps the key of each
+        succeeded request to its deserialized response, and errors maps
+        the key of each failed request to its exception.
+
+        """
+        responses = {}
+        errors = {}
+        keys = list(requests.keys())
+        for i in range(0, len(keys), self.batch_size):
+            request_id_to_key = {}
+
+            def callback(request_id, response, exception):
+                key = request_id_to_key[request_id]
+                if exception != None:
+                    errors[key] = exception
+                else:
+                    responses[key] = response
+
+            batch = self.compute.new_batch_http_request(callback=callback)
+            for j, key in enumerate(keys[i:i + self.batch_size]):
+                request_id_to_key[str(j)] = key
+                batch.add(requests[key], request_id=str(j))
+            batch.execute()
+        return responses, errors
+
+    def build_get_request(self, selfLink):
+        """ Build the request to get a resource from its selfLink
+
+        Args:
+            selfLink: selfLink of a resource whose type is in
+                ZONAL_APIS, REGIONAL_APIS or GLOBAL_APIS
+
+        Returns: an HttpRequest object, or None if the resource type is
+        not supported
+
+        """
+        fields = canonical_selfLink(selfLink).split('/')
+        args = {'project': fields[1]}
+        if len(fields) == 6 and fields[2] == 'zones':
+            args['zone'] = fields[3]
+            apis = ZONAL_APIS
+        elif len(fields) == 6 and fields[2] == 'regions':
+            args['region'] = fields[3]
+            apis = REGIONAL_APIS
+        elif len(fields) == 5 and fields[2] == 'global':
+            apis = GLOBAL_APIS
+        else:
+            return None
+        resource_type, name = fields[-2], fields[-1]
+        if resource_type not in apis:
+            return None
+        api_name, name_argument = apis[resource_type]
+        args[name_argument] = name
+        return getattr(self.compute, api_name)().get(**args)
+
+    def get_resources(self, selfLinks) -> tuple:
+        """ Get the configs of many resources. The configs are also put into
+        the resource store.
+
+        Args:
+            selfLinks: a list of selfLinks
+
+        Returns: (configs, errors). configs maps the selfLink of each found
+        resource to its config, and errors maps the selfLink of each failed
+        resource to its exception.
+
+        """
+        requests = {}
+        for selfLink in selfLinks:
+            request = self.build_get_request(selfLink)
+            if request != None:
+                requests[selfLink] = request
+        configs, errors = self.execute(requests)
+        for selfLink, config in configs.items():
+            DEFAULT_RESOURCE_STORE.put(selfLink, config)
+        return configs, errors
+
+    def list_referrers(self, instance_selfLinks) -> tuple:
+        """ Get the selfLinks of the instance groups which many instances
+        are members of. The result pages of all the instances are fetched
+        together, so the number of round trips doesn't grow with the number
+        of instances.
+
+        Args:
+            instance_selfLinks: a list of instance selfLinks
+
+        Returns: (referrers, errors). referrers maps each instance selfLink
+        to a list of instance group selfLinks, and errors maps the selfLink
+        of each failed instance to its exception.
+
+        """
+        referrers = {selfLink: [] for selfLink in instance_selfLinks}
+        errors = {}
+        page_tokens = {selfLink: None for selfLink in instance_selfLinks}
+        while len(page_tokens) > 0:
+            requests = {}
+            for selfLink, page_token in page_tokens.items():
+                fields = canonical_selfLink(selfLink).split('/')
+                args = {
+                    'project': fields[1],
+                    'zone': fields[3],
+                    'instance': fields[5]
+                }
+                if page_token != None:
+                    args['pageToken'] = page_token
+                requests[selfLink] = self.compute.instances().listReferrers(
+                    **args)
+            responses, page_errors = self.execute(requests)
+            errors.update(page_errors)
+            page_tokens = {}
+            for selfLink, response in responses.items():
+                for reference in response.get('items', []):
+                    if 'MEMBER_OF' in reference['referenceType']:
+                        referrers[selfLink].append(reference['referrer'])
+                if 'nextPageToken' in response:
+                    page_tokens[selfLink] = response['nextPageToken']
+        for selfLink in errors:
+            referrers.pop(selfLink, None)
+        return referrers, errors
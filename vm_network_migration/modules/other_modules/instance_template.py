@@ -17,6 +17,10 @@
 """
 from copy import deepcopy
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import *
 from vm_network_migration.module_helpers.subnet_network_helper import SubnetNetworkHelper
 from vm_network_migration.errors import *
@@ -53,8 +57,11 @@ class InstanceTemplate:
         Returns: a deserialized object of the response
 
         """
-        return self.compute.instanceTemplates().get(project=self.project,
-                                                    instanceTemplate=self.instance_template_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'instanceTemplates',
+                           self.instance_template_name),
+            self.compute.instanceTemplates().get(project=self.project,
+                                                 instanceTemplate=self.instance_template_name))
 
     def get_network(self) -> SubnetNetwork:
         """ Generate the network object
@@ -0,0 +1,152 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" MetadataCache class: memoizes the metadata which doesn't change during
+a migration run, such as the region of a zone, the target network's config
+and the subnetwork links.
+
+All the helpers share DEFAULT_METADATA_CACHE unless another cache is
+injected, so a migration run with many instances only reads each zone and
+network once. It is cleared at the start of each migration run (see
+handler_helper.migration_run).
+"""
+import threading
+import time
+
+from vm_network_migration.utils import initializer
+
+# Seconds before a cached entry expires
+DEFAULT_TTL = 600
+
+
+class MetadataCache:
+    @initializer
+    def __init__(self, ttl=DEFAULT_TTL):
+        """ Initialize a MetadataCache object
+
+        Args:
+            ttl: seconds before a cached entry expires.
+                None means the entries never expire.
+        """
+        # key -> (expiration time, value)
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """ Get a cached value, or load and cache it
+
+        Args:
+            key: a hashable cache key
+            load: a function which returns the value if it is not cached.
+                Its exceptions are raised to the caller and nothing is cached.
+
+        Returns: the value. It is shared with the other callers and should
+        not be modified.
+
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry != None and (entry[0] == None or entry[0] > now):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load()
+        expiration = None if self.ttl == None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expiration, value)
+        return value
+
+    def invalidate(self, key=None):
+        """ Remove a cached entry
+
+        Args:
+            key: the cache key. All the entries are removed, and the counters
+            are reset, if it is None.
+
+        """
+        with self.lock:
+            if key == None:
+                self.entries.clear()
+                self.hits = 0
+                self.misses = 0
+            else:
+                self.entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """ Get the hit and miss counters
+
+        Returns: a dict such as {'hits': 10, 'misses': 2}
+
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def get_region(self, compute, project, zone) -> str:
+        """ Get the region of a zone
+
+        Args:
+            compute: google compute engine
+            project: project ID
+            zone: zone name
+
+        Returns: region name
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        return self.get(('region', project, zone),
+                        lambda: compute.zones().get(
+                            project=project,
+                            zone=zone).execute()['region'].split(
+                            'regions/')[1])
+
+    def get_network(self, compute, project, network) -> dict:
+        """ Get the config of a network
+
+        Args:
+            compute: google compute engine
+            project: project ID
+            network: network name
+
+        Returns: a deserialized object of the network information
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        return self.get(('network', project, network),
+                        lambda: compute.networks().get(
+                            project=project,
+                            network=network).execute())
+
+    def get_subnetwork_link(self, project, region, network, subnetwork,
+                            find_subnetwork_link) -> str:
+        """ Get the link of a subnetwork of a network
+
+        Args:
+            project: project ID
+            region: region name
+            network: network name
+            subnetwork: subnetwork name
+            find_subnetwork_link: a function which returns the link
+
+        Returns: the subnetwork link
+
+        """
+        return self.get(('subnetwork', project, region, network, subnetwork),
+                        find_subnetwork_link)
+
+
+DEFAULT_METADATA_CACHE = MetadataCache()
@@ -0,0 +1,205 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" MigrationJournal class: a crash-safe record of the migration progress.
+
+Every state transition of a migration handler, the original config of its
+resource and the result of each migrated resource are appended to the
+journal file as JSON lines, keyed by the canonical selfLinks. Each record is
+flushed and fsync'd before the migration moves on, so the journal survives
+a crash of the process. A later run with '--resume' loads the journal to
+skip the finished resources, and to roll back the interrupted ones from the
+exact step where they stopped.
+
+The handlers write into DEFAULT_MIGRATION_JOURNAL, which doesn't write
+anything until a file is opened.
+"""
+import json
+import os
+import threading
+import time
+
+from vm_network_migration.modules.other_modules.resource_store import canonical_selfLink
+
+DEFAULT_JOURNAL_FILE = 'migration_journal.jsonl'
+
+CONFIG = 'config'
+STATUS = 'status'
+RESULT = 'result'
+
+
+class MigrationJournal:
+    def __init__(self, file_path=None):
+        """ Initialize a MigrationJournal object
+
+        Args:
+            file_path: path of the journal file. Nothing is written until
+            a file is opened if it is None.
+        """
+        self.file_path = None
+        self.journal_file = None
+        self.lock = threading.Lock()
+        # canonical selfLink -> the last status written by this process
+        self.last_statuses = {}
+        # canonical selfLinks whose config has been written by this process
+        self.recorded_configs = set()
+        if file_path != None:
+            self.open(file_path)
+
+    def open(self, file_path):
+        """ Open a journal file. The new records are appended to it.
+
+        Args:
+            file_path: path of the journal file
+
+        """
+        with self.lock:
+            if self.journal_file != None:
+                self.journal_file.close()
+            self.file_path = file_path
+            self.journal_file = open(file_path, 'a')
+            self.last_statuses = {}
+            self.recorded_configs = set()
+
+    def close(self):
+        """ Close the journal file
+
+        """
+        with self.lock:
+            if self.journal_file != None:
+                self.journal_file.close()
+            self.journal_file = None
+
+    def is_open(self) -> bool:
+        """ Check whether the journal writes records
+
+        Returns: True/False
+
+        """
+        return self.journal_file != None
+
+    def append(self, record):
+        """ Append a record, and make sure that it reaches the disk
+
+        Args:
+            record: a JSON serializable dict
+
+        """
+        line = json.dumps(record, sort_keys=True) + '\n'
+        with self.lock:
+            if self.journal_file == None:
+                return
+            self.journal_file.write(line)
+            self.journal_file.flush()
+            os.fsync(self.journal_file.fileno())
+
+    def record_config(self, selfLink, config):
+        """ Record the original config of a resource. Only the first config
+        of a resource in this run is recorded.
+
+        Args:
+            selfLink: selfLink of the resource
+            config: its original config
+
+        """
+        selfLink = canonical_selfLink(selfLink)
+        if not self.is_open() or selfLink in self.recorded_configs:
+            return
+        self.recorded_configs.add(selfLink)
+        self.append({'time': time.time(), 'event': CONFIG,
+                     'selfLink': selfLink, 'config': config})
+
+    def record_status(self, selfLink, handler, status, state=None):
+        """ Record a state transition of a migration handler. The initial
+        NOT_START status and the repeated statuses are not recorded.
+
+        Args:
+            selfLink: selfLink of the resource
+            handler: name of the migration handler class
+            status: the new MigrationStatus (or int) of the handler
+            state: a JSON serializable dict which the handler needs to
+            resume from this status
+
+        """
+        selfLink = canonical_selfLink(selfLink)
+        if not self.is_open():
+            return
+        previous_status = self.last_statuses.get(selfLink)
+        if previous_status == int(status) or (
+                previous_status == None and int(status) == 0):
+            return
+        self.last_statuses[selfLink] = int(status)
+        self.append({'time': time.time(), 'event': STATUS,
+                     'selfLink': selfLink, 'handler': handler,
+                     'status': int(status),
+                     'status_name': getattr(status, 'name', str(status)),
+                     'state': state or {}})
+
+    def record_result(self, selfLink, result, error=None):
+        """ Record the final result of a resource
+
+        Args:
+            selfLink: selfLink of the resource
+            result: such as 'SUCCEEDED' or 'FAILED'
+            error: the error message
+
+        """
+        self.append({'time': time.time(), 'event': RESULT,
+                     'selfLink': canonical_selfLink(selfLink),
+                     'result': result, 'error': error})
+
+    def load(self, file_path=None) -> dict:
+        """ Load the latest state of each resource from a journal file.
+        A broken last line, which is left by a crash while writing it,
+        is ignored.
+
+        Args:
+            file_path: path of the journal file. The opened file is loaded
+            if it is None.
+
+        Returns: a dict which maps each canonical selfLink to
+        {'config', 'handler', 'status', 'status_name', 'state', 'result'}.
+        'result' is None if the resource didn't finish after its last
+        state transition.
+
+        """
+        file_path = file_path or self.file_path
+        entries = {}
+        if file_path == None or not os.path.exists(file_path):
+            return entries
+        with open(file_path) as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                entry = entries.setdefault(record['selfLink'], {
+                    'config': None, 'handler': None, 'status': 0,
+                    'status_name': None, 'state': {}, 'result': None})
+                if record['event'] == CONFIG:
+                    # Keep the config of the first run, which is the
+                    # original one
+                    if entry['config'] == None:
+                        entry['config'] = record['config']
+                elif record['event'] == STATUS:
+                    entry['handler'] = record['handler']
+                    entry['status'] = record['status']
+                    entry['status_name'] = record['status_name']
+                    entry['state'] = record['state']
+                    entry['result'] = None
+                elif record['event'] == RESULT:
+                    entry['result'] = record['result']
+        return entries
+
+
+DEFAULT_MIGRATION_JOURNAL = MigrationJournal()
@@ -0,0 +1,332 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" OperationTracker class: tracks many pending operations in one background
+loop.
+
+Callers register the operations they are waiting for and get a future back.
+The background loop checks the status of all the due operations with one
+batch request, and resolves the futures when the operations are done, so
+the threads of a concurrent migration block on their futures instead of
+each polling its own operations.
+
+Operations uses DEFAULT_OPERATION_TRACKER while it is open. The executors
+open it with a thread-safe client for the duration of a migration run
+(see handler_helper.migration_run).
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+from vm_network_migration.modules.other_modules.resource_store import DEFAULT_RESOURCE_STORE
+from vm_network_migration.utils import (
+    build_thread_safe_compute,
+    initializer,
+)
+
+# The maximum number of calls in a single batch request
+MAX_BATCH_SIZE = 100
+# Operations which are due within this many seconds are checked together
+# with the operations which are already due
+COALESCING_WINDOW = 0.5
+
+
+class OperationTracker:
+    @initializer
+    def __init__(self, compute=None, polling_strategy=None,
+                 batch_size=MAX_BATCH_SIZE):
+        """ Initialize an OperationTracker object
+
+        Args:
+            compute: google compute engine, which is shared with the
+                background thread. It should be built with
+                utils.build_thread_safe_compute. The tracker can also be
+                opened later.
+            polling_strategy: a PollingStrategy object which decides the
+                delays between two status checks of an operation
+            batch_size: maximum number of status checks in one batch request
+        """
+        if self.polling_strategy == None:
+            self.polling_strategy = PollingStrategy()
+        # (project, zone, region, operation name) -> pending operation info
+        self.pending_operations = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.stopped = False
+
+    def open(self, credentials):
+        """ Start tracking the operations with a thread-safe client
+
+        Args:
+            credentials: google auth credentials
+
+        """
+        with self.lock:
+            self.compute = build_thread_safe_compute(credentials)
+
+    def is_open(self) -> bool:
+        """ Check whether the tracker has a client
+
+        Returns: True/False
+
+        """
+        return self.compute != None
+
+    def close(self):
+        """ Stop the background loop and drop the client. The operations
+        which are still pending fail with an OperationTimeoutError.
+
+        """
+        self.stop()
+        with self.lock:
+            self.compute = None
+            pending_operations = self.pending_operations
+            self.pending_operations = {}
+        for key, pending_operation in pending_operations.items():
+            pending_operation['future'].set_exception(OperationTimeoutError(
+                'The operation %s is no longer tracked.' % (key[-1])))
+
+    def register_zone_operation(self, operation, project, zone) -> Future:
+        """ Start tracking a zonal operation
+
+        Args:
+            operation: name of the operation
+            project: project ID
+            zone: zone of the operation
+
+        Returns: a Future which resolves to the finished operation, or raises
+        ZoneOperationsError if the operation has an error
+
+        """
+        return self.register(operation, project, zone=zone)
+
+    def register_region_operation(self, operation, project,
+                                  region) -> Future:
+        """ Start tracking a regional operation
+
+        Args:
+            operation: name of the operation
+            project: project ID
+            region: region of the operation
+
+        Returns: a Future which resolves to the finished operation, or raises
+        RegionOperationsError if the operation has an error
+
+        """
+        return self.register(operation, project, region=region)
+
+    def register_global_operation(self, operation, project) -> Future:
+        """ Start tracking a global operation
+
+        Args:
+            operation: name of the operation
+            project: project ID
+
+        Returns: a Future which resolves to the finished operation, or raises
+        RegionOperationsError if the operation has an error
+
+        """
+        return self.register(operation, project)
+
+    def register(self, operation, project, zone=None,
+                 region=None) -> Future:
+        """ Start tracking an operation. Registering the same operation twice
+        returns the same future.
+
+        Args:
+            operation: name of the operation
+            project: project ID
+            zone: zone of a zonal operation
+            region: region of a regional operation
+
+        Returns: a Future object
+
+        """
+        key = (project, zone, region, operation)
+        with self.lock:
+            if self.compute == None:
+                raise OperationTimeoutError(
+                    'The operation tracker is closed.')
+            if key not in self.pending_operations:
+                self.pending_operations[key] = {
+                    'future': Future(),
+                    'start': time.monotonic(),
+                    'next_check': time.monotonic(),
+                    'delays': None,
+                }
+            future = self.pending_operations[key]['future']
+            self.start()
+        self.wakeup.set()
+        return future
+
+    def start(self):
+        """ Start the background loop if it is not running
+
+        """
+        if self.thread == None or not self.thread.is_alive():
+            self.stopped = False
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """ Stop the background loop. The pending futures are not resolved.
+
+        """
+        with self.lock:
+            self.stopped = True
+            thread = self.thread
+            self.thread = None
+        self.wakeup.set()
+        if thread != None and thread is not threading.current_thread():
+            thread.join()
+
+    def run(self):
+        """ The background loop: check the due operations in batches, and
+        sleep until the next operation is due or a new one is registered.
+
+        """
+        while True:
+            self.wakeup.clear()
+            with self.lock:
+                if self.stopped:
+                    return
+                now = time.monotonic()
+                due_keys = [key for key, pending_operation in
+                            self.pending_operations.items() if
+                            pending_operation['next_check'] <= now
+                            + COALESCING_WINDOW]
+                timeout = None
+                if len(due_keys) == 0 and len(self.pending_operations) > 0:
+                    timeout = min(pending_operation['next_check'] for
+                                  pending_operation in
+                                  self.pending_operations.values()) - now
+            if len(due_keys) == 0:
+                self.wakeup.wait(timeout)
+                continue
+            for i in range(0, len(due_keys), self.batch_size):
+                self.check_operations(due_keys[i:i + self.batch_size])
+
+    def check_operations(self, keys):
+        """ Check the status of the operations with a single batch request
+
+        Args:
+            keys: the keys of the pending operations
+
+        """
+        request_id_to_key = {}
+
+        def callback(request_id, response, exception):
+            self.handle_response(request_id_to_key[request_id], response,
+                                 exception)
+
+        batch = self.compute.new_batch_http_request(callback=callback)
+        for i, key in enumerate(keys):
+            request_id_to_key[str(i)] = key
+            batch.add(self.build_get_request(key), request_id=str(i))
+        try:
+            batch.execute()
+        except Exception as e:
+            for key in keys:
+                self.resolve(key, exception=e)
+
+    def build_get_request(self, key):
+        """ Build the request to get an operation
+
+        Args:
+            key: the key of the pending operation
+
+        Returns: an HttpRequest object
+
+        """
+        project, zone, region, operation = key
+        if zone != None:
+            return self.compute.zoneOperations().get(project=project,
+                                                     zone=zone,
+                                                     operation=operation)
+        elif region != None:
+            return self.compute.regionOperations().get(project=project,
+                                                       region=region,
+                                                       operation=operation)
+        else:
+            return self.compute.globalOperations().get(project=project,
+                                                       operation=operation)
+
+    def handle_response(self, key, response, exception):
+        """ Resolve the future of a finished operation, or schedule
+        its next status check
+
+        Args:
+            key: the key of the pending operation
+            response: a deserialized object of the response
+            exception: googleapiclient.errors.HttpError or None
+
+        """
+        project, zone, region, operation = key
+        if exception != None:
+            self.resolve(key, exception=exception)
+        elif response['status'] == 'DONE':
+            DEFAULT_RESOURCE_STORE.invalidate_operation_target(response)
+            if 'error' not in response:
+                self.resolve(key, result=response)
+            elif zone != None:
+                self.resolve(key,
+                             exception=ZoneOperationsError(response['error']))
+            else:
+                self.resolve(key, exception=RegionOperationsError(
+                    response['error']))
+        else:
+            with self.lock:
+                pending_operation = self.pending_operations.get(key)
+                if pending_operation == None:
+                    # The tracker has been closed
+                    return
+                if pending_operation['delays'] == None:
+                    pending_operation[
+                        'delays'] = self.polling_strategy.generate_delays(
+                        response.get('operationType'))
+                delay = next(pending_operation['delays'])
+                try:
+                    self.polling_strategy.check_deadline(
+                        pending_operation['start'], delay, operation)
+                except OperationTimeoutError as e:
+                    timeout_error = e
+                else:
+                    timeout_error = None
+                    pending_operation['next_check'] = \
+                        time.monotonic() + delay
+            if timeout_error != None:
+                self.resolve(key, exception=timeout_error)
+
+    def resolve(self, key, result=None, exception=None):
+        """ Stop tracking an operation and resolve its future
+
+        Args:
+            key: the key of the pending operation
+            result: the finished operation
+            exception: the exception raised by the future
+
+        """
+        with self.lock:
+            pending_operation = self.pending_operations.pop(key, None)
+        if pending_operation == None:
+            return
+        if exception != None:
+            pending_operation['future'].set_exception(exception)
+        else:
+            pending_operation['future'].set_result(result)
+
+
+DEFAULT_OPERATION_TRACKER = OperationTracker()
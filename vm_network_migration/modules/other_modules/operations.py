@@ -15,12 +15,18 @@
 """
 import time
 
+from googleapiclient.errors import HttpError
 from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.operation_tracker import DEFAULT_OPERATION_TRACKER
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+from vm_network_migration.modules.other_modules.resource_store import DEFAULT_RESOURCE_STORE
 from vm_network_migration.utils import initializer
 
 class Operations:
     @initializer
-    def __init__(self, compute, project, zone=None, region=None):
+    def __init__(self, compute, project, zone=None, region=None,
+                 polling_strategy=None, long_poll=True,
+                 operation_tracker=None):
         """ Initialize an Operation object
 
         Args:
@@ -28,8 +34,87 @@ class Operations:
             project: project ID
             zone: zone name
             region: region name
+            polling_strategy: a PollingStrategy object which decides the
+                delays between two status checks
+            long_poll: whether to wait on the server side with the
+                operations' wait endpoint before polling from the client
+            operation_tracker: an OperationTracker object which checks the
+                operations in its background loop instead of the caller's
+                thread. DEFAULT_OPERATION_TRACKER is used while it is open.
         """
-        pass
+        if self.polling_strategy == None:
+            self.polling_strategy = PollingStrategy()
+
+    def get_operation_tracker(self):
+        """ Get the operation tracker which checks the operations
+
+        Returns: an OperationTracker object, or None if the caller's thread
+        polls the operations itself
+
+        """
+        if self.operation_tracker != None:
+            return self.operation_tracker
+        if DEFAULT_OPERATION_TRACKER.is_open():
+            return DEFAULT_OPERATION_TRACKER
+        return None
+
+    def poll_until_done(self, operation, build_get_request,
+                        build_wait_request=None) -> dict:
+        """ Keep checking the status of an operation until it is DONE.
+        If long polling is enabled, the server-side wait endpoint is called
+        first. It blocks until the operation is DONE or about two minutes
+        have passed, so the client only polls for very long operations.
+        The stored config of the operation's target resource is invalidated
+        when the operation is DONE.
+
+            Args:
+                operation: name of the Operations resource
+                build_get_request: a function which returns the
+                    request to get the operation
+                build_wait_request: a function which returns the request
+                    to wait for the operation on the server side
+
+            Returns:
+                a deserialized object of the response
+
+            Raises:
+                OperationTimeoutError: the operation is not done before
+                the deadline of the polling strategy, if it has one
+                googleapiclient.errors.HttpError: invalid request
+        """
+        start = time.monotonic()
+        result = None
+        if self.long_poll and build_wait_request != None:
+            result = self.wait_on_server(build_wait_request)
+        if result == None:
+            result = build_get_request().execute()
+        delays = self.polling_strategy.generate_delays(
+            result.get('operationType'))
+        while result['status'] != 'DONE':
+            delay = next(delays)
+            self.polling_strategy.check_deadline(start, delay, operation)
+            time.sleep(delay)
+            result = build_get_request().execute()
+        DEFAULT_RESOURCE_STORE.invalidate_operation_target(result)
+        return result
+
+    def wait_on_server(self, build_wait_request):
+        """ Wait for an operation with the server-side wait endpoint.
+
+            Args:
+                build_wait_request: a function which returns the request
+                    to wait for the operation on the server side
+
+            Returns:
+                a deserialized object of the response, or None if the
+                wait endpoint failed and the client should poll instead
+        """
+        try:
+            return build_wait_request().execute()
+        except HttpError as e:
+            print('Unable to wait on the server side: %s. '
+                  'Polling the operation instead.' % (e._get_reason()))
+            return None
 
     def wait_for_zone_operation(self, operation):
         """ Keep waiting for a zonal operation until it finishes
@@ -42,20 +127,74 @@ class Operations:
 
             Raises:
                 ZoneOperationsError: if the operation has an error
+                OperationTimeoutError: the operation is not done in time
                 googleapiclient.errors.HttpError: invalid request
         """
         print('Waiting for %s.' %(operation))
-        while True:
-            result = self.compute.zoneOperations().get(
+        operation_tracker = self.get_operation_tracker()
+        if operation_tracker != None:
+            result = operation_tracker.register_zone_operation(
+                operation, self.project, self.zone).result()
+            print("Done.")
+            return result
+        result = self.poll_until_done(
+            operation,
+            lambda: self.compute.zoneOperations().get(
+                project=self.project,
+                zone=self.zone,
+                operation=operation),
+            lambda: self.compute.zoneOperations().wait(
                 project=self.project,
                 zone=self.zone,
-                operation=operation).execute()
-            if result['status'] == 'DONE':
-                print("Done.")
-                if 'error' in result:
-                    raise ZoneOperationsError(result['error'])
-                return result
-            time.sleep(1)
+                operation=operation))
+        print("Done.")
+        if 'error' in result:
+            raise ZoneOperationsError(result['error'])
+        return result
+
+    def wait_for_zone_operations(self, operations) -> dict:
+        """ Wait for several zonal operations which are running at the same
+        time. An error of one operation doesn't stop waiting for the others.
+
+            Args:
+                operations: names of the Operations resources
+
+            Returns:
+                a dict which maps each operation name to the exception
+                raised by waiting for it, or None if it succeeded
+        """
+        operation_tracker = self.get_operation_tracker()
+        if operation_tracker != None:
+            # All the operations are registered first, so that their status
+            # is checked together
+            futures = {operation: operation_tracker.register_zone_operation(
+                operation, self.project, self.zone) for operation in
+                operations}
+            return {operation: future.exception() for operation, future in
+                    futures.items()}
+        return self.wait_for_operations(operations,
+                                        self.wait_for_zone_operation)
+
+    def wait_for_operations(self, operations, wait_for_an_operation) -> dict:
+        """ Wait for several operations which are running at the same time.
+
+            Args:
+                operations: names of the Operations resources
+                wait_for_an_operation: the function to wait for one operation
+
+            Returns:
+                a dict which maps each operation name to the exception
+                raised by waiting for it, or None if it succeeded
+        """
+        errors = {}
+        for operation in operations:
+            try:
+                wait_for_an_operation(operation)
+            except Exception as e:
+                errors[operation] = e
+            else:
+                errors[operation] = None
+        return errors
 
     def wait_for_region_operation(self, operation):
         """ Keep waiting for a regional operation until it finishes
@@ -68,21 +207,31 @@ class Operations:
 
             Raises:
                 RegionOperationsError: if the operation has an error
+                OperationTimeoutError: the operation is not done in time
                 googleapiclient.errors.HttpError: invalid request
         """
         print('Waiting for %s.' %(operation))
-        while True:
-            result = self.compute.regionOperations().get(
+        operation_tracker = self.get_operation_tracker()
+        if operation_tracker != None:
+            result = operation_tracker.register_region_operation(
+                operation, self.project, self.region).result()
+            print("Done.")
+            return result
+        result = self.poll_until_done(
+            operation,
+            lambda: self.compute.regionOperations().get(
+                project=self.project,
+                region=self.region,
+                operation=operation),
+            lambda: self.compute.regionOperations().wait(
                 project=self.project,
                 region=self.region,
-                operation=operation).execute()
-            if result['status'] == 'DONE':
-                print("Done.")
-                if 'error' in result:
-                    print('Region operations error', result['error'])
-                    raise RegionOperationsError(result['error'])
-                return result
-            time.sleep(1)
+                operation=operation))
+        print("Done.")
+        if 'error' in result:
+            print('Region operations error', result['error'])
+            raise RegionOperationsError(result['error'])
+        return result
 
     def wait_for_global_operation(self, operation):
         """ Keep waiting for a global operation until it finishes
@@ -95,18 +244,27 @@ class Operations:
 
             Raises:
                 RegionOperationsError: if the operation has an error
+                OperationTimeoutError: the operation is not done in time
                 googleapiclient.errors.HttpError: invalid request
         """
         print('Waiting for %s.' % (operation))
-        while True:
-            result = self.compute.globalOperations().get(
+        operation_tracker = self.get_operation_tracker()
+        if operation_tracker != None:
+            result = operation_tracker.register_global_operation(
+                operation, self.project).result()
+            print("Done.")
+            return result
+        result = self.poll_until_done(
+            operation,
+            lambda: self.compute.globalOperations().get(
+                project=self.project,
+                operation=operation),
+            lambda: self.compute.globalOperations().wait(
                 project=self.project,
-                operation=operation).execute()
-            if result['status'] == 'DONE':
-                print("Done.")
-                if 'error' in result:
-                    print('Global operations error', result['error'])
-                    raise RegionOperationsError(result['error'])
-                return result
-            time.sleep(1)
+                operation=operation))
+        print("Done.")
+        if 'error' in result:
+            print('Global operations error', result['error'])
+            raise RegionOperationsError(result['error'])
+        return result
 
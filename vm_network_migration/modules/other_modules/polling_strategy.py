@@ -0,0 +1,134 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" PollingStrategy class: decides how long to wait between two status
+checks of a pending operation.
+
+The delays start small, so that fast operations are noticed quickly, and then
+grow exponentially (with jitter) up to a maximum, so that long operations
+don't cost a request every second.
+"""
+import random
+import time
+
+from vm_network_migration.errors import *
+from vm_network_migration.utils import initializer
+
+# The expected latency of each operation type. 'first_check' is the delay
+# before the first re-check of a pending operation, and 'max_delay' is the
+# upper bound of the delay between two checks.
+DEFAULT_LATENCY_PROFILES = {
+    'default': {'first_check': 0.5, 'max_delay': 10},
+    'insert': {'first_check': 2, 'max_delay': 10},
+    'delete': {'first_check': 2, 'max_delay': 10},
+    'start': {'first_check': 2, 'max_delay': 10},
+    'stop': {'first_check': 2, 'max_delay': 10},
+    'attachDisk': {'first_check': 0.5, 'max_delay': 5},
+    'detachDisk': {'first_check': 0.5, 'max_delay': 5},
+    'setDiskAutoDelete': {'first_check': 0.25, 'max_delay': 2},
+    'addInstance': {'first_check': 0.5, 'max_delay': 5},
+    'addInstances': {'first_check': 0.5, 'max_delay': 5},
+    'removeInstance': {'first_check': 0.5, 'max_delay': 5},
+    'removeInstances': {'first_check': 0.5, 'max_delay': 5},
+    'setTargetPools': {'first_check': 0.5, 'max_delay': 5},
+    'update': {'first_check': 1, 'max_delay': 5},
+    'patch': {'first_check': 1, 'max_delay': 5},
+    # The health checks of new backends take a few probe intervals
+    'getHealth': {'first_check': 2, 'max_delay': 10},
+}
+
+
+class PollingStrategy:
+    @initializer
+    def __init__(self, multiplier=1.5, jitter=0.2, deadline=None,
+                 latency_profiles=None):
+        """ Initialize a PollingStrategy object
+
+        Args:
+            multiplier: growth factor of the delay after each check
+            jitter: maximum fraction of a delay which is randomly
+                added or removed
+            deadline: maximum seconds to wait for an operation.
+                None means waiting forever, which is the default since a
+                long operation, such as recreating a large managed instance
+                group, can't be told apart from a stuck one, and giving up
+                would roll back a resource which is still changing.
+            latency_profiles: the latency profile of each operation type.
+                DEFAULT_LATENCY_PROFILES is used if it is not specified.
+        """
+        if self.latency_profiles == None:
+            self.latency_profiles = DEFAULT_LATENCY_PROFILES
+
+    def get_latency_profile(self, operation_type) -> dict:
+        """ Get the latency profile of an operation type
+
+        Args:
+            operation_type: 'operationType' of the operation, such as
+                'insert' or 'compute.instanceGroupManagers.insert'
+
+        Returns: a latency profile dict
+
+        """
+        if operation_type != None:
+            if operation_type in self.latency_profiles:
+                return self.latency_profiles[operation_type]
+            # Some operation types are fully qualified,
+            # such as 'compute.instanceGroupManagers.insert'
+            short_operation_type = operation_type.split('.')[-1]
+            if short_operation_type in self.latency_profiles:
+                return self.latency_profiles[short_operation_type]
+        return self.latency_profiles['default']
+
+    def generate_delays(self, operation_type=None):
+        """ Generate the delays between two status checks of an operation
+
+        Args:
+            operation_type: 'operationType' of the operation
+
+        Returns: a generator of delays in seconds
+
+        """
+        profile = self.get_latency_profile(operation_type)
+        delay = profile['first_check']
+        while True:
+            yield self.add_jitter(delay)
+            delay = min(delay * self.multiplier, profile['max_delay'])
+
+    def add_jitter(self, delay) -> float:
+        """ Randomly add or remove at most (jitter * delay) seconds
+
+        Args:
+            delay: delay in seconds
+
+        Returns: the jittered delay
+
+        """
+        return max(0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def check_deadline(self, start, delay, operation):
+        """ Check whether the next status check would exceed the deadline
+
+        Args:
+            start: time.monotonic() when the waiting started
+            delay: the delay before the next status check
+            operation: name of the operation
+
+        Raises:
+            OperationTimeoutError: the deadline is exceeded
+        """
+        if self.deadline == None:
+            return
+        if time.monotonic() - start + delay > self.deadline:
+            raise OperationTimeoutError(
+                'The operation %s is not done after %s seconds.' % (
+                    operation, self.deadline))
@@ -0,0 +1,173 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" ResourceStore class: a read-through store of the resources' configs,
+keyed by their canonical selfLinks.
+
+The modules fetch the configs of the resources through DEFAULT_RESOURCE_STORE,
+so building several objects for the same resource only sends one GET request.
+A config is invalidated when an operation which targets the resource
+finishes (see Operations and OperationTracker), so the next read after a
+mutation fetches the new config. The store is cleared at the start of each
+migration run (see handler_helper.migration_run), since the resources may
+have been changed or recreated in between.
+"""
+import threading
+import time
+from copy import deepcopy
+
+from vm_network_migration.utils import initializer
+
+# Seconds before a stored config expires, in case the resource is changed
+# by something other than this tool
+DEFAULT_TTL = 300
+
+
+def canonical_selfLink(selfLink) -> str:
+    """ Get the canonical form of a selfLink, which starts from 'projects/'.
+    For example, both
+    'https://www.googleapis.com/compute/v1/projects/p/zones/z/instances/a' and
+    'projects/p/zones/z/instances/a' become 'projects/p/zones/z/instances/a'
+
+    Args:
+        selfLink: a full or partial URL of a resource
+
+    Returns: the canonical selfLink
+
+    """
+    index = selfLink.find('projects/')
+    if index == -1:
+        return selfLink
+    return selfLink[index:]
+
+
+def build_selfLink(project, resource_type, name, zone=None,
+                   region=None) -> str:
+    """ Build the canonical selfLink of a resource
+
+    Args:
+        project: project ID
+        resource_type: the collection name, such as 'instances'
+        name: name of the resource
+        zone: zone of a zonal resource
+        region: region of a regional resource
+
+    Returns: the canonical selfLink
+
+    """
+    if zone != None:
+        location = 'zones/' + zone
+    elif region != None:
+        location = 'regions/' + region
+    else:
+        location = 'global'
+    return 'projects/%s/%s/%s/%s' % (project, location, resource_type, name)
+
+
+class ResourceStore:
+    @initializer
+    def __init__(self, ttl=DEFAULT_TTL):
+        """ Initialize a ResourceStore object
+
+        Args:
+            ttl: seconds before a stored config expires.
+                None means the configs never expire.
+        """
+        # canonical selfLink -> (expiration time, config)
+        self.configs = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, selfLink, request) -> dict:
+        """ Get the config of a resource. The request is only executed if
+        the config is not stored.
+
+        Args:
+            selfLink: selfLink of the resource
+            request: an HttpRequest object which gets the resource
+
+        Returns: a copy of the config, which can be modified by the caller
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        key = canonical_selfLink(selfLink)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.configs.get(key)
+            if entry != None and (entry[0] == None or entry[0] > now):
+                self.hits += 1
+                return deepcopy(entry[1])
+            self.misses += 1
+        config = request.execute()
+        expiration = None if self.ttl == None else time.monotonic() + self.ttl
+        with self.lock:
+            self.configs[key] = (expiration, config)
+        return deepcopy(config)
+
+    def put(self, selfLink, config):
+        """ Store the config of a resource which has been fetched elsewhere,
+        such as in a batch request
+
+        Args:
+            selfLink: selfLink of the resource
+            config: the config of the resource
+
+        """
+        expiration = None if self.ttl == None else time.monotonic() + self.ttl
+        with self.lock:
+            self.configs[canonical_selfLink(selfLink)] = (expiration, config)
+
+    def invalidate(self, selfLink=None):
+        """ Remove the stored config of a resource
+
+        Args:
+            selfLink: selfLink of the resource. All the configs are removed,
+                and the counters are reset, if it is None.
+
+        """
+        with self.lock:
+            if selfLink == None:
+                self.configs.clear()
+                self.hits = 0
+                self.misses = 0
+            else:
+                self.configs.pop(canonical_selfLink(selfLink), None)
+
+    def invalidate_operation_target(self, operation):
+        """ Remove the stored config of the resource targeted by a finished
+        operation. An operation of a managed instance group also changes its
+        instance group, so the config of the instance group is removed too.
+
+        Args:
+            operation: a deserialized object of the operation
+
+        """
+        if operation != None and 'targetLink' in operation:
+            self.invalidate(operation['targetLink'])
+            if '/instanceGroupManagers/' in operation['targetLink']:
+                self.invalidate(operation['targetLink'].replace(
+                    '/instanceGroupManagers/', '/instanceGroups/'))
+
+    def get_stats(self) -> dict:
+        """ Get the hit and miss counters
+
+        Returns: a dict such as {'hits': 10, 'misses': 2}
+
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+DEFAULT_RESOURCE_STORE = ResourceStore()
@@ -15,13 +15,15 @@
 
 """
 from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.metadata_cache import DEFAULT_METADATA_CACHE
 from vm_network_migration.utils import initializer
 
 
 class SubnetNetwork(object):
     @initializer
     def __init__(self, compute, project, zone, region, network,
-                 subnetwork=None, only_check_network_info=False):
+                 subnetwork=None, only_check_network_info=False,
+                 metadata_cache=None):
         """ Initialize a SubnetNetwork object.
             If the network is auto, then the subnetwork name is optional;
             otherwise, it should be specified
@@ -33,7 +35,11 @@ class SubnetNetwork(object):
             network: network name
             subnetwork: subnetwork name
             only_check_network_info: True means ignoring the subnetwork info
+            metadata_cache: a MetadataCache object.
+                DEFAULT_METADATA_CACHE is used if it is not specified.
         """
+        if self.metadata_cache == None:
+            self.metadata_cache = DEFAULT_METADATA_CACHE
 
         self.network_link = None
         self.subnetwork_link = None
@@ -59,7 +65,7 @@ class SubnetNetwork(object):
                 self.subnetwork = self.network
 
     def get_network(self) -> dict:
-        """ Get the network config.
+        """ Get the network config. It is cached for the migration run.
 
             Returns:
                 a deserialized object of the network information
@@ -67,9 +73,8 @@ class SubnetNetwork(object):
             Raises:
                 googleapiclient.errors.HttpError: invalid request
         """
-        return self.compute.networks().get(
-            project=self.project,
-            network=self.network).execute()
+        return self.metadata_cache.get_network(self.compute, self.project,
+                                               self.network)
 
     def generate_new_network_info(self):
         """ Generate self.network_link and self.subnetwork_link
@@ -81,6 +86,21 @@ class SubnetNetwork(object):
         self.network_link = network_parameters['selfLink']
         if self.only_check_network_info:
             return
+        self.subnetwork_link = self.metadata_cache.get_subnetwork_link(
+            self.project, self.region, self.network, self.subnetwork,
+            lambda: self.find_subnetwork_link(network_parameters))
+
+    def find_subnetwork_link(self, network_parameters) -> str:
+        """ Find the subnetwork link in the network config
+
+        Args:
+            network_parameters: a deserialized object of the network
+
+        Returns: the subnetwork link
+
+        Raises:
+            SubnetworkNotExists: the subnetwork is not in the network
+        """
         subnetwork_link = 'regions/' + self.region + '/subnetworks/' + self.subnetwork
         if 'subnetworks' not in network_parameters:
             self.subnetwork_link = None
@@ -88,8 +108,7 @@ class SubnetNetwork(object):
                 'No subnetwork was found in the target network.')
         for subnetwork in network_parameters['subnetworks']:
             if subnetwork_link in subnetwork:
-                self.subnetwork_link = subnetwork_link
-                return
+                return subnetwork_link
 
         raise SubnetworkNotExists('Invalid target subnetwork.')
 
@@ -14,17 +14,29 @@
 """ TargetPool class: describes a target pool and its API methods
 
 """
-import logging
 import time
-from datetime import datetime
 
 from googleapiclient.http import HttpError
 from vm_network_migration.errors import *
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration.modules.instance_group_modules.unmanaged_instance_group import UnmanagedInstanceGroup
+from vm_network_migration.modules.other_modules.backup_store import DEFAULT_BACKUP_STORE
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
 from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    build_selfLink,
+)
 from vm_network_migration.utils import initializer
 
+# The maximum number of instances in a single addInstance or removeInstance
+# request
+MAX_INSTANCES_PER_REQUEST = 100
+# The getHealth errors of the instances which haven't been attached to the
+# target pool yet
+HEALTH_CHECK_TOLERATED_REASONS = ('not found', 'not a member', 'not in')
+
 
 class TargetPool:
     @initializer
@@ -54,10 +66,12 @@ class TargetPool:
         self.get_attached_backends()
 
     def log(self):
-        logging.basicConfig(filename='backup.log', level=logging.INFO)
-        logging.info('-------Target Pool: %s-----' % (self.target_pool_name))
-        logging.info(self.target_pool_config)
-        logging.info('--------------------------')
+        """ Back up the original config of the target pool
+
+        """
+        if self.target_pool_config != None:
+            DEFAULT_BACKUP_STORE.backup(
+                self.target_pool_config['selfLink'], self.target_pool_config)
 
     def get_target_pool_configs(self):
         """ Get the configs of the target pool
@@ -65,10 +79,13 @@ class TargetPool:
         Returns: a deserialized python object of the response
 
         """
-        return self.compute.targetPools().get(
-            project=self.project,
-            region=self.region,
-            targetPool=self.target_pool_name).execute()
+        return DEFAULT_RESOURCE_STORE.get(
+            build_selfLink(self.project, 'targetPools',
+                           self.target_pool_name, region=self.region),
+            self.compute.targetPools().get(
+                project=self.project,
+                region=self.region,
+                targetPool=self.target_pool_name))
 
     def get_selfLink(self):
         """ Get the selfLink of the target pool
@@ -85,17 +102,7 @@ class TargetPool:
         Returns: a deserialized python object of the response
 
         """
-        add_instance_operation = self.compute.targetPools().addInstance(
-            project=self.project,
-            region=self.region,
-            targetPool=self.target_pool_name,
-            body={
-                'instances': [{
-                    'instance': instance_selfLink}]
-            }).execute()
-        self.operations.wait_for_region_operation(
-            add_instance_operation['name'])
-        return add_instance_operation
+        return self.add_instances([instance_selfLink])[0]
 
     def remove_instance(self, instance_selfLink):
         """ Remove an instance from the backends
@@ -103,17 +110,111 @@ class TargetPool:
               Returns: a deserialized python object of the response
 
         """
-        remove_instance_operation = self.compute.targetPools().removeInstance(
+        return self.remove_instances([instance_selfLink])[0]
+
+    def add_instances(self, instance_selfLinks) -> list:
+        """ Add many instances into the backends, with one regional
+        operation per MAX_INSTANCES_PER_REQUEST instances
+
+        Args:
+            instance_selfLinks: a list of instance selfLinks
+
+        Returns: a list of deserialized python objects of the responses
+
+        """
+        return self.change_instances(self.compute.targetPools().addInstance,
+                                     instance_selfLinks)
+
+    def remove_instances(self, instance_selfLinks) -> list:
+        """ Remove many instances from the backends, with one regional
+        operation per MAX_INSTANCES_PER_REQUEST instances
+
+        Args:
+            instance_selfLinks: a list of instance selfLinks
+
+        Returns: a list of deserialized python objects of the responses
+
+        """
+        return self.change_instances(
+            self.compute.targetPools().removeInstance, instance_selfLinks)
+
+    def change_instances(self, api_method, instance_selfLinks) -> list:
+        """ Add or remove many instances in chunks. If one instance fails
+        the request of its chunk, the instances of the chunk are sent one
+        by one instead, so that the others are still changed.
+
+        Args:
+            api_method: the addInstance or removeInstance method
+            instance_selfLinks: a list of instance selfLinks
+
+        Returns: a list of deserialized python objects of the responses
+
+        Raises:
+            HttpError or RegionOperationsError: the first instance which
+            can't be changed, after all the others are changed
+        """
+        operations = []
+        errors = []
+        for i in range(0, len(instance_selfLinks), MAX_INSTANCES_PER_REQUEST):
+            chunk = instance_selfLinks[i:i + MAX_INSTANCES_PER_REQUEST]
+            try:
+                operations.append(self.send_instances_request(api_method,
+                                                              chunk))
+                continue
+            except (HttpError, RegionOperationsError) as e:
+                if len(chunk) == 1:
+                    errors.append(e)
+                    continue
+            for instance_selfLink in chunk:
+                try:
+                    operations.append(self.send_instances_request(
+                        api_method, [instance_selfLink]))
+                except (HttpError, RegionOperationsError) as e:
+                    errors.append(e)
+        if len(errors) > 0:
+            raise errors[0]
+        return operations
+
+    def send_instances_request(self, api_method, instance_selfLinks) -> dict:
+        """ Send an addInstance or removeInstance request, and wait for
+        its operation
+
+        Args:
+            api_method: the addInstance or removeInstance method
+            instance_selfLinks: a list of instance selfLinks
+
+        Returns: a deserialized python object of the response
+
+        """
+        operation = api_method(
             project=self.project,
             region=self.region,
             targetPool=self.target_pool_name,
             body={
-                'instances': [{
-                    'instance': instance_selfLink}]
+                'instances': [{'instance': instance_selfLink} for
+                              instance_selfLink in instance_selfLinks]
             }).execute()
-        self.operations.wait_for_region_operation(
-            remove_instance_operation['name'])
-        return remove_instance_operation
+        self.operations.wait_for_region_operation(operation['name'])
+        return operation
+
+    def raise_discovery_errors(self, errors, tolerated_reasons=('not found',)):
+        """ Raise the first error of a batch discovery, except for the
+        expected ones, such as the resources which are not found
+
+        Args:
+            errors: a dict which maps a selfLink to an exception
+            tolerated_reasons: the HttpErrors whose reasons contain one of
+            these strings (case-insensitive) are not raised
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        for error in errors.values():
+            if isinstance(error, HttpError) and any(
+                    tolerated_reason in error._get_reason().lower() for
+                    tolerated_reason in tolerated_reasons):
+                continue
+            raise error
 
     def get_attached_backends(self):
         """ According to the target pool configs, the attached instances
@@ -125,33 +226,36 @@ class TargetPool:
 
         """
         instance_group_and_instances = {}
-        for instance_selfLink in self.target_pool_config['instances']:
-            instance_selfLink_executor = SelfLinkExecutor(self.compute,
-                                                          instance_selfLink,
-                                                          self.network,
-                                                          self.subnetwork,
-                                                          self.preserve_instance_external_ip)
-            try:
-                instance = instance_selfLink_executor.build_an_instance()
-                instance_group_selfLinks = instance.get_referrer_selfLinks()
-            except HttpError as e:
-                error_message = e._get_reason()
-                if 'not found' in error_message:
-                    continue
-                else:
-                    raise e
+        # The configs and the referrers of the instances are fetched with
+        # batch requests
+        discovery = BatchDiscovery(self.compute)
+        instance_selfLinks = self.target_pool_config.get('instances', [])
+        instance_configs, errors = discovery.get_resources(instance_selfLinks)
+        self.raise_discovery_errors(errors)
+        referrers, errors = discovery.list_referrers(
+            list(instance_configs.keys()))
+        self.raise_discovery_errors(errors)
+
+        for instance_selfLink in instance_selfLinks:
+            if instance_selfLink not in referrers:
+                # The instance doesn't exist
+                continue
+            selfLink = instance_configs[instance_selfLink]['selfLink']
+            instance_group_selfLinks = referrers[instance_selfLink]
             # No instance group is associated with this instance
             if len(instance_group_selfLinks) == 0:
-                self.attached_single_instances_selfLinks.append(
-                    instance.selfLink)
+                self.attached_single_instances_selfLinks.append(selfLink)
             else:
-                for selfLink in instance_group_selfLinks:
-                    if selfLink in instance_group_and_instances:
-                        instance_group_and_instances[selfLink].append(
-                            instance.selfLink)
+                for instance_group_selfLink in instance_group_selfLinks:
+                    if instance_group_selfLink in instance_group_and_instances:
+                        instance_group_and_instances[
+                            instance_group_selfLink].append(selfLink)
                     else:
-                        instance_group_and_instances[selfLink] = [
-                            instance.selfLink]
+                        instance_group_and_instances[
+                            instance_group_selfLink] = [selfLink]
+
+        # Prefetch the configs of the instance groups
+        discovery.get_resources(list(instance_group_and_instances.keys()))
 
         for instance_group_selfLink, instance_selfLink_list in instance_group_and_instances.items():
             instance_group_selfLink_executor = SelfLinkExecutor(self.compute,
@@ -222,52 +326,146 @@ class TargetPool:
                     return True
         return False
 
+    def get_health_of_instances(self, instance_selfLinks) -> dict:
+        """ Check the health of many instances with batch requests
+
+        Args:
+            instance_selfLinks: a list of instances' selfLinks
+
+        Returns: a dict which maps each instance selfLink to True if it is
+        healthy. An instance which can't be checked because it isn't found
+        or hasn't been attached to the target pool yet is unhealthy.
+
+        Raises:
+            googleapiclient.errors.HttpError: invalid request
+        """
+        requests = {}
+        for instance_selfLink in instance_selfLinks:
+            requests[instance_selfLink] = self.compute.targetPools().getHealth(
+                project=self.project,
+                targetPool=self.target_pool_name,
+                region=self.region,
+                body={
+                    "instance": instance_selfLink
+                })
+        responses, errors = BatchDiscovery(self.compute).execute(requests)
+        self.raise_discovery_errors(errors, HEALTH_CHECK_TOLERATED_REASONS)
+        instances_health = {}
+        for instance_selfLink in instance_selfLinks:
+            response = responses.get(instance_selfLink, {})
+            instances_health[instance_selfLink] = any(
+                instance_health_status.get('healthState') == 'HEALTHY' for
+                instance_health_status in response.get('healthStatus', []))
+        return instances_health
+
+    def wait_for_healthy_instances(self, get_instance_selfLinks,
+                                   healthy_threshold=1, TIME_OUT=300,
+                                   batch_size=MAX_INSTANCES_PER_REQUEST) -> bool:
+        """ Wait until a number of instances are healthy. The instances are
+        checked in batches, and the checking stops as soon as the threshold
+        is reached. The instances counted as healthy in the earlier rounds
+        are then checked again, so that the threshold is only reached with
+        the instances which are still healthy. The delay between two rounds
+        grows while no more instances become healthy, and is reset when one
+        does.
+
+        Args:
+            get_instance_selfLinks: a function which returns the selfLinks
+            of the instances to check
+            healthy_threshold: the number of healthy instances to wait for.
+            It is lowered to the number of instances if there are fewer.
+            TIME_OUT: maximum waiting time
+            batch_size: the number of instances checked in one batch request
+
+        Returns: True if the threshold is reached before the timeout
+
+        """
+        start = time.monotonic()
+        polling_strategy = PollingStrategy()
+        delays = polling_strategy.generate_delays('getHealth')
+        healthy_instances = set()
+        while True:
+            instance_selfLinks = list(get_instance_selfLinks())
+            threshold = min(healthy_threshold, len(instance_selfLinks))
+            # The instances which have left the list since the last round
+            # don't count
+            healthy_instances &= set(instance_selfLinks)
+            number_of_healthy_instances = len(healthy_instances)
+            unknown_instances = [instance_selfLink for instance_selfLink in
+                                 instance_selfLinks if instance_selfLink not in
+                                 healthy_instances]
+            for i in range(0, len(unknown_instances), batch_size):
+                if len(healthy_instances) >= threshold:
+                    break
+                for instance_selfLink, healthy in \
+                        self.get_health_of_instances(
+                            unknown_instances[i:i + batch_size]).items():
+                    if healthy:
+                        healthy_instances.add(instance_selfLink)
+            if len(instance_selfLinks) > 0 and len(
+                    healthy_instances) >= threshold:
+                # The instances counted in the earlier rounds may have
+                # become unhealthy since
+                counted_instances = [instance_selfLink for instance_selfLink
+                                     in instance_selfLinks if
+                                     instance_selfLink in healthy_instances
+                                     and instance_selfLink not in
+                                     unknown_instances]
+                for i in range(0, len(counted_instances), batch_size):
+                    for instance_selfLink, healthy in \
+                            self.get_health_of_instances(
+                                counted_instances[i:i + batch_size]).items():
+                        if not healthy:
+                            healthy_instances.discard(instance_selfLink)
+                if len(healthy_instances) >= threshold:
+                    return True
+            if len(healthy_instances) > number_of_healthy_instances:
+                delays = polling_strategy.generate_delays('getHealth')
+            delay = next(delays)
+            if time.monotonic() - start + delay > TIME_OUT:
+                return False
+            time.sleep(delay)
+
     def wait_for_instance_become_healthy(self, instance_selfLink, TIME_OUT=300):
         """ Wait for an instance being healthy
 
         Args:
             backend_selfLink: url selfLink of the backends (just an instance group)
 
-        Returns:
+        Returns: True if the instance becomes healthy before the timeout
 
         """
-        start = datetime.now()
         print('Waiting for %s being healthy with time out %s seconds.' % (
             instance_selfLink, TIME_OUT))
-        while not self.check_backend_health(instance_selfLink):
-            time.sleep(3)
-            current_time = datetime.now()
-            if (current_time - start).seconds > TIME_OUT:
-                print('Health waiting operation is timed out.')
-                return
+        if not self.wait_for_healthy_instances(lambda: [instance_selfLink],
+                                               1, TIME_OUT):
+            print('Health waiting operation is timed out.')
+            return False
         print('At least one of the backend in %s is healthy.' % (
             self.target_pool_name))
+        return True
 
     def wait_for_an_instance_group_become_partially_healthy(self,
                                                             instance_group,
-                                                            TIME_OUT=300):
-        """ Wait for at least one instance in this instance group being healthy
+                                                            TIME_OUT=300,
+                                                            healthy_threshold=1):
+        """ Wait for some instances in this instance group being healthy
 
         Args:
             instance_group:  a ManagedInstanceGroup object
             TIME_OUT: maximum waiting time
+            healthy_threshold: the number of healthy instances to wait for
 
-        Returns:
+        Returns: True if the instances become healthy before the timeout
 
         """
-        start = datetime.now()
         print('Waiting for %s being healthy with timeout %s seconds.' % (
             instance_group.selfLink, TIME_OUT))
-        while (datetime.now() - start).seconds < TIME_OUT:
-            instance_selfLinks = instance_group.list_instances()
-            for instance_selfLink in instance_selfLinks:
-                try:
-                    if self.check_backend_health(instance_selfLink):
-                        print(
-                            'At least one of the backend in %s is healthy.' % (
-                                self.target_pool_name))
-                        return
-                except:
-                    # the instance maybe hasn't been attached to the target pool
-                    continue
-            time.sleep(5)
+        if not self.wait_for_healthy_instances(
+                instance_group.get_instances_snapshot, healthy_threshold,
+                TIME_OUT):
+            print('Health waiting operation is timed out.')
+            return False
+        print('At least one of the backend in %s is healthy.' % (
+            self.target_pool_name))
+        return True
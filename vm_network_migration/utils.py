@@ -18,6 +18,11 @@ import inspect
 import time
 from functools import wraps
 
+import google_auth_httplib2
+import httplib2
+from googleapiclient import discovery
+from googleapiclient.http import HttpRequest
+
 
 def initializer(fun):
     """ Automatically initialize instance variables
@@ -44,6 +49,29 @@ def initializer(fun):
     return wrapper
 
 
+def build_thread_safe_compute(credentials):
+    """ Build a compute engine API client which can be shared by threads.
+    httplib2.Http is not thread safe, so every request gets its own
+    authorized Http object.
+
+    Args:
+        credentials: google auth credentials
+
+    Returns: a compute engine API client
+
+    """
+
+    def build_request(http, *args, **kwargs):
+        new_http = google_auth_httplib2.AuthorizedHttp(credentials,
+                                                       http=httplib2.Http())
+        return HttpRequest(new_http, *args, **kwargs)
+
+    authorized_http = google_auth_httplib2.AuthorizedHttp(credentials,
+                                                          http=httplib2.Http())
+    return discovery.build('compute', 'v1', requestBuilder=build_request,
+                           http=authorized_http)
+
+
 def generate_timestamp_string() -> str:
     """Generate the current timestamp.
 
@@ -18,6 +18,7 @@ import warnings
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration_end_to_end_tests.build_test_resource import TestResourceCreator
 from vm_network_migration_end_to_end_tests.check_result import *
@@ -80,8 +81,7 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -117,6 +117,136 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
 
         print('Pass the current test')
 
+    def testConcurrentBackendsWithCapacityFloor(self):
+        """ The backends of a backend service are migrated concurrently,
+        while half of them must stay healthy
+
+        Expectation: all the backends will be migrated
+
+        """
+        ### create test resources
+        group_name_1 = 'end-to-end-test-managed-instance-group-1'
+        operation = self.test_resource_creator.create_regional_managed_instance_group(
+            self.test_resource_creator.legacy_instance_template_selfLink,
+            group_name_1,
+            'sample_multi_zone_managed_instance_group.json',
+        )
+        instance_group_1_selfLink = operation['targetLink'].replace(
+            '/instanceGroupManagers/', '/instanceGroups/')
+        original_instance_template_1_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name_1)
+        group_name_2 = 'end-to-end-test-managed-instance-group-2'
+        operation = self.test_resource_creator.create_regional_managed_instance_group(
+            self.test_resource_creator.legacy_instance_template_selfLink,
+            group_name_2,
+            'sample_multi_zone_managed_instance_group.json',
+        )
+        instance_group_2_selfLink = operation['targetLink'].replace(
+            '/instanceGroupManagers/', '/instanceGroups/')
+        original_instance_template_2_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name_2)
+
+        backend_service_name = 'end-to-end-test-backend-service'
+        original_backend_selfLinks = [instance_group_2_selfLink,
+                                      instance_group_1_selfLink]
+        operation = self.test_resource_creator.create_global_backend_service(
+            'sample_external_backend_service.json',
+            backend_service_name, original_backend_selfLinks)
+
+        backend_service_selfLink = operation['targetLink']
+        ### start migration
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             backend_service_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             options=MigrationOptions(
+                                                 max_parallel_backends=2,
+                                                 min_healthy_fraction=0.5))
+        selfLink_executor.run()
+        ### check migration result
+        new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
+            backend_service_name)
+        new_backend_selfLinks = self.google_api_interface.get_backends_links_from_backend_service_configs(
+            new_backend_service_configs)
+        # check backend service config
+        self.assertTrue(
+            compare_two_list(original_backend_selfLinks, new_backend_selfLinks))
+        # check its backends
+        new_instance_template_1_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name_1)
+        new_instance_template_2_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name_2)
+        self.assertTrue(
+            instance_template_config_is_unchanged_except_for_network_and_name(
+                original_instance_template_1_configs,
+                new_instance_template_1_configs))
+        self.assertTrue(
+            instance_template_config_is_unchanged_except_for_network_and_name(
+                original_instance_template_2_configs,
+                new_instance_template_2_configs))
+
+        # network changed
+        self.assertTrue(
+            check_instance_template_network(new_instance_template_1_configs,
+                                            self.test_resource_creator.network_selfLink,
+                                            self.test_resource_creator.subnetwork_selfLink))
+
+        self.assertTrue(
+            check_instance_template_network(new_instance_template_2_configs,
+                                            self.test_resource_creator.network_selfLink,
+                                            self.test_resource_creator.subnetwork_selfLink))
+
+        print('Pass the current test')
+
+    def testCapacityFloorCannotBeKept(self):
+        """ A backend service has a single backend, and half of its backends
+        must stay healthy
+
+        Expectation: the migration will not start
+
+        """
+        ### create test resources
+        group_name = 'end-to-end-test-managed-instance-group-1'
+        operation = self.test_resource_creator.create_regional_managed_instance_group(
+            self.test_resource_creator.legacy_instance_template_selfLink,
+            group_name,
+            'sample_multi_zone_managed_instance_group.json',
+        )
+        instance_group_selfLink = operation['targetLink'].replace(
+            '/instanceGroupManagers/', '/instanceGroups/')
+        original_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name)
+
+        backend_service_name = 'end-to-end-test-backend-service'
+        operation = self.test_resource_creator.create_global_backend_service(
+            'sample_external_backend_service.json',
+            backend_service_name, [instance_group_selfLink])
+        original_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
+            backend_service_name)
+        backend_service_selfLink = operation['targetLink']
+        ### start migration
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             backend_service_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             options=MigrationOptions(
+                                                 max_parallel_backends=2,
+                                                 min_healthy_fraction=0.5))
+        with self.assertRaises(MigrationFailed):
+            selfLink_executor.run()
+        ### check migration result
+        # the backend service and its backend are unchanged
+        new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
+            backend_service_name)
+        self.assertTrue(resource_config_is_unchanged_including_network(
+            original_backend_service_configs, new_backend_service_configs))
+        new_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name)
+        self.assertTrue(resource_config_is_unchanged_including_network(
+            original_instance_template_configs,
+            new_instance_template_configs))
+        print('Pass the current test')
+
     def testWithNoBackendsAttached(self):
         backend_service_name = 'end-to-end-test-backend-service'
 
@@ -132,8 +262,7 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -194,8 +323,7 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -276,8 +404,7 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         new_backend_service_1_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_1_name)
@@ -343,8 +470,7 @@ class TestExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         new_backend_service_1_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_1_name)
@@ -80,8 +80,7 @@ class TestInternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_regional_backend_service_configs(
             backend_service_name)
@@ -140,8 +139,7 @@ class TestInternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_regional_backend_service_configs(
             backend_service_name)
@@ -182,8 +180,7 @@ class TestInternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
 
         ### check migration result
         # migration didn't start
@@ -230,8 +227,7 @@ class TestInternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         new_backend_service_1_configs = self.google_api_interface.get_regional_backend_service_configs(
             backend_service_1_name)
@@ -291,8 +287,7 @@ class TestInternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         new_backend_service_1_configs = self.google_api_interface.get_regional_backend_service_configs(
             backend_service_1_name)
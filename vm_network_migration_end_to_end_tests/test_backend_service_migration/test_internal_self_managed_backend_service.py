@@ -70,8 +70,7 @@ class TestInternalSelfManagedBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check migration result
         # check backend service config
@@ -115,8 +114,7 @@ class TestInternalSelfManagedBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check migration result
         # check backend service config
@@ -177,8 +175,7 @@ class TestInternalSelfManagedBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # check forwarding rule config
         new_forwarding_rule_config = self.google_api_interface.get_global_forwarding_rule_config(
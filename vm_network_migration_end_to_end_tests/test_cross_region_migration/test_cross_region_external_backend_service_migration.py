@@ -100,8 +100,7 @@ class TestCrossRegionExternalBackendServiceMigration(unittest.TestCase):
                                              auto_subnetwork_name,
                                              auto_subnetwork_name
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface_region_1.get_global_backend_service_configs(
             backend_service_name)
@@ -178,8 +177,7 @@ class TestCrossRegionExternalBackendServiceMigration(unittest.TestCase):
                                              self.test_resource_creator_region_1.network_name,
                                              self.test_resource_creator_region_1.subnetwork_name
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface_region_1.get_global_backend_service_configs(
             backend_service_name)
@@ -264,8 +262,7 @@ class TestCrossRegionExternalBackendServiceMigration(unittest.TestCase):
                                              target_subnetwork_name
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface_region_1.get_global_backend_service_configs(
             backend_service_name)
@@ -79,8 +79,7 @@ class TestExternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # check forwarding rule config
         new_forwarding_rule_config = self.google_api_interface.get_global_forwarding_rule_config(
@@ -182,8 +181,7 @@ class TestExternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs_1 = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name_1)
@@ -262,8 +260,7 @@ class TestExternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -332,8 +329,7 @@ class TestExternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -409,8 +405,7 @@ class TestExternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_backend_service_configs = self.google_api_interface.get_global_backend_service_configs(
             backend_service_name)
@@ -77,8 +77,7 @@ class TestInternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
 
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check migration result
         # check internal forwarding rule
@@ -149,8 +148,7 @@ class TestInternalForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
 
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check migration result
         # check internal forwarding rule network
@@ -83,8 +83,7 @@ class TestInternalSelfManagedForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # check forwarding rule config
         new_forwarding_rule_config = self.google_api_interface.get_global_forwarding_rule_config(
@@ -165,8 +164,7 @@ class TestInternalSelfManagedForwardingRuleMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # check forwarding rule config
         new_forwarding_rule_config = self.google_api_interface.get_global_forwarding_rule_config(
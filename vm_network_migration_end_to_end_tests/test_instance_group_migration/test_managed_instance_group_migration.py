@@ -18,6 +18,7 @@ import warnings
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration_end_to_end_tests.build_test_resource import TestResourceCreator
 from vm_network_migration_end_to_end_tests.check_result import *
@@ -58,8 +59,7 @@ class TestManagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
             group_name)
@@ -100,8 +100,7 @@ class TestManagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
             group_name)
@@ -118,6 +117,57 @@ class TestManagedInstanceGroupMigration(unittest.TestCase):
 
         print('Pass the current test')
 
+    def testWithRollingUpdate(self):
+        """ The instances of a managed instance group are replaced with a
+        rolling update
+
+        Expectation: the instance group is not recreated, and its instance
+        template uses the target network
+
+        """
+        ### create test resources
+        group_name = 'end-to-end-test-managed-instance-group-1'
+        operation = self.test_resource_creator.create_regional_managed_instance_group(
+            self.test_resource_creator.legacy_instance_template_selfLink,
+            group_name,
+            'sample_multi_zone_managed_instance_group.json')
+        instance_group_selfLink = operation['targetLink']
+        original_instance_group_config = self.google_api_interface.get_multi_zone_managed_instance_group_configs(
+            group_name)
+        original_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name)
+
+        ### start migration
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             instance_group_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             options=MigrationOptions(
+                                                 rolling_update=True,
+                                                 max_surge=3,
+                                                 max_unavailable=0))
+        selfLink_executor.run()
+        ### check migration result
+        new_instance_group_config = self.google_api_interface.get_multi_zone_managed_instance_group_configs(
+            group_name)
+        # the instance group is not recreated
+        self.assertEqual(original_instance_group_config['id'],
+                         new_instance_group_config['id'])
+        new_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
+            group_name)
+        self.assertTrue(
+            instance_template_config_is_unchanged_except_for_network_and_name(
+                original_instance_template_configs,
+                new_instance_template_configs)
+        )
+        # network changed
+        self.assertTrue(
+            check_instance_template_network(new_instance_template_configs,
+                                            self.test_resource_creator.network_selfLink,
+                                            self.test_resource_creator.subnetwork_selfLink))
+
+        print('Pass the current test')
+
     def testAsBackendOfTargetPool(self):
         """ The managed instance group serves a target pool.
 
@@ -149,8 +199,7 @@ class TestManagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         # the migration didn't start
         new_instance_template_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
@@ -187,8 +236,7 @@ class TestManagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
 
         ### check migration result
         # the migration is failed and the resources are rolled back
@@ -18,7 +18,9 @@ import warnings
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.utils import build_thread_safe_compute
 from vm_network_migration_end_to_end_tests.build_test_resource import TestResourceCreator
 from vm_network_migration_end_to_end_tests.check_result import *
 from vm_network_migration_end_to_end_tests.google_api_interface import GoogleApiInterface
@@ -30,6 +32,7 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
         print('Initialize test environment.')
         project = os.environ["PROJECT_ID"]
         credentials, default_project = google.auth.default()
+        self.credentials = credentials
         self.compute = discovery.build('compute', 'v1', credentials=credentials)
         self.google_api_interface = GoogleApiInterface(self.compute,
                                                        project,
@@ -64,8 +67,7 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              False)
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_config = self.google_api_interface.get_unmanaged_instance_group_configs(
             unmanaged_instance_group_name)
@@ -81,6 +83,45 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
                                  self.test_resource_creator.subnetwork_selfLink))
         print('Pass the current test')
 
+    def testWithMultipleInstancesMigratedInParallel(self):
+        ### create test resources
+        original_instances_in_group = []
+        for i in range(1, 4):
+            instance_name = 'end-to-end-test-instance-%s' % (i)
+            self.test_resource_creator.create_instance_using_template(
+                instance_name,
+                self.test_resource_creator.legacy_instance_template_selfLink)
+            original_instances_in_group.append(instance_name)
+
+        unmanaged_instance_group_name = 'end-to-end-test-unmanaged-instance-group-1'
+        self.test_resource_creator.create_unmanaged_instance_group(
+            unmanaged_instance_group_name,
+            original_instances_in_group)
+        original_config = self.google_api_interface.get_unmanaged_instance_group_configs(
+            unmanaged_instance_group_name)
+
+        ### start migration
+        selfLink_executor = SelfLinkExecutor(
+            build_thread_safe_compute(self.credentials),
+            original_config['selfLink'],
+            self.test_resource_creator.network_name,
+            self.test_resource_creator.subnetwork_name,
+            False,
+            options=MigrationOptions(max_parallel_instances=3))
+        selfLink_executor.run()
+        ### check migration result
+        new_config = self.google_api_interface.get_unmanaged_instance_group_configs(
+            unmanaged_instance_group_name)
+        self.assertTrue(resource_config_is_unchanged_except_for_network(
+            original_config, new_config))
+        for instance_name in original_instances_in_group:
+            new_instance_config = self.google_api_interface.get_instance_configs(
+                instance_name)
+            self.assertTrue(check_instance_network(new_instance_config,
+                                                   self.test_resource_creator.network_selfLink,
+                                                   self.test_resource_creator.subnetwork_selfLink))
+        print('Pass the current test')
+
     def testWithNoInstanceInTheGroup(self):
         ### create test resources
         unmanaged_instance_group_name = 'end-to-end-test-unmanaged-instance-group-1'
@@ -96,8 +137,7 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              False)
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_config = self.google_api_interface.get_unmanaged_instance_group_configs(
             unmanaged_instance_group_name)
@@ -149,8 +189,7 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # the migration is successful
         new_instance_config = self.google_api_interface.get_instance_configs(
@@ -202,8 +241,7 @@ class TestUnmanagedInstanceGroupMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
         with self.assertRaises(MigrationFailed):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
 
         ### check migration result
         # the migration is failed and the resources are rolled back
@@ -18,6 +18,7 @@ import warnings
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration_end_to_end_tests.build_test_resource import TestResourceCreator
 from vm_network_migration_end_to_end_tests.check_result import *
@@ -59,8 +60,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              True)
         with self.assertRaises(Exception):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
 
         ### check result
         # Terminate before migration starts
@@ -95,8 +95,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              None,
                                              True)
 
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check result
         new_config = self.google_api_interface.get_instance_configs(
@@ -127,8 +126,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              True)
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         # check migration result
         new_config = self.google_api_interface.get_instance_configs(
             instance_name)
@@ -159,8 +157,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              False)
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         # check migration result
         new_config = self.google_api_interface.get_instance_configs(
             instance_name)
@@ -194,8 +191,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              False)
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         # check migration result
         new_config = self.google_api_interface.get_instance_configs(
             instance_name)
@@ -208,6 +204,81 @@ class TestInstanceMigration(unittest.TestCase):
                                                self.test_resource_creator.subnetwork_selfLink))
         print('Pass the current test')
 
+    def testInstanceUsingMultiDisksWithDisksKeptOnDelete(self):
+        # create test resources
+        instance_name = "end-to-end-test-instance-1"
+        instance_selfLink = \
+            self.test_resource_creator.create_instance_using_template(
+                instance_name,
+                self.test_resource_creator.legacy_instance_template_selfLink)[
+                'targetLink']
+        self.test_resource_creator.add_additional_disk_to_instance(
+            instance_name, 'second-disk',
+            'sample_disk.json')
+        original_config = self.google_api_interface.get_instance_configs(
+            instance_name)
+        # start migration
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             instance_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             False,
+                                             options=MigrationOptions(keep_disks_on_delete=True))
+        selfLink_executor.run()
+        # check migration result
+        new_config = self.google_api_interface.get_instance_configs(
+            instance_name)
+        # the autoDelete flags of the disks are unchanged
+        self.assertTrue(
+            resource_config_is_unchanged_except_for_network(new_config,
+                                                            original_config))
+        # network changed
+        self.assertTrue(check_instance_network(new_config,
+                                               self.test_resource_creator.network_selfLink,
+                                               self.test_resource_creator.subnetwork_selfLink))
+        print('Pass the current test')
+
+    def testBlueGreenWithoutIpPreservation(self):
+        """ The instance only has a boot disk, and it is migrated in the
+        blue/green mode
+
+        Expectation: the instance is replaced by a new instance in the
+        target subnet, and the original instance is deleted
+
+        """
+        # create test resources
+        instance_name = "end-to-end-test-instance-1"
+        instance_selfLink = \
+            self.test_resource_creator.create_instance_using_template(
+                instance_name,
+                self.test_resource_creator.legacy_instance_template_selfLink)[
+                'targetLink']
+        original_config = self.google_api_interface.get_instance_configs(
+            instance_name)
+        # start migration
+        selfLink_executor = SelfLinkExecutor(self.compute,
+                                             instance_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             False,
+                                             options=MigrationOptions(blue_green=True))
+        migration_handler = selfLink_executor.run()
+        replacement_instance_name = migration_handler.replacement_instance_name
+        self.google_api_interface.instances.append(replacement_instance_name)
+        # check migration result
+        with self.assertRaises(Exception):
+            self.google_api_interface.get_instance_configs(instance_name)
+        new_config = self.google_api_interface.get_instance_configs(
+            replacement_instance_name)
+        self.assertEqual(new_config['status'], 'RUNNING')
+        self.assertEqual(new_config['machineType'],
+                         original_config['machineType'])
+        # network changed
+        self.assertTrue(check_instance_network(new_config,
+                                               self.test_resource_creator.network_selfLink,
+                                               self.test_resource_creator.subnetwork_selfLink))
+        print('Pass the current test')
+
     def testMigrateAnInstanceInAnInstanceGroup(self):
         """ The instance is serving an instance group
 
@@ -235,8 +306,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              False)
 
         with self.assertRaises(AmbiguousTargetResource):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
         ### check migration result
         # the migration never starts, so the config didn't change
         new_config = self.google_api_interface.get_instance_configs(
@@ -272,8 +342,7 @@ class TestInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         # the migration is successful
         new_instance_config = self.google_api_interface.get_instance_configs(
@@ -71,8 +71,7 @@ class TestTargetInstanceMigration(unittest.TestCase):
                                              self.test_resource_creator.subnetwork_name,
                                              )
 
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
 
         ### check migration result
 
@@ -0,0 +1,65 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of BackendHealthGate.is_healthy_enough
+"""
+import unittest
+
+from vm_network_migration.modules.backend_service_modules.backend_health_gate import BackendHealthGate
+
+
+def build_health_status(number_of_healthy, number_of_unhealthy):
+    """ Build the 'healthStatus' list of a getHealth response
+
+    Args:
+        number_of_healthy: the number of HEALTHY instances
+        number_of_unhealthy: the number of UNHEALTHY instances
+
+    Returns: a list of instance health statuses
+
+    """
+    return [{'healthState': 'HEALTHY'}] * number_of_healthy + \
+           [{'healthState': 'UNHEALTHY'}] * number_of_unhealthy
+
+
+class TestBackendHealthGate(unittest.TestCase):
+    def testDefaultGateNeedsOneHealthyInstance(self):
+        gate = BackendHealthGate(None)
+        self.assertFalse(gate.is_healthy_enough([]))
+        self.assertFalse(gate.is_healthy_enough(build_health_status(0, 3)))
+        self.assertTrue(gate.is_healthy_enough(build_health_status(1, 3)))
+
+    def testHealthyPercent(self):
+        gate = BackendHealthGate(None, healthy_percent=50)
+        self.assertFalse(gate.is_healthy_enough(build_health_status(1, 3)))
+        self.assertTrue(gate.is_healthy_enough(build_health_status(2, 2)))
+        self.assertTrue(gate.is_healthy_enough(build_health_status(4, 0)))
+
+    def testHealthyCount(self):
+        gate = BackendHealthGate(None, healthy_count=3)
+        self.assertFalse(gate.is_healthy_enough(build_health_status(2, 2)))
+        self.assertTrue(gate.is_healthy_enough(build_health_status(3, 1)))
+
+    def testHealthyCountIsLoweredToTheNumberOfInstances(self):
+        gate = BackendHealthGate(None, healthy_count=3)
+        self.assertTrue(gate.is_healthy_enough(build_health_status(2, 0)))
+        self.assertFalse(gate.is_healthy_enough(build_health_status(1, 1)))
+
+    def testHealthyPercentAndCount(self):
+        gate = BackendHealthGate(None, healthy_percent=50, healthy_count=2)
+        self.assertFalse(gate.is_healthy_enough(build_health_status(2, 3)))
+        self.assertTrue(gate.is_healthy_enough(build_health_status(3, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
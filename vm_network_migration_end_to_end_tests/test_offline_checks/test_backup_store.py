@@ -0,0 +1,84 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of BackupStore with a temporary directory
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from vm_network_migration.modules.other_modules import backup_store as backup_store_module
+from vm_network_migration.modules.other_modules.backup_store import BackupStore
+
+INSTANCE = 'projects/p/zones/z/instances/a'
+FULL_INSTANCE = 'https://www.googleapis.com/compute/v1/' + INSTANCE
+
+
+class TestBackupStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = os.path.join(tempfile.mkdtemp(), 'backup')
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.directory))
+
+    def backup_at(self, backup_store, timestamp, config):
+        with mock.patch.object(backup_store_module.time, 'time',
+                               return_value=timestamp):
+            return backup_store.backup(FULL_INSTANCE, config)
+
+    def test_directory_is_created_on_first_backup(self):
+        backup_store = BackupStore(self.directory)
+        self.assertIsNone(backup_store.restore(INSTANCE))
+        self.assertFalse(os.path.exists(self.directory))
+        self.assertTrue(backup_store.backup(INSTANCE, {'name': 'a'}))
+        self.assertTrue(os.path.exists(self.directory))
+
+    def test_restore_by_timestamp(self):
+        backup_store = BackupStore(self.directory)
+        self.backup_at(backup_store, 100, {'name': 'a', 'version': 1})
+        self.backup_at(backup_store, 200, {'name': 'a', 'version': 2})
+        self.assertEqual(backup_store.list_backups(INSTANCE), [100, 200])
+        self.assertEqual(backup_store.restore(INSTANCE)['version'], 2)
+        self.assertEqual(backup_store.restore(INSTANCE, 150)['version'], 1)
+        self.assertIsNone(backup_store.restore(INSTANCE, 50))
+
+    def test_same_config_is_not_written_again(self):
+        backup_store = BackupStore(self.directory)
+        self.assertTrue(backup_store.backup(INSTANCE, {'a': 1, 'b': 2}))
+        self.assertFalse(backup_store.backup(INSTANCE, {'b': 2, 'a': 1}))
+        self.assertEqual(len(backup_store.list_backups(INSTANCE)), 1)
+
+    def test_index_is_loaded_by_another_process(self):
+        self.backup_at(BackupStore(self.directory), 100, {'name': 'a'})
+        backup_store = BackupStore()
+        backup_store.open(self.directory)
+        self.assertEqual(backup_store.list_backups(FULL_INSTANCE), [100])
+        self.assertEqual(backup_store.restore(INSTANCE), {'name': 'a'})
+
+    def test_entry_beyond_the_data_file_is_ignored(self):
+        backup_store = BackupStore(self.directory)
+        self.backup_at(backup_store, 100, {'version': 1})
+        self.backup_at(backup_store, 200, {'version': 2})
+        # A crash while writing the second record leaves it incomplete
+        data_file_path = backup_store.get_data_file_path()
+        with open(data_file_path, 'rb+') as data_file:
+            data_file.truncate(os.path.getsize(data_file_path) - 1)
+        backup_store = BackupStore(self.directory)
+        self.assertEqual(backup_store.list_backups(INSTANCE), [100])
+        self.assertEqual(backup_store.restore(INSTANCE), {'version': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of BatchDiscovery with a fake batch API
+"""
+import unittest
+
+from vm_network_migration.modules.other_modules.batch_discovery import BatchDiscovery
+from vm_network_migration.modules.other_modules.resource_store import DEFAULT_RESOURCE_STORE
+
+INSTANCE_A = 'https://www.googleapis.com/compute/v1/projects/p/zones/z/instances/a'
+INSTANCE_B = 'https://www.googleapis.com/compute/v1/projects/p/zones/z/instances/b'
+GROUP_1 = 'projects/p/zones/z/instanceGroups/g1'
+GROUP_2 = 'projects/p/zones/z/instanceGroups/g2'
+
+
+class FakeRequest:
+    def __init__(self, method, kwargs):
+        self.method = method
+        self.kwargs = kwargs
+
+
+class FakeApi:
+    def __init__(self, api_name):
+        self.api_name = api_name
+
+    def get(self, **kwargs):
+        return FakeRequest((self.api_name, 'get'), kwargs)
+
+    def listReferrers(self, **kwargs):
+        return FakeRequest((self.api_name, 'listReferrers'), kwargs)
+
+
+class FakeBatch:
+    def __init__(self, compute, callback):
+        self.compute = compute
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.compute.batches.append(len(self.requests))
+        for request_id, request in self.requests:
+            response = self.compute.respond(request)
+            if isinstance(response, Exception):
+                self.callback(request_id, None, response)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeCompute:
+    def __init__(self, respond):
+        """ A fake compute engine API
+
+        Args:
+            respond: a function which maps a FakeRequest to its response,
+            or to an exception if the request fails
+        """
+        self.respond = respond
+        # the number of calls in each batch request
+        self.batches = []
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def __getattr__(self, api_name):
+        return lambda: FakeApi(api_name)
+
+
+class TestExecute(unittest.TestCase):
+    def test_split_into_batches(self):
+        compute = FakeCompute(lambda request: request.kwargs['n'])
+        discovery = BatchDiscovery(compute, batch_size=2)
+        requests = {n: FakeApi('instances').get(n=n) for n in range(5)}
+        responses, errors = discovery.execute(requests)
+        self.assertEqual(responses, {n: n for n in range(5)})
+        self.assertEqual(errors, {})
+        self.assertEqual(compute.batches, [2, 2, 1])
+
+    def test_failed_calls_are_returned_separately(self):
+        failure = Exception('not found')
+
+        def respond(request):
+            return failure if request.kwargs['n'] == 1 else 'ok'
+
+        discovery = BatchDiscovery(FakeCompute(respond))
+        requests = {n: FakeApi('instances').get(n=n) for n in range(3)}
+        responses, errors = discovery.execute(requests)
+        self.assertEqual(responses, {0: 'ok', 2: 'ok'})
+        self.assertEqual(errors, {1: failure})
+
+
+class TestGetResources(unittest.TestCase):
+    def setUp(self):
+        DEFAULT_RESOURCE_STORE.invalidate()
+
+    def tearDown(self):
+        DEFAULT_RESOURCE_STORE.invalidate()
+
+    def test_build_get_request(self):
+        discovery = BatchDiscovery(FakeCompute(None))
+        request = discovery.build_get_request(
+            'projects/p/regions/r/instanceGroupManagers/m')
+        self.assertEqual(request.method,
+                         ('regionInstanceGroupManagers', 'get'))
+        self.assertEqual(request.kwargs,
+                         {'project': 'p', 'region': 'r',
+                          'instanceGroupManager': 'm'})
+        request = discovery.build_get_request(
+            'projects/p/global/backendServices/b')
+        self.assertEqual(request.method, ('backendServices', 'get'))
+        self.assertIsNone(
+            discovery.build_get_request('projects/p/global/networks/n'))
+
+    def test_configs_are_put_into_store(self):
+        failure = Exception('not found')
+
+        def respond(request):
+            if request.kwargs['instance'] == 'b':
+                return failure
+            return {'name': request.kwargs['instance']}
+
+        compute = FakeCompute(respond)
+        discovery = BatchDiscovery(compute)
+        configs, errors = discovery.get_resources([INSTANCE_A, INSTANCE_B])
+        self.assertEqual(configs, {INSTANCE_A: {'name': 'a'}})
+        self.assertEqual(errors, {INSTANCE_B: failure})
+        self.assertEqual(compute.batches, [2])
+        # no request is needed to get the stored config
+        self.assertEqual(DEFAULT_RESOURCE_STORE.get(INSTANCE_A, None),
+                         {'name': 'a'})
+
+
+class TestListReferrers(unittest.TestCase):
+    def test_pages_of_all_instances_are_fetched_together(self):
+        pages = {
+            ('a', None): {'items': [
+                {'referenceType': 'MEMBER_OF', 'referrer': GROUP_1}],
+                'nextPageToken': 't'},
+            ('a', 't'): {'items': [
+                {'referenceType': 'MEMBER_OF', 'referrer': GROUP_2},
+                {'referenceType': 'OTHER', 'referrer': 'other'}]},
+            ('b', None): {},
+        }
+        compute = FakeCompute(lambda request: pages[(
+            request.kwargs['instance'], request.kwargs.get('pageToken'))])
+        discovery = BatchDiscovery(compute)
+        referrers, errors = discovery.list_referrers([INSTANCE_A, INSTANCE_B])
+        self.assertEqual(referrers,
+                         {INSTANCE_A: [GROUP_1, GROUP_2], INSTANCE_B: []})
+        self.assertEqual(errors, {})
+        # one round trip per page, not per instance
+        self.assertEqual(compute.batches, [2, 1])
+
+    def test_failed_instance_is_dropped(self):
+        failure = Exception('forbidden')
+
+        def respond(request):
+            if request.kwargs['instance'] == 'b':
+                return failure
+            return {'items': [
+                {'referenceType': 'MEMBER_OF', 'referrer': GROUP_1}]}
+
+        discovery = BatchDiscovery(FakeCompute(respond))
+        referrers, errors = discovery.list_referrers([INSTANCE_A, INSTANCE_B])
+        self.assertEqual(referrers, {INSTANCE_A: [GROUP_1]})
+        self.assertEqual(errors, {INSTANCE_B: failure})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the blue/green migration of a VM instance and its
+rollback, with mocked Instance objects
+"""
+import unittest
+from unittest import mock
+
+from vm_network_migration.errors import *
+from vm_network_migration.handlers.instance_migration import instance_network_migration as instance_network_migration_module
+from vm_network_migration.handlers.instance_migration.instance_network_migration import (
+    InstanceNetworkMigration,
+    MigrationStatus,
+)
+from vm_network_migration.modules.instance_modules.instance import InstanceStatus
+
+
+class TestBlueGreenMigration(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(instance_network_migration_module, 'Instance'):
+            self.handler = InstanceNetworkMigration(None, 'p', 'z', 'vm',
+                                                    'network', 'subnetwork',
+                                                    False, blue_green=True)
+        self.instance = self.handler.instance
+        self.instance.compare_original_network_and_target_network.return_value = False
+        self.instance.get_referrer_selfLinks.return_value = []
+        self.instance.get_target_pool_selfLinks.return_value = []
+        self.instance.is_replaceable.return_value = True
+        self.instance.create_boot_disk_snapshot.return_value = 'snapshot'
+        self.instance.get_instance_status.return_value = InstanceStatus.RUNNING
+        self.instance.original_status = InstanceStatus.RUNNING
+        self.instance.auto_delete_disabled_device_names = []
+        self.replacement = mock.Mock()
+        self.replacement.wait_for_instance_status.return_value = True
+        self.handler.replacement_instance = self.replacement
+
+    def test_replacement(self):
+        self.handler.network_migration()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.NEW_CREATED)
+        replacement_name = self.handler.replacement_instance_name
+        self.assertTrue(replacement_name.startswith('vm-'))
+        self.instance.create_boot_disk_snapshot.assert_called_once_with(
+            replacement_name)
+        self.instance.get_replacement_instance_configs.assert_called_once_with(
+            replacement_name, 'snapshot')
+        self.instance.delete_instance.assert_called_once_with()
+        self.instance.delete_snapshot.assert_called_once_with(
+            replacement_name)
+        # the disks of the original instance are never touched
+        self.instance.stop_instance.assert_not_called()
+        self.instance.detach_disks.assert_not_called()
+
+    def test_member_is_migrated_without_blue_green(self):
+        self.instance.get_target_pool_selfLinks.return_value = ['pool']
+        self.handler.network_migration()
+        self.instance.create_boot_disk_snapshot.assert_not_called()
+        self.instance.detach_disks.assert_called_once_with()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.NEW_CREATED)
+
+    def test_snapshot_failure(self):
+        self.instance.create_boot_disk_snapshot.side_effect = Exception()
+        with self.assertRaises(MigrationFailed):
+            self.handler.network_migration()
+        self.instance.delete_snapshot.assert_not_called()
+        self.instance.delete_instance.assert_not_called()
+        self.assertEqual(self.handler.migration_status, MigrationStatus(1))
+
+    def test_replacement_creation_failure(self):
+        self.instance.create_instance.side_effect = Exception()
+        with self.assertRaises(MigrationFailed):
+            self.handler.network_migration()
+        self.instance.delete_snapshot.assert_called_once_with(
+            self.handler.replacement_instance_name)
+        self.replacement.delete_instance.assert_not_called()
+        self.instance.delete_instance.assert_not_called()
+        self.assertEqual(self.handler.migration_status, MigrationStatus(1))
+
+    def test_replacement_not_running(self):
+        self.replacement.wait_for_instance_status.return_value = False
+        with self.assertRaises(MigrationFailed):
+            self.handler.network_migration()
+        self.replacement.delete_instance.assert_called_once_with()
+        self.instance.delete_snapshot.assert_called_once_with(
+            self.handler.replacement_instance_name)
+        self.instance.delete_instance.assert_not_called()
+
+    def test_original_deletion_failure(self):
+        self.instance.delete_instance.side_effect = Exception()
+        with self.assertRaises(MigrationFailed):
+            self.handler.network_migration()
+        self.replacement.delete_instance.assert_called_once_with()
+        self.instance.delete_snapshot.assert_called_once_with(
+            self.handler.replacement_instance_name)
+        # the original instance is kept as it is
+        self.instance.create_instance.assert_called_once()
+
+    def test_failed_rollback(self):
+        self.replacement.wait_for_instance_status.return_value = False
+        self.replacement.delete_instance.side_effect = Exception()
+        with self.assertRaises(RollbackError):
+            self.handler.network_migration()
+
+    def test_replaced_instance_cannot_be_rolled_back(self):
+        self.handler.network_migration()
+        with self.assertRaises(RollbackError):
+            self.handler.rollback()
+
+    def test_snapshot_deletion_failure_is_only_a_warning(self):
+        self.instance.delete_snapshot.side_effect = Exception()
+        self.handler.network_migration()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.NEW_CREATED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the scheduling of BulkExecutor with fake migration
+handlers
+"""
+import threading
+import time
+import unittest
+
+from vm_network_migration.handler_helper.bulk_executor import (
+    FAILED,
+    INVALID,
+    SKIPPED,
+    SUCCEEDED,
+    BulkExecutor,
+)
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
+from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+
+PREFIX = 'https://www.googleapis.com/compute/v1/projects/p/zones/'
+
+
+def instance_selfLink(zone, name):
+    return '%s%s/instances/%s' % (PREFIX, zone, name)
+
+
+class FakeHandler:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+
+    def network_migration(self):
+        self.log.start(self)
+        time.sleep(0.05)
+        self.log.finish(self)
+        if self.fail:
+            raise Exception('failed')
+
+
+class MigrationLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+
+    def start(self, handler):
+        with self.lock:
+            self.started.append(handler)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def finish(self, handler):
+        with self.lock:
+            self.running -= 1
+
+
+class FakeBulkExecutor(BulkExecutor):
+    def __init__(self, handlers, **kwargs):
+        """ A BulkExecutor whose migration handlers are given
+
+        Args:
+            handlers: selfLink -> migration handler, or None if the
+            selfLink is invalid
+        """
+        super(FakeBulkExecutor, self).__init__(None, list(handlers.keys()),
+                                               'network', 'subnetwork',
+                                               **kwargs)
+        self.handlers = handlers
+
+    def build_migration_handler(self, selfLink) -> tuple:
+        return (SelfLinkExecutor(self.compute, selfLink, self.network,
+                                 self.subnetwork, options=self.options),
+                self.handlers[selfLink])
+
+
+class TestOptions(unittest.TestCase):
+    def test_default_options(self):
+        selfLink_executor = SelfLinkExecutor(None, instance_selfLink('z-a', 'a'),
+                                             'network', 'subnetwork')
+        self.assertEqual(selfLink_executor.options.max_parallel_instances, 1)
+        self.assertFalse(selfLink_executor.options.blue_green)
+        self.assertEqual(selfLink_executor.options.health_timeout, 300)
+
+    def test_options_are_shared_by_every_resource(self):
+        options = MigrationOptions(blue_green=True)
+        log = MigrationLog()
+        handlers = {instance_selfLink('z-a', 'a'): FakeHandler(log),
+                    instance_selfLink('z-b', 'b'): FakeHandler(log)}
+        bulk_executor = FakeBulkExecutor(handlers, options=options)
+        bulk_executor.build_migration_handlers()
+        for selfLink_executor, _ in bulk_executor.pending_migrations:
+            self.assertIs(selfLink_executor.options, options)
+
+
+class TestScheduling(unittest.TestCase):
+    def test_dependencies_are_migrated_first(self):
+        log = MigrationLog()
+        a = instance_selfLink('z-a', 'a')
+        b = instance_selfLink('z-b', 'b')
+        handlers = {b: FakeHandler(log), a: FakeHandler(log)}
+        results = FakeBulkExecutor(handlers, dependencies={b: [a]}).run()
+        self.assertEqual(log.started, [handlers[a], handlers[b]])
+        self.assertEqual([result['status'] for result in results],
+                         [SUCCEEDED, SUCCEEDED])
+
+    def test_failed_dependency_skips_its_dependents(self):
+        log = MigrationLog()
+        a = instance_selfLink('z-a', 'a')
+        b = instance_selfLink('z-b', 'b')
+        c = instance_selfLink('z-c', 'c')
+        handlers = {a: FakeHandler(log, fail=True), b: FakeHandler(log),
+                    c: FakeHandler(log)}
+        results = FakeBulkExecutor(handlers, dependencies={b: [a]}).run()
+        # a failure doesn't stop the independent migrations
+        self.assertEqual([result['status'] for result in results],
+                         [FAILED, SKIPPED, SUCCEEDED])
+        self.assertNotIn(handlers[b], log.started)
+
+    def test_dependency_cycle_is_skipped(self):
+        log = MigrationLog()
+        a = instance_selfLink('z-a', 'a')
+        b = instance_selfLink('z-b', 'b')
+        handlers = {a: FakeHandler(log), b: FakeHandler(log)}
+        results = FakeBulkExecutor(handlers,
+                                   dependencies={a: [b], b: [a]}).run()
+        self.assertEqual([result['status'] for result in results],
+                         [SKIPPED, SKIPPED])
+        self.assertEqual(log.started, [])
+
+    def test_invalid_resource(self):
+        log = MigrationLog()
+        a = instance_selfLink('z-a', 'a')
+        b = instance_selfLink('z-b', 'b')
+        results = FakeBulkExecutor({a: None, b: FakeHandler(log)}).run()
+        self.assertEqual([result['status'] for result in results],
+                         [INVALID, SUCCEEDED])
+
+    def test_per_zone_cap(self):
+        log = MigrationLog()
+        handlers = {instance_selfLink('us-central1-a', str(i)):
+                        FakeHandler(log) for i in range(3)}
+        FakeBulkExecutor(handlers, max_workers=4, max_per_zone=1).run()
+        self.assertEqual(len(log.started), 3)
+        self.assertEqual(log.max_running, 1)
+
+    def test_per_region_cap_counts_zonal_resources(self):
+        log = MigrationLog()
+        handlers = {instance_selfLink('us-central1-%s' % zone, zone):
+                        FakeHandler(log) for zone in 'abcd'}
+        FakeBulkExecutor(handlers, max_workers=4, max_per_zone=2,
+                         max_per_region=2).run()
+        self.assertEqual(len(log.started), 4)
+        self.assertEqual(log.max_running, 2)
+
+    def test_worker_budget(self):
+        log = MigrationLog()
+        handlers = {instance_selfLink('zone-%d' % i, str(i)):
+                        FakeHandler(log) for i in range(5)}
+        FakeBulkExecutor(handlers, max_workers=3).run()
+        self.assertEqual(len(log.started), 5)
+        self.assertEqual(log.max_running, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of ForwardingRuleIndex.build_index with a fake compute
+engine API
+"""
+import unittest
+
+from vm_network_migration.handler_helper.migration_run import migration_run
+from vm_network_migration.modules.forwarding_rule_modules.forwarding_rule_index import (
+    DEFAULT_FORWARDING_RULE_INDEX,
+    ForwardingRuleIndex,
+)
+
+BACKEND_SERVICE_1 = 'https://www.googleapis.com/compute/v1/projects/p/regions/r/backendServices/backend-service-1'
+BACKEND_SERVICE_2 = 'https://www.googleapis.com/compute/v1/projects/p/global/backendServices/backend-service-2'
+
+
+class FakeRequest:
+    def __init__(self, response, next_request=None):
+        self.response = response
+        self.next_request = next_request
+
+    def execute(self):
+        return self.response
+
+
+class FakeApi:
+    def __init__(self, pages):
+        """ A fake forwardingRules or globalForwardingRules API
+
+        Args:
+            pages: the responses of the list requests, page by page
+        """
+        request = None
+        for page in reversed(pages):
+            request = FakeRequest(page, request)
+        self.first_request = request
+
+    def list(self, project, **kwargs):
+        return self.first_request
+
+    def list_next(self, previous_request, previous_response):
+        return previous_request.next_request
+
+    aggregatedList = list
+    aggregatedList_next = list_next
+
+
+class FakeCompute:
+    def __init__(self, regional_pages, global_pages):
+        self.regional_api = FakeApi(regional_pages)
+        self.global_api = FakeApi(global_pages)
+
+    def forwardingRules(self):
+        return self.regional_api
+
+    def globalForwardingRules(self):
+        return self.global_api
+
+
+class TestForwardingRuleIndex(unittest.TestCase):
+    def testBuildIndex(self):
+        regional_rule_1 = {'name': 'regional-rule-1',
+                           'backendService': BACKEND_SERVICE_1}
+        regional_rule_2 = {'name': 'regional-rule-2',
+                           'backendService': 'projects/p/regions/r/backendServices/backend-service-1'}
+        target_pool_rule = {'name': 'target-pool-rule',
+                            'target': 'projects/p/regions/r/targetPools/pool'}
+        global_rule = {'name': 'global-rule',
+                       'backendService': BACKEND_SERVICE_2}
+        compute = FakeCompute(
+            regional_pages=[
+                {'items': {
+                    'regions/r': {'forwardingRules': [regional_rule_1,
+                                                      target_pool_rule]},
+                    'regions/s': {'warning': {'code': 'NO_RESULTS_ON_PAGE'}}}},
+                {'items': {
+                    'regions/r': {'forwardingRules': [regional_rule_2]}}}],
+            global_pages=[{'items': [global_rule]}, {}])
+        index = ForwardingRuleIndex().build_index(compute, 'p')
+        self.assertEqual(index, {
+            'projects/p/regions/r/backendServices/backend-service-1': [
+                regional_rule_1, regional_rule_2],
+            'projects/p/global/backendServices/backend-service-2': [
+                global_rule]})
+
+    def testGlobalScopeOfTheAggregatedListIsIndexedOnce(self):
+        global_rule = {
+            'name': 'global-rule',
+            'selfLink': 'https://www.googleapis.com/compute/v1/projects/p/global/forwardingRules/global-rule',
+            'backendService': BACKEND_SERVICE_2}
+        compute = FakeCompute(
+            regional_pages=[{'items': {
+                'global': {'forwardingRules': [global_rule]}}}],
+            global_pages=[{'items': [global_rule]}])
+        index = ForwardingRuleIndex().build_index(compute, 'p')
+        self.assertEqual(index, {
+            'projects/p/global/backendServices/backend-service-2': [
+                global_rule]})
+
+    def testMigrationRunDropsTheDefaultIndex(self):
+        DEFAULT_FORWARDING_RULE_INDEX.indexes['p'] = {}
+        DEFAULT_FORWARDING_RULE_INDEX.lookups['p'] = 1
+        with migration_run(None):
+            self.assertEqual(DEFAULT_FORWARDING_RULE_INDEX.indexes, {})
+            self.assertEqual(DEFAULT_FORWARDING_RULE_INDEX.lookups, {})
+
+    def testLookupsUseTheIndexAfterTheFilteredLookups(self):
+        rule = {'name': 'rule', 'backendService': BACKEND_SERVICE_2}
+        compute = FakeCompute(regional_pages=[{}],
+                              global_pages=[{'items': [rule]}])
+        forwarding_rule_index = ForwardingRuleIndex(filtered_lookups=1)
+        self.assertEqual(forwarding_rule_index.get_forwarding_rules(
+            compute, 'p', BACKEND_SERVICE_2), [rule])
+        self.assertNotIn('p', forwarding_rule_index.indexes)
+        self.assertEqual(forwarding_rule_index.get_forwarding_rules(
+            compute, 'p', BACKEND_SERVICE_2), [rule])
+        self.assertIn('p', forwarding_rule_index.indexes)
+        forwarding_rule_index.invalidate()
+        self.assertEqual(forwarding_rule_index.indexes, {})
+        self.assertEqual(forwarding_rule_index.lookups, {})
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
@@ -0,0 +1,146 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the backend patches of a global backend service,
+with a mocked API
+"""
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from vm_network_migration.modules.backend_service_modules.global_backend_service import GlobalBackendService
+from vm_network_migration.modules.other_modules.resource_store import DEFAULT_RESOURCE_STORE
+from vm_network_migration_end_to_end_tests.test_offline_checks.test_operations import build_http_error
+
+GROUPS = ['projects/p/zones/z/instanceGroups/ig%d' % i for i in range(2)]
+
+
+class FakeBackendServices(object):
+    """ The backendServices API of a single backend service, which
+    changes its fingerprint with every write
+    """
+
+    def __init__(self, return_fingerprint):
+        self.config = {
+            'name': 'bs',
+            'selfLink': 'https://www.googleapis.com/compute/v1/projects/p/global/backendServices/bs',
+            'backends': [{'group': group} for group in GROUPS],
+            'fingerprint': 'f0'
+        }
+        self.return_fingerprint = return_fingerprint
+        self.writes = 0
+        self.requests = []
+
+    def get(self, project, backendService):
+        def execute():
+            self.requests.append('get')
+            return dict(self.config)
+
+        return mock.Mock(execute=execute)
+
+    def write(self, method_name, body):
+        def execute():
+            self.requests.append(method_name)
+            if body['fingerprint'] != self.config['fingerprint']:
+                raise build_http_error(412, 'Invalid fingerprint')
+            self.writes += 1
+            self.config['backends'] = body['backends']
+            self.config['fingerprint'] = 'f%d' % (self.writes)
+            operation = {'name': 'operation-%d' % (self.writes)}
+            if self.return_fingerprint:
+                operation['fingerprint'] = self.config['fingerprint']
+            return operation
+
+        return mock.Mock(execute=execute)
+
+    def patch(self, project, backendService, body):
+        return self.write('patch', body)
+
+    def update(self, project, backendService, body):
+        return self.write('update', body)
+
+
+def build_global_backend_service(backend_services):
+    compute = mock.Mock()
+    compute.backendServices.return_value = backend_services
+    with mock.patch.object(GlobalBackendService, 'log'):
+        backend_service = GlobalBackendService(compute, 'p', 'bs', 'network',
+                                               'subnetwork', False)
+    backend_service.operations = mock.Mock()
+    return backend_service
+
+
+class TestPatchBackends(unittest.TestCase):
+    def setUp(self):
+        DEFAULT_RESOURCE_STORE.invalidate()
+        self.addCleanup(DEFAULT_RESOURCE_STORE.invalidate)
+
+    def test_detach_and_reattach_without_get(self):
+        backend_services = FakeBackendServices(return_fingerprint=True)
+        backend_service = build_global_backend_service(backend_services)
+        backend_service.detach_a_backend(GROUPS[0])
+        backend_service.reattach_all_backends()
+        # the only GET is the one which loads the backend service
+        self.assertEqual(backend_services.requests,
+                         ['get', 'patch', 'patch'])
+        self.assertEqual(backend_services.config['backends'],
+                         [{'group': group} for group in GROUPS])
+
+    def test_stale_fingerprint_is_read_again(self):
+        backend_services = FakeBackendServices(return_fingerprint=False)
+        backend_service = build_global_backend_service(backend_services)
+        backend_service.detach_a_backend(GROUPS[0])
+        backend_service.reattach_all_backends()
+        self.assertEqual(backend_services.requests,
+                         ['get', 'patch', 'patch', 'get', 'patch'])
+        self.assertEqual(backend_service.fingerprint, 'f1')
+        self.assertEqual(backend_services.config['backends'],
+                         [{'group': group} for group in GROUPS])
+
+    def test_current_backends_are_read_again(self):
+        backend_services = FakeBackendServices(return_fingerprint=True)
+        backend_service = build_global_backend_service(backend_services)
+        # another client adds a backend
+        backend_services.config = dict(
+            backend_services.config, fingerprint='changed',
+            backends=backend_services.config['backends'] + [
+                {'group': 'projects/p/zones/z/instanceGroups/other'}])
+        backend_service.remove_a_backend(GROUPS[0])
+        self.assertEqual(backend_services.requests,
+                         ['get', 'patch', 'get', 'patch'])
+        self.assertEqual(backend_services.config['backends'], [
+            {'group': GROUPS[1]},
+            {'group': 'projects/p/zones/z/instanceGroups/other'}])
+
+    def test_last_backend_is_cleared_with_an_update(self):
+        backend_services = FakeBackendServices(return_fingerprint=True)
+        backend_service = build_global_backend_service(backend_services)
+        backend_service.update_current_backends(lambda backends: [])
+        self.assertEqual(backend_services.requests, ['get', 'update'])
+        self.assertEqual(backend_services.config['backends'], [])
+
+    def test_other_errors_are_raised(self):
+        backend_services = FakeBackendServices(return_fingerprint=True)
+        backend_service = build_global_backend_service(backend_services)
+        request = mock.Mock()
+        request.execute.side_effect = build_http_error(400, 'Invalid')
+        with mock.patch.object(backend_services, 'patch',
+                               return_value=request):
+            with self.assertRaises(HttpError):
+                backend_service.detach_a_backend(GROUPS[0])
+        self.assertEqual(request.execute.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
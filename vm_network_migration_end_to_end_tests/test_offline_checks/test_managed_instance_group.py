@@ -0,0 +1,40 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the managed instance group module, which don't call
+the Google Cloud APIs
+"""
+import unittest
+
+from vm_network_migration.modules.instance_group_modules.managed_instance_group import build_fixed_or_percent
+
+
+class TestBuildFixedOrPercent(unittest.TestCase):
+    def testFixedNumber(self):
+        self.assertEqual(build_fixed_or_percent(3), {'fixed': 3})
+        self.assertEqual(build_fixed_or_percent('3'), {'fixed': 3})
+        self.assertEqual(build_fixed_or_percent(0), {'fixed': 0})
+
+    def testPercentage(self):
+        self.assertEqual(build_fixed_or_percent('20%'), {'percent': 20})
+        self.assertEqual(build_fixed_or_percent(' 100% '), {'percent': 100})
+
+    def testInvalidValue(self):
+        with self.assertRaises(ValueError):
+            build_fixed_or_percent('a few')
+        with self.assertRaises(ValueError):
+            build_fixed_or_percent('%')
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
@@ -0,0 +1,79 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of MetadataCache and its scope
+"""
+import unittest
+from unittest import mock
+
+from vm_network_migration.handler_helper.migration_run import migration_run
+from vm_network_migration.modules.other_modules import metadata_cache as metadata_cache_module
+from vm_network_migration.modules.other_modules.metadata_cache import (
+    DEFAULT_METADATA_CACHE,
+    MetadataCache,
+)
+
+
+class TestMetadataCache(unittest.TestCase):
+    def testValueIsLoadedOnce(self):
+        metadata_cache = MetadataCache()
+        load = mock.Mock(return_value='us-central1')
+        self.assertEqual(metadata_cache.get('zone', load), 'us-central1')
+        self.assertEqual(metadata_cache.get('zone', load), 'us-central1')
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(metadata_cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def testFailedLoadIsNotCached(self):
+        metadata_cache = MetadataCache()
+        with self.assertRaises(ValueError):
+            metadata_cache.get('zone', mock.Mock(side_effect=ValueError))
+        self.assertEqual(metadata_cache.get('zone', lambda: 'us-central1'),
+                         'us-central1')
+
+    def testExpiredValueIsLoadedAgain(self):
+        metadata_cache = MetadataCache(ttl=10)
+        load = mock.Mock(return_value='us-central1')
+        with mock.patch.object(metadata_cache_module.time, 'monotonic',
+                               return_value=100):
+            metadata_cache.get('zone', load)
+        with mock.patch.object(metadata_cache_module.time, 'monotonic',
+                               return_value=105):
+            metadata_cache.get('zone', load)
+        self.assertEqual(load.call_count, 1)
+        with mock.patch.object(metadata_cache_module.time, 'monotonic',
+                               return_value=111):
+            metadata_cache.get('zone', load)
+        self.assertEqual(load.call_count, 2)
+
+    def testInvalidate(self):
+        metadata_cache = MetadataCache()
+        metadata_cache.get('zone-1', lambda: 'us-central1')
+        metadata_cache.get('zone-2', lambda: 'us-east1')
+        metadata_cache.invalidate('zone-1')
+        self.assertEqual(list(metadata_cache.entries.keys()), ['zone-2'])
+        metadata_cache.invalidate()
+        self.assertEqual(metadata_cache.entries, {})
+        self.assertEqual(metadata_cache.get_stats(), {'hits': 0, 'misses': 0})
+
+    def testMigrationRunClearsTheDefaultCache(self):
+        DEFAULT_METADATA_CACHE.get('zone', lambda: 'us-central1')
+        with migration_run(None):
+            self.assertEqual(DEFAULT_METADATA_CACHE.entries, {})
+            DEFAULT_METADATA_CACHE.get('zone', lambda: 'us-central1')
+            with migration_run(None):
+                # A nested run keeps the cache of the outer run
+                self.assertIn('zone', DEFAULT_METADATA_CACHE.entries)
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
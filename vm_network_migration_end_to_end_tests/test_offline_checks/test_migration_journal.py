@@ -0,0 +1,217 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of MigrationJournal, and of resuming from it
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from vm_network_migration.handler_helper.bulk_executor import SUCCEEDED
+from vm_network_migration.handlers.instance_migration import instance_network_migration as instance_network_migration_module
+from vm_network_migration.handlers.instance_migration.instance_network_migration import (
+    InstanceNetworkMigration,
+    MigrationStatus,
+)
+from vm_network_migration.modules.instance_modules.instance import InstanceStatus
+from vm_network_migration.modules.other_modules.migration_journal import (
+    DEFAULT_MIGRATION_JOURNAL,
+    MigrationJournal,
+)
+from vm_network_migration_end_to_end_tests.test_offline_checks.test_bulk_executor import (
+    FakeBulkExecutor,
+    FakeHandler,
+    MigrationLog,
+    instance_selfLink,
+)
+
+INSTANCE = 'projects/p/zones/z/instances/a'
+
+
+class TestMigrationJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_closed_journal_writes_nothing(self):
+        journal = MigrationJournal()
+        journal.record_config(INSTANCE, {'name': 'a'})
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertEqual(journal.load(self.file_path), {})
+
+    def test_load_latest_state(self):
+        journal = MigrationJournal(self.file_path)
+        journal.record_config('https://www.googleapis.com/compute/v1/' +
+                              INSTANCE, {'name': 'a'})
+        # the initial and the repeated statuses are not recorded
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(0))
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        journal.record_status(INSTANCE, 'Handler',
+                              MigrationStatus.DISK_DETACHED,
+                              {'detached_device_names': ['disk']})
+        journal.close()
+        with open(self.file_path) as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 3)
+        entry = MigrationJournal().load(self.file_path)[INSTANCE]
+        self.assertEqual(entry['config'], {'name': 'a'})
+        self.assertEqual(entry['handler'], 'Handler')
+        self.assertEqual(entry['status'], 3)
+        self.assertEqual(entry['status_name'], 'DISK_DETACHED')
+        self.assertEqual(entry['state'], {'detached_device_names': ['disk']})
+        self.assertIsNone(entry['result'])
+
+    def test_first_config_is_kept_across_runs(self):
+        journal = MigrationJournal(self.file_path)
+        journal.record_config(INSTANCE, {'name': 'original'})
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        journal.record_result(INSTANCE, 'FAILED', 'error')
+        # a later run appends to the same file
+        journal.open(self.file_path)
+        journal.record_config(INSTANCE, {'name': 'changed'})
+        journal.close()
+        entry = journal.load(self.file_path)[INSTANCE]
+        self.assertEqual(entry['config'], {'name': 'original'})
+        self.assertEqual(entry['result'], 'FAILED')
+
+    def test_new_status_clears_the_result(self):
+        journal = MigrationJournal(self.file_path)
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        journal.record_result(INSTANCE, 'FAILED')
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(2))
+        journal.close()
+        entry = journal.load(self.file_path)[INSTANCE]
+        self.assertEqual(entry['status'], 2)
+        self.assertIsNone(entry['result'])
+
+    def test_broken_last_line_is_ignored(self):
+        journal = MigrationJournal(self.file_path)
+        journal.record_status(INSTANCE, 'Handler', MigrationStatus(1))
+        journal.close()
+        with open(self.file_path, 'a') as journal_file:
+            journal_file.write('{"event": "status", "selfL')
+        entry = journal.load(self.file_path)[INSTANCE]
+        self.assertEqual(entry['status'], 1)
+
+
+class ResumableHandler(FakeHandler):
+    def resume(self, journal_entry):
+        self.journal_entry = journal_entry
+        self.network_migration()
+
+
+class TestBulkResume(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        DEFAULT_MIGRATION_JOURNAL.open(
+            os.path.join(self.directory, 'journal.jsonl'))
+
+    def tearDown(self):
+        DEFAULT_MIGRATION_JOURNAL.close()
+        shutil.rmtree(self.directory)
+
+    def test_resume(self):
+        succeeded = instance_selfLink('z-a', 'succeeded')
+        interrupted = instance_selfLink('z-b', 'interrupted')
+        new = instance_selfLink('z-c', 'new')
+        DEFAULT_MIGRATION_JOURNAL.record_status(succeeded, 'Handler',
+                                                MigrationStatus(5))
+        DEFAULT_MIGRATION_JOURNAL.record_result(succeeded, SUCCEEDED)
+        DEFAULT_MIGRATION_JOURNAL.record_status(interrupted, 'Handler',
+                                                MigrationStatus(3))
+        log = MigrationLog()
+        handlers = {succeeded: ResumableHandler(log),
+                    interrupted: ResumableHandler(log),
+                    new: ResumableHandler(log)}
+        results = FakeBulkExecutor(handlers, resume=True).run()
+        self.assertEqual([result['status'] for result in results],
+                         [SUCCEEDED] * 3)
+        self.assertEqual(set(log.started),
+                         {handlers[interrupted], handlers[new]})
+        self.assertEqual(handlers[interrupted].journal_entry['status'], 3)
+        self.assertFalse(hasattr(handlers[new], 'journal_entry'))
+
+
+class TestInstanceResume(unittest.TestCase):
+    def build_handler(self, live_status, live_disks, keep_disks_on_delete=False):
+        with mock.patch.object(instance_network_migration_module, 'Instance'):
+            handler = InstanceNetworkMigration(None, 'p', 'z', 'a', 'network',
+                                               'subnetwork', False,
+                                               keep_disks_on_delete)
+        handler.instance.get_instance_status.return_value = live_status
+        handler.instance.retrieve_instance_configs.return_value = {
+            'disks': live_disks}
+        handler.instance.is_using_target_subnet.return_value = False
+        handler.instance.original_instance_configs = {'disks': [
+            {'deviceName': 'boot', 'autoDelete': True},
+            {'deviceName': 'data', 'autoDelete': True}]}
+        return handler
+
+    def test_deleted_instance(self):
+        handler = self.build_handler(InstanceStatus.NOTEXISTS, [])
+        self.assertEqual(handler.reconcile_migration_status(
+            MigrationStatus.DISK_DETACHED), MigrationStatus.ORIGINAL_DELETED)
+
+    def test_unfinished_deletion(self):
+        handler = self.build_handler(InstanceStatus.TERMINATED, [])
+        self.assertEqual(handler.reconcile_migration_status(
+            MigrationStatus.ORIGINAL_DELETED), MigrationStatus.DISK_DETACHED)
+        self.assertEqual(handler.instance.detached_device_names,
+                         ['boot', 'data'])
+
+    def test_unrecorded_detach(self):
+        handler = self.build_handler(InstanceStatus.TERMINATED, [
+            {'deviceName': 'boot', 'autoDelete': True}])
+        self.assertEqual(handler.reconcile_migration_status(
+            MigrationStatus.MIGRATING), MigrationStatus.DISK_DETACHED)
+        self.assertEqual(handler.instance.detached_device_names, ['data'])
+
+    def test_unrecorded_auto_delete_change(self):
+        handler = self.build_handler(InstanceStatus.RUNNING, [
+            {'deviceName': 'boot', 'autoDelete': False},
+            {'deviceName': 'data', 'autoDelete': True}],
+                                     keep_disks_on_delete=True)
+        self.assertEqual(handler.reconcile_migration_status(
+            MigrationStatus.NEW_CREATED),
+            MigrationStatus.DISK_AUTO_DELETE_DISABLED)
+        self.assertEqual(handler.instance.auto_delete_disabled_device_names,
+                         ['boot'])
+
+    def test_resume_rolls_back_then_migrates(self):
+        handler = self.build_handler(InstanceStatus.TERMINATED, [
+            {'deviceName': 'boot', 'autoDelete': True}])
+        calls = []
+        handler.rollback = lambda: calls.append('rollback')
+        handler.network_migration = lambda: calls.append('migrate')
+        handler.resume({'config': None, 'status': 3, 'state': {
+            'detached_device_names': ['data']}})
+        self.assertEqual(handler.migration_status,
+                         MigrationStatus.DISK_DETACHED)
+        self.assertEqual(calls, ['rollback', 'migrate'])
+
+    def test_resume_keeps_finished_migration(self):
+        handler = self.build_handler(InstanceStatus.RUNNING, [])
+        handler.instance.is_using_target_subnet.return_value = True
+        handler.network_migration = mock.Mock()
+        handler.resume({'config': None, 'status': 4, 'state': {}})
+        handler.network_migration.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
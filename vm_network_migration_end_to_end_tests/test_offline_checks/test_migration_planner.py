@@ -0,0 +1,131 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of MigrationPlanner with a fake discovery
+"""
+import unittest
+
+from vm_network_migration.handler_helper.migration_planner import MigrationPlanner
+
+FORWARDING_RULE = 'projects/p/global/forwardingRules/fr'
+INTERNAL_FORWARDING_RULE = 'projects/p/regions/r/forwardingRules/ilb'
+PROXY = 'projects/p/global/targetHttpProxies/proxy'
+URL_MAP = 'projects/p/global/urlMaps/map'
+BACKEND_SERVICE_1 = 'projects/p/global/backendServices/bs1'
+BACKEND_SERVICE_2 = 'projects/p/global/backendServices/bs2'
+BACKEND_SERVICE_3 = 'projects/p/global/backendServices/bs3'
+INTERNAL_BACKEND_SERVICE = 'projects/p/regions/r/backendServices/ibs'
+GROUP_1 = 'projects/p/zones/z/instanceGroups/g1'
+GROUP_2 = 'projects/p/zones/z/instanceGroups/g2'
+GROUP_3 = 'projects/p/zones/z/instanceGroups/g3'
+TARGET_POOL = 'projects/p/regions/r/targetPools/pool'
+INSTANCE_1 = 'projects/p/zones/z/instances/i1'
+INSTANCE_2 = 'projects/p/zones/z/instances/i2'
+
+PREFIX = 'https://www.googleapis.com/compute/v1/'
+
+CONFIGS = {
+    FORWARDING_RULE: {'target': PREFIX + PROXY,
+                      'loadBalancingScheme': 'EXTERNAL'},
+    PROXY: {'urlMap': PREFIX + URL_MAP},
+    URL_MAP: {'defaultService': PREFIX + BACKEND_SERVICE_1,
+              'pathMatchers': [
+                  {'defaultService': PREFIX + BACKEND_SERVICE_2}]},
+    BACKEND_SERVICE_1: {'backends': [{'group': PREFIX + GROUP_1},
+                                     {'group': PREFIX + GROUP_2}]},
+    BACKEND_SERVICE_2: {'backends': [{'group': PREFIX + GROUP_2}]},
+    BACKEND_SERVICE_3: {'backends': [{'group': PREFIX + GROUP_3}]},
+    INTERNAL_FORWARDING_RULE: {
+        'backendService': PREFIX + INTERNAL_BACKEND_SERVICE,
+        'loadBalancingScheme': 'INTERNAL'},
+    INTERNAL_BACKEND_SERVICE: {'backends': [{'group': PREFIX + GROUP_3}]},
+    GROUP_1: {}, GROUP_2: {}, GROUP_3: {},
+    TARGET_POOL: {'instances': [PREFIX + INSTANCE_1]},
+    INSTANCE_1: {}, INSTANCE_2: {},
+}
+
+
+class FakeBatchDiscovery:
+    def __init__(self, configs, referrers=None):
+        self.configs = configs
+        self.referrers = referrers or {}
+        # the selfLinks fetched by each call of get_resources
+        self.levels = []
+
+    def get_resources(self, selfLinks):
+        self.levels.append(list(selfLinks))
+        configs = {selfLink: self.configs[selfLink] for selfLink in selfLinks
+                   if selfLink in self.configs}
+        errors = {selfLink: Exception('not found') for selfLink in selfLinks
+                  if selfLink not in self.configs}
+        return configs, errors
+
+    def list_referrers(self, instance_selfLinks):
+        return {selfLink: self.referrers.get(selfLink, []) for selfLink in
+                instance_selfLinks}, {}
+
+
+def build_planner(selfLinks, referrers=None):
+    planner = MigrationPlanner(None, selfLinks)
+    planner.batch_discovery = FakeBatchDiscovery(CONFIGS, referrers)
+    return planner
+
+
+class TestPlan(unittest.TestCase):
+    def test_graph_is_fetched_level_by_level(self):
+        planner = build_planner([PREFIX + FORWARDING_RULE])
+        planner.plan()
+        self.assertEqual(planner.batch_discovery.levels, [
+            [FORWARDING_RULE], [PROXY], [URL_MAP],
+            [BACKEND_SERVICE_1, BACKEND_SERVICE_2], [GROUP_1, GROUP_2]])
+
+    def test_units_sharing_a_backend_are_ordered(self):
+        planner = build_planner([FORWARDING_RULE, BACKEND_SERVICE_3])
+        units = planner.plan()
+        # an external forwarding rule isn't migrated, only its backends
+        self.assertEqual(units, [BACKEND_SERVICE_1, BACKEND_SERVICE_2,
+                                 BACKEND_SERVICE_3])
+        self.assertEqual(planner.dependencies, {
+            BACKEND_SERVICE_1: [],
+            BACKEND_SERVICE_2: [BACKEND_SERVICE_1],
+            BACKEND_SERVICE_3: []})
+        self.assertEqual(planner.get_waves(), [
+            [BACKEND_SERVICE_1, BACKEND_SERVICE_3], [BACKEND_SERVICE_2]])
+
+    def test_internal_forwarding_rule_absorbs_its_backends(self):
+        planner = build_planner([INTERNAL_BACKEND_SERVICE,
+                                 INTERNAL_FORWARDING_RULE])
+        self.assertEqual(planner.plan(), [INTERNAL_FORWARDING_RULE])
+        self.assertEqual(planner.get_waves(), [[INTERNAL_FORWARDING_RULE]])
+
+    def test_managed_instance_group_is_its_instance_group(self):
+        planner = build_planner([
+            'projects/p/zones/z/instanceGroupManagers/g1', BACKEND_SERVICE_1])
+        self.assertEqual(planner.plan(), [BACKEND_SERVICE_1])
+
+    def test_target_pool_absorbs_the_groups_of_its_instances(self):
+        planner = build_planner([GROUP_1, TARGET_POOL, INSTANCE_2],
+                                referrers={INSTANCE_1: [PREFIX + GROUP_1]})
+        self.assertEqual(planner.plan(), [TARGET_POOL, INSTANCE_2])
+        self.assertIn(GROUP_1, planner.children[TARGET_POOL])
+        self.assertEqual(planner.get_waves(), [[TARGET_POOL, INSTANCE_2]])
+
+    def test_missing_resource_is_reported(self):
+        planner = build_planner(['projects/p/zones/z/instances/missing'])
+        self.assertEqual(planner.plan(),
+                         ['projects/p/zones/z/instances/missing'])
+        self.assertIn('projects/p/zones/z/instances/missing', planner.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
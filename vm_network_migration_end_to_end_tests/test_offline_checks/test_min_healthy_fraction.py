@@ -0,0 +1,134 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of min_healthy_fraction of a global backend service
+migration, with mocked backend migration handlers
+"""
+import threading
+import time
+import unittest
+from unittest import mock
+
+from vm_network_migration.errors import *
+from vm_network_migration.handlers.backend_service_migration.global_backend_service_migration import GlobalBackendServiceNetworkMigration
+
+GROUPS = ['projects/p/zones/z/instanceGroups/g%d' % i for i in range(4)]
+
+
+class TestMinHealthyFraction(unittest.TestCase):
+    def build_migration(self, groups, min_healthy_fraction, **kwargs):
+        backend_service = mock.Mock()
+        backend_service.backend_service_configs = {
+            'backends': [{'group': group} for group in groups]}
+        migration = GlobalBackendServiceNetworkMigration(
+            None, 'p', 'bs', 'network', 'subnetwork', False, backend_service,
+            min_healthy_fraction=min_healthy_fraction, **kwargs)
+        migration.health_gate = mock.Mock()
+        # the attached backends are healthy
+        migration.health_gate.check.side_effect = lambda selfLinks: {
+            selfLink: True for selfLink in selfLinks}
+        self.lock = threading.Lock()
+        self.events = []
+        self.min_attached = len(groups)
+        handlers = []
+        for group in groups:
+            handler = mock.Mock()
+            handler.network_migration.side_effect = \
+                lambda group=group: self.migrate(migration, groups, group)
+            handlers.append(({'group': group}, handler))
+        migration.build_backend_migration_handlers = lambda: list(handlers)
+        return migration
+
+    def migrate(self, migration, groups, group):
+        with self.lock:
+            self.events.append(group)
+            self.min_attached = min(
+                self.min_attached,
+                len(groups) - len(migration.detached_backends))
+        time.sleep(0.05)
+
+    def test_bounds(self):
+        migration = self.build_migration(GROUPS, 0.75)
+        migration.check_min_healthy_fraction(4)
+        with self.assertRaises(MigrationFailed):
+            migration.check_min_healthy_fraction(1)
+        migration.min_healthy_fraction = 0.8
+        with self.assertRaises(MigrationFailed):
+            migration.check_min_healthy_fraction(4)
+        migration.min_healthy_fraction = None
+        migration.check_min_healthy_fraction(1)
+
+    def test_can_take_out_a_backend(self):
+        backends = [{'group': group} for group in GROUPS]
+        migration = self.build_migration(GROUPS, 0.5)
+        migration.detached_backends.add(GROUPS[0])
+        self.assertTrue(migration.can_take_out_a_backend(backends,
+                                                         backends[1]))
+        migration.detached_backends.add(GROUPS[1])
+        self.assertFalse(migration.can_take_out_a_backend(backends,
+                                                          backends[2]))
+        # an unhealthy backend doesn't count
+        migration.detached_backends.clear()
+        migration.health_gate.check.side_effect = lambda selfLinks: {
+            selfLink: selfLink != GROUPS[3] for selfLink in selfLinks}
+        self.assertTrue(migration.can_take_out_a_backend(backends,
+                                                         backends[3]))
+        self.assertTrue(migration.can_take_out_a_backend(backends,
+                                                         backends[0]))
+        migration.detached_backends.add(GROUPS[0])
+        self.assertFalse(migration.can_take_out_a_backend(backends,
+                                                          backends[1]))
+
+    def test_floor_is_kept(self):
+        migration = self.build_migration(GROUPS, 0.5,
+                                         max_parallel_backends=4)
+        migration.network_migration()
+        self.assertEqual(sorted(self.events), GROUPS)
+        # at most 2 of the 4 backends are detached at the same time
+        self.assertEqual(self.min_attached, 2)
+
+    def test_unreachable_floor_doesnt_start(self):
+        migration = self.build_migration(GROUPS[:1], 0.5)
+        with self.assertRaises(MigrationFailed):
+            migration.network_migration()
+        self.assertEqual(self.events, [])
+
+    def test_unhealthy_backends_time_out(self):
+        migration = self.build_migration(GROUPS, 0.5, health_timeout=-1)
+
+        def check(selfLinks):
+            # wake up the scheduler at once instead of its next poll
+            migration.scheduler_event.set()
+            return {selfLink: False for selfLink in selfLinks}
+
+        migration.health_gate.check.side_effect = check
+        with self.assertRaises(MigrationFailed):
+            migration.network_migration()
+        self.assertEqual(self.events, [])
+
+    def test_failed_backend_stops_the_others(self):
+        migration = self.build_migration(GROUPS, 0.5)
+        handlers = migration.build_backend_migration_handlers()
+        handlers[0][1].network_migration.side_effect = Exception('failed')
+        migration.build_backend_migration_handlers = lambda: list(handlers)
+        with self.assertRaises(Exception):
+            migration.network_migration()
+        self.assertEqual(self.events, [])
+        # the failed backend stays detached until the rollback
+        self.assertEqual(migration.detached_backends, {GROUPS[0]})
+        self.assertEqual(migration.backend_migration_handlers,
+                         [handlers[0][1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
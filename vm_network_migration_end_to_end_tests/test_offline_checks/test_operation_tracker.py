@@ -0,0 +1,141 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of OperationTracker with a fake batch API
+"""
+import threading
+import unittest
+
+from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.operation_tracker import OperationTracker
+from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+
+
+class FakeOperationsApi:
+    def __init__(self, compute):
+        self.compute = compute
+
+    def get(self, project, operation, zone=None, region=None):
+        return operation
+
+
+class FakeBatch:
+    def __init__(self, compute, callback):
+        self.compute = compute
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        with self.compute.lock:
+            self.compute.batches.append(
+                [operation for _, operation in self.requests])
+        for request_id, operation in self.requests:
+            self.callback(request_id, self.compute.get_status(operation),
+                          None)
+
+
+class FakeCompute:
+    def __init__(self, checks_before_done):
+        """ A fake compute engine API
+
+        Args:
+            checks_before_done: operation name -> the number of status
+            checks which return RUNNING before the operation is DONE
+        """
+        self.checks_before_done = dict(checks_before_done)
+        self.lock = threading.Lock()
+        # the operation names checked by each batch request
+        self.batches = []
+
+    def get_status(self, operation):
+        with self.lock:
+            if self.checks_before_done[operation] > 0:
+                self.checks_before_done[operation] -= 1
+                return {'name': operation, 'status': 'RUNNING'}
+        if operation.startswith('failed'):
+            return {'name': operation, 'status': 'DONE',
+                    'error': {'errors': [{'code': 'FAILED'}]}}
+        return {'name': operation, 'status': 'DONE'}
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def zoneOperations(self):
+        return FakeOperationsApi(self)
+
+    regionOperations = zoneOperations
+    globalOperations = zoneOperations
+
+
+class TestOperationTracker(unittest.TestCase):
+    def buildTracker(self, compute):
+        operation_tracker = OperationTracker(
+            compute,
+            polling_strategy=PollingStrategy(
+                jitter=0, latency_profiles={
+                    'default': {'first_check': 0.01, 'max_delay': 0.01}}))
+        self.addCleanup(operation_tracker.close)
+        return operation_tracker
+
+    def testOperationsAreCheckedTogether(self):
+        compute = FakeCompute({'operation-%s' % i: 2 for i in range(10)})
+        operation_tracker = self.buildTracker(compute)
+        futures = [operation_tracker.register_zone_operation(
+            'operation-%s' % i, 'p', 'z') for i in range(10)]
+        for i, future in enumerate(futures):
+            self.assertEqual(future.result(timeout=5),
+                             {'name': 'operation-%s' % i, 'status': 'DONE'})
+        # 3 status checks of 10 operations need far fewer than 30 requests
+        self.assertLess(len(compute.batches), 10)
+        self.assertEqual(operation_tracker.pending_operations, {})
+
+    def testOperationError(self):
+        compute = FakeCompute({'failed-operation': 0, 'region-operation': 0})
+        operation_tracker = self.buildTracker(compute)
+        with self.assertRaises(ZoneOperationsError):
+            operation_tracker.register_zone_operation(
+                'failed-operation', 'p', 'z').result(timeout=5)
+        self.assertEqual(operation_tracker.register_region_operation(
+            'region-operation', 'p', 'r').result(timeout=5)['status'], 'DONE')
+
+    def testCloseFailsPendingOperations(self):
+        compute = FakeCompute({'operation-1': 10 ** 6})
+        operation_tracker = self.buildTracker(compute)
+        future = operation_tracker.register_zone_operation('operation-1',
+                                                           'p', 'z')
+        operation_tracker.close()
+        self.assertFalse(operation_tracker.is_open())
+        with self.assertRaises(OperationTimeoutError):
+            future.result(timeout=5)
+        with self.assertRaises(OperationTimeoutError):
+            operation_tracker.register_zone_operation('operation-2', 'p', 'z')
+
+    def testOperationsWaitWithTheTracker(self):
+        compute = FakeCompute({'operation-1': 1, 'failed-operation': 1})
+        operation_tracker = self.buildTracker(compute)
+        operations = Operations(None, 'p', zone='z',
+                                operation_tracker=operation_tracker)
+        errors = operations.wait_for_zone_operations(['operation-1',
+                                                      'failed-operation'])
+        self.assertEqual(errors['operation-1'], None)
+        self.assertIsInstance(errors['failed-operation'], ZoneOperationsError)
+        self.assertEqual(operations.wait_for_zone_operation('operation-1'),
+                         {'name': 'operation-1', 'status': 'DONE'})
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
@@ -0,0 +1,117 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of Operations with fake operation requests
+"""
+import json
+import unittest
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules import operations as operations_module
+from vm_network_migration.modules.other_modules.operations import Operations
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+
+
+def build_http_error(status, message):
+    """ Build an HttpError of the compute engine API
+
+    Args:
+        status: HTTP status code
+        message: error message
+
+    Returns: an HttpError
+
+    """
+    return HttpError(httplib2.Response({'status': status}),
+                     json.dumps({'error': {'message': message}}).encode())
+
+
+class FakeRequest:
+    def __init__(self, results):
+        """ A request which returns the next result at each execution
+
+        Args:
+            results: the responses, or the exceptions to raise
+        """
+        self.results = list(results)
+        self.executions = 0
+
+    def execute(self):
+        result = self.results[min(self.executions, len(self.results) - 1)]
+        self.executions += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestOperations(unittest.TestCase):
+    def setUp(self):
+        self.operations = Operations(None, 'p', zone='z',
+                                     polling_strategy=PollingStrategy(
+                                         jitter=0))
+        patcher = mock.patch.object(operations_module.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testServerSideWait(self):
+        wait_request = FakeRequest([{'status': 'DONE'}])
+        get_request = FakeRequest([{'status': 'DONE'}])
+        result = self.operations.poll_until_done(
+            'operation-1', lambda: get_request, lambda: wait_request)
+        self.assertEqual(result, {'status': 'DONE'})
+        self.assertEqual(wait_request.executions, 1)
+        self.assertEqual(get_request.executions, 0)
+        self.sleep.assert_not_called()
+
+    def testPollingAfterServerSideWaitTimesOut(self):
+        wait_request = FakeRequest([{'status': 'RUNNING'}])
+        get_request = FakeRequest([{'status': 'RUNNING'},
+                                   {'status': 'DONE'}])
+        result = self.operations.poll_until_done(
+            'operation-1', lambda: get_request, lambda: wait_request)
+        self.assertEqual(result, {'status': 'DONE'})
+        self.assertEqual(get_request.executions, 2)
+
+    def testFallbackToPollingWhenWaitFails(self):
+        wait_request = FakeRequest([build_http_error(404, 'Not found')])
+        get_request = FakeRequest([{'status': 'PENDING'},
+                                   {'status': 'RUNNING'},
+                                   {'status': 'DONE'}])
+        result = self.operations.poll_until_done(
+            'operation-1', lambda: get_request, lambda: wait_request)
+        self.assertEqual(result, {'status': 'DONE'})
+        self.assertEqual(get_request.executions, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def testNoLongPoll(self):
+        operations = Operations(None, 'p', zone='z', long_poll=False)
+        wait_request = FakeRequest([{'status': 'DONE'}])
+        get_request = FakeRequest([{'status': 'DONE'}])
+        operations.poll_until_done('operation-1', lambda: get_request,
+                                   lambda: wait_request)
+        self.assertEqual(wait_request.executions, 0)
+        self.assertEqual(get_request.executions, 1)
+
+    def testDeadline(self):
+        operations = Operations(None, 'p', zone='z',
+                                polling_strategy=PollingStrategy(deadline=0))
+        get_request = FakeRequest([{'status': 'RUNNING'}])
+        with self.assertRaises(OperationTimeoutError):
+            operations.poll_until_done('operation-1', lambda: get_request)
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
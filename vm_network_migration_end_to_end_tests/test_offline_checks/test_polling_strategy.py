@@ -0,0 +1,70 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of PollingStrategy
+"""
+import itertools
+import time
+import unittest
+from unittest import mock
+
+from vm_network_migration.errors import *
+from vm_network_migration.modules.other_modules.polling_strategy import PollingStrategy
+
+LATENCY_PROFILES = {
+    'default': {'first_check': 1, 'max_delay': 4},
+    'insert': {'first_check': 2, 'max_delay': 10},
+}
+
+
+class TestPollingStrategy(unittest.TestCase):
+    def testDelaysGrowUpToTheMaximum(self):
+        polling_strategy = PollingStrategy(multiplier=2, jitter=0,
+                                           latency_profiles=LATENCY_PROFILES)
+        self.assertEqual(
+            list(itertools.islice(polling_strategy.generate_delays(), 5)),
+            [1, 2, 4, 4, 4])
+
+    def testLatencyProfileOfTheOperationType(self):
+        polling_strategy = PollingStrategy(multiplier=2, jitter=0,
+                                           latency_profiles=LATENCY_PROFILES)
+        self.assertEqual(list(itertools.islice(
+            polling_strategy.generate_delays(
+                'compute.instanceGroupManagers.insert'), 4)), [2, 4, 8, 10])
+        self.assertEqual(
+            polling_strategy.get_latency_profile('unknownOperation'),
+            LATENCY_PROFILES['default'])
+
+    def testJitterStaysInRange(self):
+        polling_strategy = PollingStrategy(jitter=0.2)
+        for _ in range(100):
+            delay = polling_strategy.add_jitter(10)
+            self.assertGreaterEqual(delay, 8)
+            self.assertLessEqual(delay, 12)
+
+    def testNoDeadlineByDefault(self):
+        polling_strategy = PollingStrategy()
+        self.assertEqual(polling_strategy.deadline, None)
+        polling_strategy.check_deadline(time.monotonic() - 10 ** 6, 10,
+                                        'operation-1')
+
+    def testDeadline(self):
+        polling_strategy = PollingStrategy(deadline=60)
+        with mock.patch.object(time, 'monotonic', return_value=1000):
+            polling_strategy.check_deadline(950, 5, 'operation-1')
+            with self.assertRaises(OperationTimeoutError):
+                polling_strategy.check_deadline(950, 20, 'operation-1')
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
@@ -0,0 +1,124 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of ResourceStore and its scope
+"""
+import unittest
+from unittest import mock
+
+from vm_network_migration.handler_helper.migration_run import migration_run
+from vm_network_migration.modules.other_modules import resource_store as resource_store_module
+from vm_network_migration.modules.other_modules.resource_store import (
+    DEFAULT_RESOURCE_STORE,
+    ResourceStore,
+    build_selfLink,
+    canonical_selfLink,
+)
+
+INSTANCE_SELFLINK = 'https://www.googleapis.com/compute/v1/projects/p/zones/z/instances/instance-1'
+
+
+class FakeRequest:
+    def __init__(self, config):
+        self.config = config
+        self.executions = 0
+
+    def execute(self):
+        self.executions += 1
+        return self.config
+
+
+class TestResourceStore(unittest.TestCase):
+    def testSelfLinks(self):
+        self.assertEqual(canonical_selfLink(INSTANCE_SELFLINK),
+                         'projects/p/zones/z/instances/instance-1')
+        self.assertEqual(build_selfLink('p', 'instances', 'instance-1',
+                                        zone='z'),
+                         'projects/p/zones/z/instances/instance-1')
+        self.assertEqual(build_selfLink('p', 'targetPools', 'pool',
+                                        region='r'),
+                         'projects/p/regions/r/targetPools/pool')
+        self.assertEqual(build_selfLink('p', 'backendServices', 'bs'),
+                         'projects/p/global/backendServices/bs')
+
+    def testConfigIsFetchedOnce(self):
+        resource_store = ResourceStore()
+        request = FakeRequest({'name': 'instance-1'})
+        config = resource_store.get(INSTANCE_SELFLINK, request)
+        # The caller gets a copy
+        config['name'] = 'modified'
+        self.assertEqual(resource_store.get(
+            'projects/p/zones/z/instances/instance-1', request),
+            {'name': 'instance-1'})
+        self.assertEqual(request.executions, 1)
+        self.assertEqual(resource_store.get_stats(), {'hits': 1, 'misses': 1})
+
+    def testPut(self):
+        resource_store = ResourceStore()
+        resource_store.put(INSTANCE_SELFLINK, {'name': 'instance-1'})
+        request = FakeRequest({'name': 'fetched'})
+        self.assertEqual(resource_store.get(INSTANCE_SELFLINK, request),
+                         {'name': 'instance-1'})
+        self.assertEqual(request.executions, 0)
+
+    def testExpiredConfigIsFetchedAgain(self):
+        resource_store = ResourceStore(ttl=10)
+        request = FakeRequest({'name': 'instance-1'})
+        with mock.patch.object(resource_store_module.time, 'monotonic',
+                               return_value=100):
+            resource_store.get(INSTANCE_SELFLINK, request)
+        with mock.patch.object(resource_store_module.time, 'monotonic',
+                               return_value=109):
+            resource_store.get(INSTANCE_SELFLINK, request)
+        self.assertEqual(request.executions, 1)
+        with mock.patch.object(resource_store_module.time, 'monotonic',
+                               return_value=111):
+            resource_store.get(INSTANCE_SELFLINK, request)
+        self.assertEqual(request.executions, 2)
+
+    def testInvalidateOperationTarget(self):
+        resource_store = ResourceStore()
+        resource_store.put(INSTANCE_SELFLINK, {})
+        resource_store.put('projects/p/zones/z/instances/instance-2', {})
+        resource_store.invalidate_operation_target(
+            {'targetLink': INSTANCE_SELFLINK})
+        resource_store.invalidate_operation_target(None)
+        resource_store.invalidate_operation_target({'name': 'operation-1'})
+        self.assertEqual(list(resource_store.configs.keys()),
+                         ['projects/p/zones/z/instances/instance-2'])
+
+    def testManagedInstanceGroupOperationInvalidatesItsInstanceGroup(self):
+        resource_store = ResourceStore()
+        for selfLink in ['projects/p/zones/z/instanceGroupManagers/group',
+                         'projects/p/zones/z/instanceGroups/group',
+                         'projects/p/regions/r/instanceGroups/regional-group',
+                         'projects/p/zones/z/instanceGroups/other-group']:
+            resource_store.put(selfLink, {})
+        resource_store.invalidate_operation_target({
+            'targetLink': 'https://www.googleapis.com/compute/v1/projects/p/zones/z/instanceGroupManagers/group'})
+        resource_store.invalidate_operation_target({
+            'targetLink': 'https://www.googleapis.com/compute/v1/projects/p/regions/r/instanceGroupManagers/regional-group'})
+        self.assertEqual(list(resource_store.configs.keys()),
+                         ['projects/p/zones/z/instanceGroups/other-group'])
+
+    def testMigrationRunClearsTheDefaultStore(self):
+        DEFAULT_RESOURCE_STORE.put(INSTANCE_SELFLINK, {})
+        DEFAULT_RESOURCE_STORE.get(INSTANCE_SELFLINK, FakeRequest({}))
+        with migration_run(None):
+            self.assertEqual(DEFAULT_RESOURCE_STORE.configs, {})
+            self.assertEqual(DEFAULT_RESOURCE_STORE.get_stats(),
+                             {'hits': 0, 'misses': 0})
+
+
+if __name__ == '__main__':
+    unittest.main(failfast=True)
@@ -0,0 +1,139 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the rolling update migration of a managed instance
+group and its rollback, with a mocked instance group
+"""
+import unittest
+from unittest import mock
+
+from vm_network_migration.errors import *
+from vm_network_migration.handlers.instance_group_migration import managed_instance_group_migration as managed_instance_group_migration_module
+from vm_network_migration.handlers.instance_group_migration.managed_instance_group_migration import (
+    ManagedInstanceGroupMigration,
+    MigrationStatus,
+)
+from vm_network_migration.modules.instance_group_modules.managed_instance_group import ManagedInstanceGroup
+
+ORIGINAL_TEMPLATE = 'projects/p/global/instanceTemplates/original'
+NEW_TEMPLATE = 'projects/p/global/instanceTemplates/new'
+ORIGINAL_VERSIONS = [{'instanceTemplate': ORIGINAL_TEMPLATE, 'name': 'v1'}]
+
+
+class TestRollingUpdateMigration(unittest.TestCase):
+    def setUp(self):
+        instance_group = mock.Mock()
+        instance_group.get_target_pools.return_value = []
+        instance_group.original_instance_group_configs = {
+            'instanceTemplate': ORIGINAL_TEMPLATE,
+            'versions': ORIGINAL_VERSIONS,
+            'updatePolicy': {'type': 'OPPORTUNISTIC',
+                             'minimalAction': 'RESTART',
+                             'maxUnavailable': {'fixed': 1}}}
+        instance_group.get_rolling_update_policy.side_effect = \
+            lambda max_surge, max_unavailable: \
+                ManagedInstanceGroup.get_rolling_update_policy(
+                    None, max_surge, max_unavailable)
+        with mock.patch.object(ManagedInstanceGroupMigration,
+                               'build_instance_group',
+                               return_value=instance_group):
+            self.handler = ManagedInstanceGroupMigration(
+                None, 'p', 'network', 'subnetwork', False, 'z', None,
+                'group', rolling_update=True, max_surge=3, max_unavailable=0)
+        self.instance_group = instance_group
+        patcher = mock.patch.object(managed_instance_group_migration_module,
+                                    'InstanceTemplate')
+        instance_template = patcher.start()
+        self.addCleanup(patcher.stop)
+        original_template = instance_template.return_value
+        original_template.compare_original_network_and_target_network.return_value = False
+        self.new_template = original_template.generating_new_instance_template_using_network_info.return_value
+        self.new_template.get_selfLink.return_value = NEW_TEMPLATE
+
+    def get_patched_update_policies(self):
+        return [call[0][0]['updatePolicy'] for call in
+                self.instance_group.patch_instance_group.call_args_list]
+
+    def test_rolling_update(self):
+        self.handler.network_migration()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.INSTANCES_UPDATED)
+        self.instance_group.start_rolling_update.assert_called_once_with(
+            NEW_TEMPLATE, {'type': 'PROACTIVE', 'minimalAction': 'REPLACE',
+                           'maxSurge': {'fixed': 3},
+                           'maxUnavailable': {'fixed': 0}})
+        self.instance_group.delete_instance_group.assert_not_called()
+        # maxSurge wasn't in the original policy, so it is cleared
+        self.assertEqual(self.get_patched_update_policies(), [
+            {'type': 'OPPORTUNISTIC', 'minimalAction': 'RESTART',
+             'maxSurge': None, 'maxUnavailable': {'fixed': 1}}])
+
+    def test_missing_original_policy_is_cleared(self):
+        del self.instance_group.original_instance_group_configs[
+            'updatePolicy']
+        self.handler.network_migration()
+        self.assertEqual(self.get_patched_update_policies(), [
+            {'type': None, 'minimalAction': None, 'maxSurge': None,
+             'maxUnavailable': None}])
+
+    def test_more_than_one_version(self):
+        self.instance_group.original_instance_group_configs['versions'] = \
+            ORIGINAL_VERSIONS * 2
+        with self.assertRaises(MigrationFailed):
+            self.handler.network_migration()
+        self.instance_group.start_rolling_update.assert_not_called()
+
+    def test_rollback_of_failed_update(self):
+        self.instance_group.wait_for_rolling_update.side_effect = [
+            Exception('timeout'), None]
+        with self.assertRaises(Exception):
+            self.handler.network_migration()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.ROLLING_UPDATE_STARTED)
+        self.handler.rollback()
+        # the instances are rolled back to the original versions
+        self.instance_group.start_rolling_update.assert_called_with(
+            ORIGINAL_TEMPLATE, {'type': 'PROACTIVE',
+                                'minimalAction': 'REPLACE',
+                                'maxSurge': {'fixed': 3},
+                                'maxUnavailable': {'fixed': 0}},
+            ORIGINAL_VERSIONS)
+        self.instance_group.wait_for_rolling_update.assert_called_with(
+            ORIGINAL_TEMPLATE)
+        self.assertEqual(len(self.get_patched_update_policies()), 1)
+        self.new_template.delete.assert_called_once_with()
+        self.assertEqual(self.handler.migration_status, 0)
+
+    def test_rollback_after_update(self):
+        self.handler.network_migration()
+        self.handler.rollback()
+        self.assertEqual(
+            self.instance_group.start_rolling_update.call_count, 2)
+        self.assertEqual(len(self.get_patched_update_policies()), 2)
+        self.instance_group.delete_instance_group.assert_not_called()
+        self.new_template.delete.assert_called_once_with()
+
+    def test_failed_rollback_keeps_the_new_template(self):
+        self.instance_group.wait_for_rolling_update.side_effect = Exception(
+            'timeout')
+        with self.assertRaises(Exception):
+            self.handler.network_migration()
+        with self.assertRaises(Exception):
+            self.handler.rollback()
+        self.new_template.delete.assert_not_called()
+        self.assertEqual(self.handler.migration_status,
+                         MigrationStatus.ROLLING_UPDATE_STARTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
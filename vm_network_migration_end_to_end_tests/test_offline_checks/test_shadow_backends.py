@@ -0,0 +1,147 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the shadow mode of a global backend service migration,
+with mocked backend migration handlers
+"""
+import threading
+import time
+import unittest
+from unittest import mock
+
+from vm_network_migration.errors import *
+from vm_network_migration.handlers.backend_service_migration.global_backend_service_migration import GlobalBackendServiceNetworkMigration
+from vm_network_migration.handlers.instance_group_migration.shadow_instance_group_migration import ShadowInstanceGroupMigration
+
+MANAGED_1 = 'projects/p/zones/z/instanceGroups/managed-1'
+MANAGED_2 = 'projects/p/zones/z/instanceGroups/managed-2'
+UNMANAGED_1 = 'projects/p/zones/z/instanceGroups/unmanaged-1'
+UNMANAGED_2 = 'projects/p/zones/z/instanceGroups/unmanaged-2'
+
+
+class MigrationLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+
+    def build_handler(self, group, spec=None):
+        handler = mock.Mock(spec=spec)
+
+        def network_migration():
+            with self.lock:
+                self.events.append(group)
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(0.05)
+            with self.lock:
+                self.running -= 1
+
+        handler.network_migration.side_effect = network_migration
+        return handler
+
+
+class TestShadowBackends(unittest.TestCase):
+    def build_migration(self, groups, **kwargs):
+        backend_service = mock.Mock()
+        backend_service.backend_service_configs = {
+            'backends': [{'group': group} for group in groups]}
+        migration = GlobalBackendServiceNetworkMigration(
+            None, 'p', 'bs', 'network', 'subnetwork', False, backend_service,
+            shadow_backends=True, max_parallel_backends=4, **kwargs)
+        migration.health_gate = mock.Mock()
+        migration.health_gate.check.side_effect = lambda selfLinks: {
+            selfLink: True for selfLink in selfLinks}
+        self.log = MigrationLog()
+        handlers = {}
+        for group in groups:
+            if 'unmanaged' in group:
+                handlers[group] = self.log.build_handler(group)
+            else:
+                handlers[group] = self.log.build_handler(
+                    group, ShadowInstanceGroupMigration)
+        migration.build_shadow_mode_handler = \
+            lambda backend: handlers[backend['group']]
+        return migration
+
+    def test_unmanaged_backends_are_migrated_first_one_by_one(self):
+        migration = self.build_migration(
+            [MANAGED_1, UNMANAGED_1, MANAGED_2, UNMANAGED_2],
+            min_healthy_fraction=0.5)
+        migration.network_migration()
+        self.assertEqual(self.log.events[:2], [UNMANAGED_1, UNMANAGED_2])
+        self.assertEqual(set(self.log.events[2:]), {MANAGED_1, MANAGED_2})
+        self.assertEqual(
+            migration.backend_service.remove_a_backend.call_args_list,
+            [mock.call(UNMANAGED_1), mock.call(UNMANAGED_2)])
+        # each unmanaged backend is waited for before the next one
+        self.assertEqual(
+            migration.health_gate.wait_for_backends.call_args_list,
+            [mock.call([UNMANAGED_1]), mock.call([UNMANAGED_2])])
+        self.assertEqual(len(migration.backend_migration_handlers), 4)
+
+    def test_managed_backends_are_replaced_concurrently(self):
+        migration = self.build_migration([MANAGED_1, MANAGED_2])
+        migration.network_migration()
+        self.assertEqual(self.log.max_running, 2)
+        migration.backend_service.remove_a_backend.assert_not_called()
+
+    def test_unreachable_fraction(self):
+        migration = self.build_migration([MANAGED_1, UNMANAGED_1],
+                                         min_healthy_fraction=0.75)
+        with self.assertRaises(MigrationFailed):
+            migration.network_migration()
+        self.assertEqual(self.log.events, [])
+
+    def test_unmanaged_backend_waits_for_healthy_backends(self):
+        migration = self.build_migration([MANAGED_1, UNMANAGED_1],
+                                         min_healthy_fraction=0.5)
+        checks = []
+
+        def check(selfLinks):
+            checks.append(selfLinks)
+            if len(checks) == 1:
+                # the managed backend becomes healthy after the first check
+                migration.scheduler_event.set()
+                return {selfLink: False for selfLink in selfLinks}
+            return {selfLink: True for selfLink in selfLinks}
+
+        migration.health_gate.check.side_effect = check
+        migration.network_migration()
+        self.assertEqual(len(checks), 2)
+        self.assertEqual(self.log.events, [UNMANAGED_1, MANAGED_1])
+
+    def test_unhealthy_backends_time_out(self):
+        migration = self.build_migration([MANAGED_1, UNMANAGED_1],
+                                         min_healthy_fraction=0.5,
+                                         health_timeout=-1)
+        migration.health_gate.check.side_effect = lambda selfLinks: {
+            selfLink: False for selfLink in selfLinks}
+        with self.assertRaises(MigrationFailed):
+            migration.network_migration()
+        self.assertEqual(self.log.events, [])
+
+    def test_failed_unmanaged_backend_skips_the_rest(self):
+        migration = self.build_migration([UNMANAGED_1, MANAGED_1])
+        migration.build_shadow_mode_handler(
+            {'group': UNMANAGED_1}).network_migration.side_effect = \
+            Exception('failed')
+        with self.assertRaises(Exception):
+            migration.network_migration()
+        self.assertEqual(self.log.events, [])
+        migration.backend_service.add_a_backend.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Offline checks of the target pool membership changes and of the target
+pool migration rollback, with a mocked API
+"""
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
+from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
+from vm_network_migration.handlers.target_pool_migration import target_pool_migration as target_pool_migration_module
+from vm_network_migration.handlers.target_pool_migration.target_pool_migration import TargetPoolMigration
+from vm_network_migration.modules.target_pool_modules import target_pool as target_pool_module
+from vm_network_migration.modules.target_pool_modules.target_pool import TargetPool
+from vm_network_migration_end_to_end_tests.test_offline_checks.test_operations import build_http_error
+
+INSTANCES = ['projects/p/zones/z/instances/i%d' % i for i in range(4)]
+
+
+def build_target_pool(bad_instances=()):
+    """ Build a TargetPool whose addInstance and removeInstance requests
+    fail if they have one of the bad instances
+    """
+    with mock.patch.object(TargetPool, '__init__', return_value=None):
+        target_pool = TargetPool()
+    target_pool.compute = mock.Mock()
+    target_pool.project = 'p'
+    target_pool.region = 'r'
+    target_pool.target_pool_name = 'pool'
+    target_pool.operations = mock.Mock()
+    target_pool.requests = []
+
+    def request(method_name):
+        def api_method(project, region, targetPool, body):
+            instance_selfLinks = [instance['instance'] for instance in
+                                  body['instances']]
+            target_pool.requests.append((method_name, instance_selfLinks))
+            if any(bad in instance_selfLinks for bad in bad_instances):
+                raise build_http_error(400, 'The resource is not ready')
+            return mock.Mock(execute=lambda: {'name': 'operation'})
+
+        return api_method
+
+    target_pool.compute.targetPools.return_value.addInstance = request('add')
+    target_pool.compute.targetPools.return_value.removeInstance = request(
+        'remove')
+    return target_pool
+
+
+class TestChangeInstances(unittest.TestCase):
+    def test_one_request_per_chunk(self):
+        target_pool = build_target_pool()
+        with mock.patch.object(target_pool_module,
+                               'MAX_INSTANCES_PER_REQUEST', 3):
+            operations = target_pool.add_instances(INSTANCES)
+        self.assertEqual(len(operations), 2)
+        self.assertEqual(target_pool.requests, [('add', INSTANCES[:3]),
+                                                ('add', INSTANCES[3:])])
+
+    def test_failed_chunk_is_sent_one_by_one(self):
+        target_pool = build_target_pool(bad_instances=[INSTANCES[1]])
+        with self.assertRaises(HttpError):
+            target_pool.remove_instances(INSTANCES)
+        self.assertEqual(target_pool.requests, [('remove', INSTANCES)] + [
+            ('remove', [instance]) for instance in INSTANCES])
+
+    def test_failed_operation_is_sent_one_by_one(self):
+        target_pool = build_target_pool()
+        target_pool.operations.wait_for_region_operation.side_effect = [
+            RegionOperationsError('failed'), None, None]
+        operations = target_pool.add_instances(INSTANCES[:2])
+        self.assertEqual(len(operations), 2)
+        self.assertEqual(target_pool.requests, [
+            ('add', INSTANCES[:2]), ('add', INSTANCES[:1]),
+            ('add', INSTANCES[1:2])])
+
+
+class TestTargetPoolRollback(unittest.TestCase):
+    def build_migration(self, target_pool, number_of_instances):
+        with mock.patch.object(TargetPoolMigration, '__init__',
+                               return_value=None):
+            migration = TargetPoolMigration()
+        migration.target_pool_name = 'pool'
+        migration.target_pool = target_pool
+        migration.instance_migration_handlers = []
+        for instance in INSTANCES[:number_of_instances]:
+            handler = mock.Mock(original_instance_name=instance)
+            handler.get_instance_selfLink.return_value = instance
+            migration.instance_migration_handlers.append(handler)
+        migration.instance_group_migration_handlers = []
+        return migration
+
+    def test_rolled_back_instances_are_reattached_together(self):
+        target_pool = build_target_pool()
+        migration = self.build_migration(target_pool, 3)
+        migration.rollback()
+        self.assertEqual(target_pool.requests, [('add', INSTANCES[:3])])
+
+    def test_one_bad_instance_doesnt_block_the_others(self):
+        target_pool = build_target_pool(bad_instances=[INSTANCES[0]])
+        migration = self.build_migration(target_pool, 3)
+        with self.assertRaises(HttpError):
+            migration.rollback()
+        self.assertIn(('add', [INSTANCES[2]]), target_pool.requests)
+        self.assertIn(('add', [INSTANCES[1]]), target_pool.requests)
+
+    def test_failed_instance_rollback(self):
+        target_pool = build_target_pool()
+        migration = self.build_migration(target_pool, 3)
+        migration.instance_migration_handlers[
+            1].rollback.side_effect = Exception('failed')
+        with self.assertRaises(Exception):
+            migration.rollback()
+        # the instance rolled back before the failure is reattached
+        self.assertEqual(target_pool.requests, [('add', INSTANCES[:1])])
+
+
+class TestWaitForHealthyInstances(unittest.TestCase):
+    def setUp(self):
+        self.target_pool = build_target_pool()
+        # the healthy instances of each check, in the order of the checks
+        self.rounds = []
+        self.checks = []
+
+        def get_health_of_instances(instance_selfLinks):
+            self.checks.append(list(instance_selfLinks))
+            healthy_instances = self.rounds.pop(0)
+            return {instance_selfLink: instance_selfLink in healthy_instances
+                    for instance_selfLink in instance_selfLinks}
+
+        self.target_pool.get_health_of_instances = get_health_of_instances
+        patcher = mock.patch.object(target_pool_module.time, 'sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_threshold_reached_in_one_round(self):
+        self.rounds = [INSTANCES[:2]]
+        self.assertTrue(self.target_pool.wait_for_healthy_instances(
+            lambda: INSTANCES[:3], 2))
+        self.assertEqual(self.checks, [INSTANCES[:3]])
+
+    def test_counted_instances_are_checked_again(self):
+        self.rounds = [
+            [INSTANCES[0]],
+            # the second instance becomes healthy, so the first one is
+            # checked again, and it isn't healthy anymore
+            [INSTANCES[1]], [],
+            [INSTANCES[0], INSTANCES[2]], [INSTANCES[1]]]
+        self.assertTrue(self.target_pool.wait_for_healthy_instances(
+            lambda: INSTANCES[:3], 2))
+        self.assertEqual(self.checks, [
+            INSTANCES[:3], INSTANCES[1:3], INSTANCES[:1],
+            [INSTANCES[0], INSTANCES[2]], INSTANCES[1:2]])
+
+    def test_timeout(self):
+        self.rounds = [[]] * 100
+        self.assertFalse(self.target_pool.wait_for_healthy_instances(
+            lambda: INSTANCES[:1], 1, TIME_OUT=0))
+
+
+class TestHealthyThresholdOption(unittest.TestCase):
+    def test_option_reaches_the_handler(self):
+        selfLink_executor = SelfLinkExecutor(
+            None, 'projects/p/regions/r/targetPools/pool', 'network',
+            'subnetwork', options=MigrationOptions(
+                target_pool_batch_size=2, target_pool_healthy_threshold=3))
+        with mock.patch.object(target_pool_migration_module,
+                               'TargetPoolMigration') as target_pool_migration:
+            selfLink_executor.build_target_pool_migration_handler()
+        target_pool_migration.assert_called_once_with(
+            None, 'p', 'pool', 'network', 'subnetwork', False, 'r', 2, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
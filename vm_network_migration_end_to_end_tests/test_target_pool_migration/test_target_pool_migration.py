@@ -19,6 +19,7 @@ import warnings
 import google.auth
 from googleapiclient import discovery
 from vm_network_migration.errors import *
+from vm_network_migration.handler_helper.migration_options import MigrationOptions
 from vm_network_migration.handler_helper.selfLink_executor import SelfLinkExecutor
 from vm_network_migration_end_to_end_tests.build_test_resource import TestResourceCreator
 from vm_network_migration_end_to_end_tests.check_result import *
@@ -71,8 +72,7 @@ class TestTargetPoolMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_target_pool_instance_list = \
             self.google_api_interface.get_target_pool_config(target_pool_name)[
@@ -93,6 +93,55 @@ class TestTargetPoolMigration(unittest.TestCase):
                                                self.test_resource_creator.subnetwork_selfLink))
         print('Pass the current test')
 
+    def testInstancesMigratedInBatches(self):
+        """ The single instances of the target pool are detached and
+        reattached in batches
+        """
+        ### create test resources
+        instance_names = ['end-to-end-test-instance-1',
+                          'end-to-end-test-instance-2',
+                          'end-to-end-test-instance-3']
+        instance_selfLinks = []
+        for instance_name in instance_names:
+            operation = self.test_resource_creator.create_instance_using_template(
+                instance_name,
+                self.test_resource_creator.legacy_instance_template_selfLink)
+            instance_selfLinks.append(operation['targetLink'])
+
+        target_pool_name = 'end-to-end-test-target-pool'
+        operation = self.test_resource_creator.create_target_pool_with_health_check(
+            'sample_target_pool_with_no_instance.json',
+            target_pool_name,
+            [],
+            instance_selfLinks,
+            health_check_selfLink=None)
+        target_pool_selfLink = operation['targetLink']
+        original_target_pool_instance_list = \
+            self.google_api_interface.get_target_pool_config(target_pool_name)[
+                'instances']
+
+        ### start migration
+        selfLink_executor = SelfLinkExecutor(self.compute, target_pool_selfLink,
+                                             self.test_resource_creator.network_name,
+                                             self.test_resource_creator.subnetwork_name,
+                                             options=MigrationOptions(target_pool_batch_size=2))
+        selfLink_executor.run()
+        ### check migration result
+        new_target_pool_instance_list = \
+            self.google_api_interface.get_target_pool_config(target_pool_name)[
+                'instances']
+        # target pool's instances unchanged
+        self.assertTrue(compare_two_list(new_target_pool_instance_list,
+                                         original_target_pool_instance_list))
+        # instances' network changed
+        for instance_name in instance_names:
+            new_instance_config = self.google_api_interface.get_instance_configs(
+                instance_name)
+            self.assertTrue(check_instance_network(new_instance_config,
+                                                   self.test_resource_creator.network_selfLink,
+                                                   self.test_resource_creator.subnetwork_selfLink))
+        print('Pass the current test')
+
     def testOnlyManagedInstanceGroupsAsBackend(self):
         """ The target pool is served by managed instance groups
          """
@@ -129,8 +178,7 @@ class TestTargetPoolMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_instance_template_1_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
             group_name_1)
@@ -198,8 +246,7 @@ class TestTargetPoolMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_instance_template_1_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
             group_name_1)
@@ -259,8 +306,7 @@ class TestTargetPoolMigration(unittest.TestCase):
                                              self.test_resource_creator.network_name,
                                              self.test_resource_creator.subnetwork_name,
                                              )
-        migration_handler = selfLink_executor.build_migration_handler()
-        migration_handler.network_migration()
+        selfLink_executor.run()
         ### check migration result
         new_instance_template_1_configs = self.google_api_interface.get_multi_zone_instance_template_configs(
             group_name_1)
@@ -334,8 +380,7 @@ class TestTargetPoolMigration(unittest.TestCase):
                                              )
         # the migration will not start, and raise an error
         with self.assertRaises(AmbiguousTargetResource):
-            migration_handler = selfLink_executor.build_migration_handler()
-            migration_handler.network_migration()
+            selfLink_executor.run()
 
         ### check migration result
         # unmanaged instance group doesn't change